@@ -6,6 +6,12 @@ import datetime
 import argparse
 import config
 import sys
+import time
+import threading
+import ocr_cache
+import ocr_preprocessing
+import segment_classifier
+import ocr_engines
 
 # Importation du module de localisation
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
@@ -14,52 +20,96 @@ _ = get_translator()
 
 # Configuration spécifique à ce script
 OCR_LANGUAGE = config.OCR_LANGUAGE
-
-parser = argparse.ArgumentParser(description=_('SCRIPT_DESCRIPTION'))
-parser.add_argument('--chapter_unit', type=str, required=True,
-                    help=_('CHAPTER_UNIT_HELP'))
-args = parser.parse_args()
-CHAPTER_UNIT_DIR = args.chapter_unit
+# Moteur OCR (ocr_engines.OCR_ENGINES) : créé au premier segment de chaque processus, puis gardé par le worker
+OCR_ENGINE = config.OCR_ENGINE
+# Durée maximale de Tesseract sur un segment (0 = illimitée) : au-delà, pytesseract tue le processus Tesseract
+# (moteur 'pytesseract' seulement ; avec 'tesserocr', seul TIMEOUT_SECONDS_BY_STAGE arrête un worker bloqué)
+OCR_SEGMENT_TIMEOUT_SECONDS = config.OCR_SEGMENT_TIMEOUT_SECONDS
+# True = les segments sans texte (segment_classifier.py) ne sont pas passés à Tesseract
+SKIP_BLANK_SEGMENTS = config.SKIP_BLANK_SEGMENTS
 
 PROCESSED_IMAGES_SUBFOLDER_NAME = config.PROCESSED_IMAGES_SUBFOLDER_NAME
-BASE_INPUT_DIR = os.path.join(CHAPTER_UNIT_DIR, PROCESSED_IMAGES_SUBFOLDER_NAME)
-
 OUTPUT_TEXT_SUBFOLDER_NAME = config.OUTPUT_TEXT_SUBFOLDER_NAME
-OUTPUT_DIR = os.path.join(CHAPTER_UNIT_DIR, OUTPUT_TEXT_SUBFOLDER_NAME)
 
-ERROR_LOG_FILE = os.path.join(CHAPTER_UNIT_DIR, 'ocr_errors.log') 
+ERROR_LOG_FILE_NAME = 'ocr_errors.log'
 
-def log_error(message, image_name="N/A", level="ERROR"):
+def log_error(chapter_unit_dir, message, image_name="N/A", level="ERROR"):
     timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    log_message = f"[{timestamp}] [{_('UNITÉ_CHAPITRE')}: {os.path.basename(CHAPTER_UNIT_DIR)}] [{_('IMAGE')}: {image_name}] {level}: {message}"
+    log_message = f"[{timestamp}] [{_('UNITÉ_CHAPITRE')}: {os.path.basename(chapter_unit_dir)}] [{_('IMAGE')}: {image_name}] {level}: {message}"
     
-    with open(ERROR_LOG_FILE, 'a', encoding='utf-8') as f:
+    with open(os.path.join(chapter_unit_dir, ERROR_LOG_FILE_NAME), 'a', encoding='utf-8') as f:
         f.write(log_message + '\n')
     print(f"  {log_message}")
 
 # pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
 
-if not os.path.exists(OUTPUT_DIR):
-    os.makedirs(OUTPUT_DIR)
-    print(_('OUTPUT_FOLDER_CREATED').format(OUTPUT_DIR))
+TESSERACT_CONFIG = '--dpi 300 --psm 3 --oem 3'
 
-if os.path.exists(ERROR_LOG_FILE):
-    os.remove(ERROR_LOG_FILE)
-    print(_('PREVIOUS_LOG_DELETED').format(ERROR_LOG_FILE))
+_ocr_engine = None
+_ocr_engine_lock = threading.Lock()
 
-print(_('START_OCR').format(os.path.basename(CHAPTER_UNIT_DIR)))
-print(_('TEXT_FILES_SAVED').format(OUTPUT_DIR))
-print(_('OCR_LANGUAGE').format(OCR_LANGUAGE))
+# --- Moteur OCR de ce processus (OCR_ENGINE) ; lève ocr_engines.OCREngineUnavailableError s'il ne peut pas être chargé ---
+def get_ocr_engine():
+    global _ocr_engine
+    with _ocr_engine_lock:
+        if _ocr_engine is None:
+            _ocr_engine = ocr_engines.create_engine(OCR_ENGINE, config.FAKE_OCR_MS_PER_MEGAPIXEL)
+        return _ocr_engine
 
+# --- Remplace le moteur OCR de ce processus (benchmarks : voir benchmarks/fake_ocr.py) ---
+def set_ocr_engine(engine):
+    global _ocr_engine
+    with _ocr_engine_lock:
+        _ocr_engine = engine
+
+# Origine du texte d'un segment (troisième valeur retournée par ocr_image) : clé de son compteur dans le chapitre
+SEGMENT_CACHE_HIT = 'hits'
+SEGMENT_OCR_DONE = 'misses'
+SEGMENT_SKIPPED = 'skipped'
+# Segment illisible ou erreur de l'OCR : le chapitre échoue (réessayé puis mis en quarantaine par l'orchestrateur)
+SEGMENT_FAILED = 'failed'
+
+# --- Compteurs des segments d'un chapitre selon l'origine de leur texte ---
+def new_segment_counters():
+    return {SEGMENT_CACHE_HIT: 0, SEGMENT_OCR_DONE: 0, SEGMENT_SKIPPED: 0, SEGMENT_FAILED: 0}
+
+# --- Affiche les compteurs du cache OCR et des segments ignorés d'un chapitre ---
+def print_segment_counters(segment_counters):
+    if ocr_cache.OCR_CACHE_ENABLED:
+        print(_('OCR_CACHE_CHAPTER_STATS').format(segment_counters[SEGMENT_CACHE_HIT], segment_counters[SEGMENT_OCR_DONE]))
+    if SKIP_BLANK_SEGMENTS:
+        print(_('BLANK_SEGMENTS_CHAPTER_STATS').format(segment_counters[SEGMENT_SKIPPED]))
+
+# --- Prépare le dossier de sortie et le log d'erreurs d'une unité de chapitre ---
+def prepare_ocr_output(chapter_unit_dir):
+    output_dir = os.path.join(chapter_unit_dir, OUTPUT_TEXT_SUBFOLDER_NAME)
+    error_log_file = os.path.join(chapter_unit_dir, ERROR_LOG_FILE_NAME)
+
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+        print(_('OUTPUT_FOLDER_CREATED').format(output_dir))
+
+    if os.path.exists(error_log_file):
+        os.remove(error_log_file)
+        print(_('PREVIOUS_LOG_DELETED').format(error_log_file))
+
+    print(_('START_OCR').format(os.path.basename(chapter_unit_dir)))
+    print(_('TEXT_FILES_SAVED').format(output_dir))
+    print(_('OCR_LANGUAGE').format(OCR_LANGUAGE))
+
+# --- Liste les segments à traiter (ordre des segments = ordre du texte final), None si rien à traiter ---
+def list_chapter_segments(chapter_unit_dir):
+    base_input_dir = os.path.join(chapter_unit_dir, PROCESSED_IMAGES_SUBFOLDER_NAME)
+
+    if not os.path.exists(base_input_dir):
+        log_error(chapter_unit_dir, _('INPUT_FOLDER_NOT_FOUND').format(PROCESSED_IMAGES_SUBFOLDER_NAME), "N/A")
+        return None
+
+    all_png_files_in_subdir = [f for f in os.listdir(base_input_dir) if f.lower().endswith('.png')]
 
-if not os.path.exists(BASE_INPUT_DIR):
-    log_error(_('INPUT_FOLDER_NOT_FOUND').format(PROCESSED_IMAGES_SUBFOLDER_NAME), "N/A")
-else:
-    all_png_files_in_subdir = [f for f in os.listdir(BASE_INPUT_DIR) if f.lower().endswith('.png')]
-    
     chapter_images = []
     excluded_original_files = [] 
-    
+
     for f in all_png_files_in_subdir:
         if not f.lower().endswith('_original.png'):
             chapter_images.append(f)
@@ -70,73 +120,177 @@ else:
 
     if excluded_original_files:
         print(_('IGNORED_ORIGINAL_FILES').format(', '.join(excluded_original_files)))
-    print(_('PNG_FILES_TO_PROCESS').format(os.path.basename(CHAPTER_UNIT_DIR), chapter_images))
+    print(_('PNG_FILES_TO_PROCESS').format(os.path.basename(chapter_unit_dir), chapter_images))
 
     if not chapter_images:
-        log_error(_('NO_PNG_FILES_FOUND').format(PROCESSED_IMAGES_SUBFOLDER_NAME), "N/A")
+        log_error(chapter_unit_dir, _('NO_PNG_FILES_FOUND').format(PROCESSED_IMAGES_SUBFOLDER_NAME), "N/A")
+        return None
+
+    return chapter_images
+
+# --- OCR d'une image déjà chargée (segment lu sur disque ou reçu en mémoire) ---
+# Retourne (texte, arrêt_du_chapitre, origine) ; origine : SEGMENT_CACHE_HIT, SEGMENT_OCR_DONE, SEGMENT_SKIPPED ou SEGMENT_FAILED ;
+# arrêt_du_chapitre est True quand Tesseract est introuvable : inutile de traiter les segments suivants.
+# Avec SKIP_BLANK_SEGMENTS, un segment sans texte (segment_classifier.py) donne un texte vide sans appeler Tesseract.
+# Avec OCR_PREPROCESSING (ou un réglage du livre dans OCR_PREPROCESSING_BY_BOOK), le segment est d'abord préparé par
+# ocr_preprocessing.py ; la clé du cache est calculée sur le segment d'origine et les réglages de la préparation.
+def ocr_image(chapter_unit_dir, img, img_filename):
+    try:
+        if SKIP_BLANK_SEGMENTS:
+            no_text_reason = segment_classifier.find_no_text_reason(img)
+            if no_text_reason:
+                print(_('SEGMENT_SKIPPED_NO_TEXT').format(img_filename, _(f'SEGMENT_NO_TEXT_{no_text_reason.upper()}')))
+                return "", False, SEGMENT_SKIPPED
+
+        ocr_engine = get_ocr_engine()
+        preprocessing_settings = ocr_preprocessing.get_settings(chapter_unit_dir)
+        cache_key = None
+        if ocr_cache.OCR_CACHE_ENABLED:
+            cache_key = ocr_cache.compute_cache_key(img, OCR_LANGUAGE, TESSERACT_CONFIG + ocr_preprocessing.get_settings_signature(preprocessing_settings)
+                                                    + ocr_engine.cache_signature)
+            cached_text = ocr_cache.lookup(cache_key)
+            if cached_text is not None:
+                print(_('OCR_CACHE_HIT').format(img_filename))
+                return cached_text, False, SEGMENT_CACHE_HIT
+
+        if preprocessing_settings['enabled']:
+            start_time = time.perf_counter()
+            img, details = ocr_preprocessing.preprocess_segment(img, preprocessing_settings)
+            print(_('OCR_SEGMENT_PREPROCESSED').format(img_filename, details['skew_degrees'], details['x_height'], details['scale'],
+                                                       time.perf_counter() - start_time))
+
+        extracted_text_segment = ocr_engine.image_to_string(img, OCR_LANGUAGE, TESSERACT_CONFIG, timeout=OCR_SEGMENT_TIMEOUT_SECONDS)
+
+        if cache_key:
+            ocr_cache.store(cache_key, extracted_text_segment)
+
+        print(_('OCR_SUCCESS').format(img_filename))
+        return extracted_text_segment, False, SEGMENT_OCR_DONE
+
+    except pytesseract.TesseractNotFoundError:
+        log_error(chapter_unit_dir, _('TESSERACT_NOT_FOUND'), img_filename, level="CRITICAL")
+        return f"\n[{_('CRITICAL_TESSERACT_ERROR')}]\n", True, SEGMENT_FAILED
+    except ocr_engines.OCREngineUnavailableError as e:
+        log_error(chapter_unit_dir, _('OCR_ENGINE_UNAVAILABLE').format(OCR_ENGINE, e), img_filename, level="CRITICAL")
+        return f"\n[{_('CRITICAL_OCR_ENGINE_ERROR')}]\n", True, SEGMENT_FAILED
+    except Exception as e:
+        error_message = str(e)
+        # pytesseract lève RuntimeError('Tesseract process timeout') après avoir tué un Tesseract bloqué
+        if isinstance(e, RuntimeError) and 'timeout' in error_message.lower():
+            error_message = _('OCR_SEGMENT_TIMEOUT').format(OCR_SEGMENT_TIMEOUT_SECONDS)
+        log_error(chapter_unit_dir, _('UNEXPECTED_PROCESSING_ERROR').format(error_message), img_filename, level="ERROR")
+        return f"\n[{_('OCR_SEGMENT_ERROR')}: {error_message}]\n", False, SEGMENT_FAILED
+
+# --- OCR d'un seul segment enregistré dans images_processed : retourne (texte, arrêt_du_chapitre, origine) ---
+def ocr_segment(chapter_unit_dir, img_filename):
+    current_image_path = os.path.join(chapter_unit_dir, PROCESSED_IMAGES_SUBFOLDER_NAME, img_filename)
+    try:
+        img = Image.open(current_image_path)
+    except Exception as e:
+        log_error(chapter_unit_dir, _('UNEXPECTED_PROCESSING_ERROR').format(e), img_filename, level="ERROR")
+        return f"\n[{_('OCR_SEGMENT_ERROR')}: {e}]\n", False, SEGMENT_FAILED
+    # Le fichier de l'image est fermé dès l'OCR terminé (un worker traite des milliers de segments)
+    with img:
+        return ocr_image(chapter_unit_dir, img, img_filename)
+
+CHAPTER_NUMBER_PATTERN = re.compile(r'^(?:Chapter\s*)?(\d+)\s*(?:[ -]+)?(.*)$', re.IGNORECASE)
+
+# --- Nom du fichier texte de sortie (sans extension) à partir du nom de l'unité de chapitre, sans rien journaliser ---
+# Utilisé aussi par l'orchestrateur pour retrouver le texte final exact d'un chapitre dans final_texts.
+def format_output_filename_base(chapter_unit_name):
+    unit_base_name = chapter_unit_name.replace('_unzipped', '')
+
+    chapter_num_match = CHAPTER_NUMBER_PATTERN.match(unit_base_name)
+
+    formatted_chapter_number_str = ""
+    raw_title_part = ""
+
+    if chapter_num_match:
+        chapter_number_int = int(chapter_num_match.group(1))
+        formatted_chapter_number_str = f"{chapter_number_int:04d}"
+        raw_title_part = chapter_num_match.group(2).strip()
     else:
-        full_extracted_text_for_chapter = []
+        raw_title_part = unit_base_name
 
-        for img_filename in chapter_images:
-            current_image_path = os.path.join(BASE_INPUT_DIR, img_filename)
-            try:
-                img = Image.open(current_image_path)
-                
-                config_tesseract = '--dpi 300 --psm 3 --oem 3' 
-                extracted_text_segment = pytesseract.image_to_string(img, lang=OCR_LANGUAGE, config=config_tesseract)
-                
-                full_extracted_text_for_chapter.append(extracted_text_segment)
-                print(_('OCR_SUCCESS').format(img_filename))
-
-            except pytesseract.TesseractNotFoundError:
-                log_error(_('TESSERACT_NOT_FOUND'), img_filename, level="CRITICAL")
-                full_extracted_text_for_chapter.append(f"\n[{_('CRITICAL_TESSERACT_ERROR')}]\n")
-                break
-            except Exception as e:
-                log_error(_('UNEXPECTED_PROCESSING_ERROR').format(e), img_filename, level="ERROR")
-                full_extracted_text_for_chapter.append(f"\n[{_('OCR_SEGMENT_ERROR')}: {e}]\n")
-                
-        extracted_text = "\n\n".join(full_extracted_text_for_chapter)
+    cleaned_title_part = re.sub(r'^(?:Chapter\s*\d+\s*[ -]+\s*)*', '', raw_title_part, flags=re.IGNORECASE).strip()
+    cleaned_title_part = re.sub(r'[\\/:*?"<>|]', '', cleaned_title_part)
+    cleaned_title_part = re.sub(r'[ -]+', '_', cleaned_title_part)
+    cleaned_title_part = cleaned_title_part.strip('_')
 
-        unit_base_name = os.path.basename(CHAPTER_UNIT_DIR)
+    if formatted_chapter_number_str:
+        output_filename_base = f"Chapter_{formatted_chapter_number_str}_{cleaned_title_part}"
+    else:
+        output_filename_base = f"Chapter_{cleaned_title_part}" if cleaned_title_part else "untitled_chapter"
 
-        unit_base_name = unit_base_name.replace('_unzipped', '')
-        
-        chapter_num_match = re.match(r'^(?:Chapter\s*)?(\d+)\s*(?:[ -]+)?(.*)$', unit_base_name, re.IGNORECASE)
+    if not cleaned_title_part and formatted_chapter_number_str:
+        output_filename_base = f"Chapter_{formatted_chapter_number_str}"
+    elif not cleaned_title_part and not formatted_chapter_number_str:
+        output_filename_base = "untitled_chapter"
 
-        formatted_chapter_number_str = ""
-        raw_title_part = ""
+    return output_filename_base
 
-        if chapter_num_match:
-            chapter_number_int = int(chapter_num_match.group(1))
-            formatted_chapter_number_str = f"{chapter_number_int:04d}"
-            raw_title_part = chapter_num_match.group(2).strip()
-        else:
-            log_error(_('CHAPTER_NUMBER_NOT_FOUND').format(unit_base_name), "N/A", level="WARNING")
-            raw_title_part = unit_base_name
+# --- Nom du fichier texte de sortie à partir du nom de l'unité de chapitre ---
+def build_output_filename_base(chapter_unit_dir):
+    unit_base_name = os.path.basename(chapter_unit_dir).replace('_unzipped', '')
+    if not CHAPTER_NUMBER_PATTERN.match(unit_base_name):
+        log_error(chapter_unit_dir, _('CHAPTER_NUMBER_NOT_FOUND').format(unit_base_name), "N/A", level="WARNING")
+    return format_output_filename_base(unit_base_name)
 
-        cleaned_title_part = re.sub(r'^(?:Chapter\s*\d+\s*[ -]+\s*)*', '', raw_title_part, flags=re.IGNORECASE).strip()
-        cleaned_title_part = re.sub(r'[\\/:*?"<>|]', '', cleaned_title_part)
-        cleaned_title_part = re.sub(r'[ -]+', '_', cleaned_title_part)
-        cleaned_title_part = cleaned_title_part.strip('_')
+# --- Assemble les textes des segments (dans l'ordre) et écrit le fichier texte du chapitre ---
+def write_chapter_text(chapter_unit_dir, segment_texts):
+    extracted_text = "\n\n".join(segment_texts)
 
-        if formatted_chapter_number_str:
-            output_filename_base = f"Chapter_{formatted_chapter_number_str}_{cleaned_title_part}"
-        else:
-            output_filename_base = f"Chapter_{cleaned_title_part}" if cleaned_title_part else "untitled_chapter"
+    output_dir = os.path.join(chapter_unit_dir, OUTPUT_TEXT_SUBFOLDER_NAME)
+    output_filepath = os.path.join(output_dir, f"{build_output_filename_base(chapter_unit_dir)}.txt")
+
+    with open(output_filepath, 'w', encoding='utf-8') as f:
+        f.write(extracted_text)
+
+    print(_('PROCESSING_COMPLETE').format(os.path.basename(chapter_unit_dir), os.path.basename(output_filepath)))
 
-        if not cleaned_title_part and formatted_chapter_number_str:
-            output_filename_base = f"Chapter_{formatted_chapter_number_str}"
-        elif not cleaned_title_part and not formatted_chapter_number_str:
-            output_filename_base = "untitled_chapter"
+# --- Un segment au moins a échoué : l'étape échoue (exception) sans écrire le texte, pour que l'orchestrateur
+# réessaie le chapitre (puis le mette en quarantaine) au lieu de le terminer avec des trous ---
+def raise_if_segments_failed(chapter_unit_dir, failed_segment_count, segment_count):
+    if failed_segment_count:
+        message = _('CHAPTER_SEGMENTS_FAILED').format(failed_segment_count, segment_count)
+        log_error(chapter_unit_dir, message, "N/A", level="ERROR")
+        raise RuntimeError(message)
 
+def finish_ocr(chapter_unit_dir):
+    print(_('OCR_FINISHED').format(os.path.basename(chapter_unit_dir)))
+    print(_('CHECK_LOG_FOR_ERRORS').format(os.path.join(chapter_unit_dir, ERROR_LOG_FILE_NAME)))
 
-        output_filepath = os.path.join(OUTPUT_DIR, f"{output_filename_base}.txt")
+# --- Fonction principale : OCR des segments d'une unité de chapitre, un segment après l'autre ---
+# (l'orchestrateur en mode 'pool' répartit plutôt les segments sur tous les workers, voir stage_workers.py)
+# Retourne les compteurs des segments de ce chapitre : {'hits': ..., 'misses': ..., 'skipped': ..., 'failed': ...}
+def ocr_chapter_unit(chapter_unit_dir):
+    segment_counters = new_segment_counters()
+    prepare_ocr_output(chapter_unit_dir)
+
+    chapter_images = list_chapter_segments(chapter_unit_dir)
+    if chapter_images:
+        full_extracted_text_for_chapter = []
+
+        for img_filename in chapter_images:
+            extracted_text_segment, stop_chapter, segment_origin = ocr_segment(chapter_unit_dir, img_filename)
+            full_extracted_text_for_chapter.append(extracted_text_segment)
+            segment_counters[segment_origin] += 1
+            if stop_chapter:
+                break
 
-        with open(output_filepath, 'w', encoding='utf-8') as f:
-            f.write(extracted_text)
+        print_segment_counters(segment_counters)
+        raise_if_segments_failed(chapter_unit_dir, segment_counters[SEGMENT_FAILED], len(chapter_images))
+        write_chapter_text(chapter_unit_dir, full_extracted_text_for_chapter)
+        finish_ocr(chapter_unit_dir)
+        return segment_counters
 
-        print(_('PROCESSING_COMPLETE').format(os.path.basename(CHAPTER_UNIT_DIR), os.path.basename(output_filepath)))
+    print_segment_counters(segment_counters)
+    finish_ocr(chapter_unit_dir)
+    return segment_counters
 
-print(_('OCR_FINISHED').format(os.path.basename(CHAPTER_UNIT_DIR)))
-print(_('CHECK_LOG_FOR_ERRORS').format(ERROR_LOG_FILE))
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=_('SCRIPT_DESCRIPTION'))
+    parser.add_argument('--chapter_unit', type=str, required=True,
+                        help=_('CHAPTER_UNIT_HELP'))
+    args = parser.parse_args()
+    ocr_chapter_unit(args.chapter_unit)
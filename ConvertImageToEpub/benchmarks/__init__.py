@@ -0,0 +1,5 @@
+# --- Benchmarks du pipeline image -> texte -> EPUB ---
+# synthetic_library.py : images "capture de webnovel" synthétiques (texte connu) et bibliothèques de chapitres / .cbz factices
+# fake_ocr.py : moteurs OCR interchangeables (faux moteur sans Tesseract, ou Tesseract réel)
+# run_benchmarks.py : mesure chaque étape et le débit de bout en bout, enregistre et compare les résultats
+# Lancement (depuis le dossier ConvertImageToEpub) : python -m benchmarks.run_benchmarks
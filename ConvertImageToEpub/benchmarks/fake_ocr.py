@@ -0,0 +1,26 @@
+import OCR
+import ocr_cache
+import ocr_engines
+
+# --- Moteurs OCR interchangeables pour les benchmarks ---
+# 'fake' : moteur ocr_engines.FakeEngine, sans Tesseract. Il renvoie un texte déterministe et peut simuler un coût
+#          proportionnel à la taille du segment (ms_per_megapixel).
+# 'tesseract' : un processus Tesseract par segment (pytesseract).
+# 'tesserocr' : Tesseract chargé une fois par worker (paquet optionnel tesserocr).
+# install_ocr_backend est aussi passé en initialisation des workers du pool (stage_workers.WORKER_INITIALIZER),
+# pour que les étapes exécutées dans d'autres processus utilisent le même moteur.
+
+OCR_BACKENDS = ('fake', 'tesseract', 'tesserocr')
+
+ENGINE_BY_BACKEND = {
+    'fake': ocr_engines.ENGINE_FAKE,
+    'tesseract': ocr_engines.ENGINE_PYTESSERACT,
+    'tesserocr': ocr_engines.ENGINE_TESSEROCR,
+}
+
+# --- Installe le moteur OCR dans ce processus ; le cache OCR est désactivé pour que chaque mesure refasse l'OCR ---
+def install_ocr_backend(backend='fake', ms_per_megapixel=0.0):
+    if backend not in OCR_BACKENDS:
+        raise ValueError(backend)
+    ocr_cache.OCR_CACHE_ENABLED = False
+    OCR.set_ocr_engine(ocr_engines.create_engine(ENGINE_BY_BACKEND[backend], ms_per_megapixel))
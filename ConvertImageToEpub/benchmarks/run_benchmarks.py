@@ -0,0 +1,284 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import datetime
+import tempfile
+import statistics
+import contextlib
+import subprocess
+
+# Le dossier des scripts (config, OCR, split_large_images...) doit être importable
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(SCRIPTS_DIR)
+import config
+import split_large_images
+import OCR
+import clean_ocr_text
+import stream_pipeline
+import stage_workers
+import run_metrics
+from benchmarks import fake_ocr
+from benchmarks import synthetic_library
+
+# Importation du module de localisation
+sys.path.append(os.path.join(SCRIPTS_DIR, '..'))
+from localization.main import get_translator
+_ = get_translator()
+
+# --- Benchmarks reproductibles du pipeline ---
+# Chaque étape (split, ocr, clean, stream, epub) est mesurée sur des images synthétiques de plusieurs hauteurs,
+# puis le pipeline complet (orchestrator.main) sur une bibliothèque factice de dossiers et de .cbz.
+# Les résultats sont enregistrés en JSON dans le dossier de résultats et comparés à l'exécution précédente.
+
+DEFAULT_RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+ALL_STAGES = ('split', 'ocr', 'clean', 'stream', 'epub', 'end_to_end')
+
+# --- Exécute une fonction en masquant sa sortie console ; retourne sa durée en secondes ---
+def _timed_quietly(function, *args):
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+        start_time = time.perf_counter()
+        function(*args)
+        return time.perf_counter() - start_time
+
+def _summarize_runs(run_seconds, pages=None, megapixels=None):
+    median_seconds = statistics.median(run_seconds)
+    summary = {
+        'runs_seconds': [round(seconds, 4) for seconds in run_seconds],
+        'median_seconds': round(median_seconds, 4),
+        'min_seconds': round(min(run_seconds), 4),
+    }
+    if pages:
+        summary['pages'] = pages
+        summary['pages_per_second'] = round(pages / median_seconds, 3) if median_seconds else None
+    if megapixels:
+        summary['megapixels'] = round(megapixels, 3)
+        summary['megapixels_per_second'] = round(megapixels / median_seconds, 3) if median_seconds else None
+    return summary
+
+# --- Prépare un dossier de chapitre neuf contenant l'image source (copie de l'image de référence) ---
+def _fresh_chapter_dir(work_dir, name, source_image_path):
+    chapter_dir = os.path.join(work_dir, name)
+    shutil.rmtree(chapter_dir, ignore_errors=True)
+    os.makedirs(chapter_dir)
+    shutil.copy2(source_image_path, os.path.join(chapter_dir, '1.png'))
+    return chapter_dir
+
+def bench_image_stages(stages, work_dir, heights, width, density, repeat, seed):
+    results = {}
+    for height in heights:
+        reference_dir = os.path.join(work_dir, f"reference_{height}")
+        lines = synthetic_library.write_chapter_folder(reference_dir, width, height, density, seed)
+        source_image_path = os.path.join(reference_dir, '1.png')
+        pages = split_large_images.count_chapter_segments(height)
+        megapixels = width * height / 1e6
+        key = str(height)
+
+        if 'split' in stages or 'ocr' in stages:
+            split_runs = []
+            for _run_index in range(repeat):
+                chapter_dir = _fresh_chapter_dir(work_dir, f"Chapter 1 split {height}", source_image_path)
+                split_runs.append(_timed_quietly(split_large_images.split_chapter_unit, chapter_dir))
+            if 'split' in stages:
+                results.setdefault('split', {})[key] = _summarize_runs(split_runs, pages, megapixels)
+            if 'ocr' in stages:
+                # Les segments de la dernière découpe servent à toutes les mesures de l'OCR
+                ocr_runs = [_timed_quietly(OCR.ocr_chapter_unit, chapter_dir) for _run_index in range(repeat)]
+                results.setdefault('ocr', {})[key] = _summarize_runs(ocr_runs, pages, megapixels)
+
+        if 'clean' in stages:
+            raw_text = "\n".join(line.replace(' ', '  ') + ' -' for line in lines)
+            clean_runs = [_timed_quietly(clean_ocr_text.clean_text, raw_text) for _run_index in range(repeat)]
+            results.setdefault('clean', {})[key] = _summarize_runs(clean_runs, pages, megapixels)
+
+        if 'stream' in stages:
+            stream_runs = []
+            for _run_index in range(repeat):
+                chapter_dir = _fresh_chapter_dir(work_dir, f"Chapter 1 stream {height}", source_image_path)
+                stream_runs.append(_timed_quietly(stream_pipeline.process_chapter_unit_in_memory, chapter_dir))
+            results.setdefault('stream', {})[key] = _summarize_runs(stream_runs, pages, megapixels)
+    return results
+
+# --- Conversion EPUB d'un livre de chapter_count textes ; les commandes Calibre sont simulées sauf avec real_calibre ---
+def bench_epub(work_dir, chapter_count, density, repeat, seed, real_calibre):
+    import epub_orchestrateur
+    from state_store import StateStore
+
+    book_dir = os.path.join(work_dir, 'epub', 'Book 01')
+    final_texts_dir = os.path.join(book_dir, epub_orchestrateur.FINAL_TEXTS_SUBFOLDER_NAME)
+    os.makedirs(final_texts_dir, exist_ok=True)
+    for chapter_index in range(1, chapter_count + 1):
+        lines = synthetic_library.generate_text_lines(density * 10, seed + chapter_index)
+        with open(os.path.join(final_texts_dir, f"Chapter_{chapter_index:04d}.txt"), 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines))
+
+    epub_orchestrateur.LOG_FILE = os.path.join(work_dir, 'epub', 'calibre_automation.log')
+    epub_orchestrateur.GLOBAL_EPUB_OUTPUT_DIR = os.path.join(work_dir, 'epub', 'sortie')
+    if not real_calibre:
+        epub_orchestrateur.convert_txt_to_epub = lambda txt_path, epub_path: shutil.copyfile(txt_path, epub_path)
+        epub_orchestrateur.set_epub_metadata = lambda *args: None
+        epub_orchestrateur.add_to_calibre = lambda epub_path: "Added book ids: [1]"
+        epub_orchestrateur.remove_from_calibre = lambda book_id: None
+
+    epub_runs = []
+    for run_index in range(repeat):
+        # Base d'état neuve à chaque mesure : tous les chapitres sont reconvertis
+        store = StateStore(os.path.join(work_dir, 'epub', f"state_{run_index}.sqlite3"))
+        epub_runs.append(_timed_quietly(epub_orchestrateur.process_book, book_dir, store))
+        store.close()
+    return {'epub': {str(chapter_count): _summarize_runs(epub_runs, pages=chapter_count)}}
+
+# --- Pipeline complet (orchestrator.main) sur une bibliothèque factice, recopiée avant chaque mesure ---
+def bench_end_to_end(work_dir, args):
+    template_dir = os.path.join(work_dir, 'library_template')
+    manifest = synthetic_library.build_synthetic_library(template_dir, args.books, args.chapters, args.heights,
+                                                         args.width, args.density, args.cbz_ratio, args.seed)
+    library_dir = os.path.join(work_dir, 'library')
+    scripts_output_dir = os.path.join(library_dir, 'scripts')
+
+    config.GLOBAL_BOOKS_ROOT_DIR = library_dir
+    config.SCRIPTS_DIR = SCRIPTS_DIR
+    config.ORCHESTRATOR_LOG_FILE_PATH = os.path.join(scripts_output_dir, 'orchestrator_log.log')
+    config.GLOBAL_ERROR_LOG_FILE_PATH = os.path.join(scripts_output_dir, 'global_errors.log')
+    config.ORCHESTRATOR_JSONL_LOG_FILE_PATH = ''
+    config.PROGRESS_LOG_FILE_PATH = os.path.join(scripts_output_dir, 'processed_chapters.progress')
+    config.STATE_DB_PATH = os.path.join(scripts_output_dir, 'pipeline_state.sqlite3')
+    config.METRICS_REPORT_DIR = scripts_output_dir
+    config.METRICS_PROMETHEUS_TEXTFILE_PATH = ''
+    config.OCR_CACHE_ENABLED = False
+    config.WATCH_MODE = False
+    config.PRIORITY_BOOKS = []
+    # Le faux moteur OCR ne peut être installé que dans les workers du pool (pas dans des scripts enfants)
+    config.STAGE_EXECUTION_MODE = 'pool'
+    stage_workers.WORKER_INITIALIZER = (fake_ocr.install_ocr_backend, (args.ocr_backend, args.fake_ocr_ms_per_megapixel))
+    import orchestrator
+
+    total_megapixels = sum(chapter['width'] * chapter['height'] for chapter in manifest['chapters'].values()) / 1e6
+    total_pages = sum(split_large_images.count_chapter_segments(chapter['height']) for chapter in manifest['chapters'].values())
+    chapter_count = len(manifest['chapters'])
+
+    end_to_end_runs = []
+    stage_reports = []
+    for _run_index in range(args.repeat):
+        shutil.rmtree(library_dir, ignore_errors=True)
+        shutil.copytree(template_dir, library_dir, ignore=shutil.ignore_patterns('manifest.json'))
+        end_to_end_runs.append(_timed_quietly(orchestrator.main))
+        report = run_metrics.build_report()
+        stage_reports.append({stage: {name: value for name, value in summary.items() if name != 'histogram'}
+                              for stage, summary in report['stages'].items()})
+
+    summary = _summarize_runs(end_to_end_runs, total_pages, total_megapixels)
+    summary['chapters'] = chapter_count
+    summary['chapters_per_second'] = round(chapter_count / summary['median_seconds'], 3)
+    summary['stages_last_run'] = stage_reports[-1]
+    return {'end_to_end': {f"{args.books}x{args.chapters}": summary}}
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SCRIPTS_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# --- Résultat le plus récent du dossier (hors fichier courant), ou None ---
+def find_previous_result(results_dir, exclude_path=None):
+    try:
+        candidates = sorted(os.path.join(results_dir, name) for name in os.listdir(results_dir) if name.endswith('.json'))
+    except FileNotFoundError:
+        return None
+    candidates = [path for path in candidates if path != exclude_path]
+    return candidates[-1] if candidates else None
+
+# --- Compare deux résultats : (étape, paramètre, médiane précédente, médiane actuelle, écart en %) ---
+def compare_results(previous, current):
+    rows = []
+    for stage, stage_results in current['results'].items():
+        for parameter, summary in stage_results.items():
+            previous_summary = previous.get('results', {}).get(stage, {}).get(parameter)
+            if not previous_summary:
+                continue
+            previous_median = previous_summary['median_seconds']
+            change_percent = (summary['median_seconds'] - previous_median) / previous_median * 100 if previous_median else 0.0
+            rows.append((stage, parameter, previous_median, summary['median_seconds'], change_percent))
+    return rows
+
+def parse_int_list(value):
+    return [int(item) for item in value.split(',') if item.strip()]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=_('BENCHMARK_DESCRIPTION'))
+    parser.add_argument('--label', default='run', help=_('BENCHMARK_LABEL_HELP'))
+    parser.add_argument('--stages', default=','.join(ALL_STAGES), help=_('BENCHMARK_STAGES_HELP').format(', '.join(ALL_STAGES)))
+    parser.add_argument('--heights', type=parse_int_list, default=[3000, 12000, 30000], help=_('BENCHMARK_HEIGHTS_HELP'))
+    parser.add_argument('--width', type=int, default=800, help=_('BENCHMARK_WIDTH_HELP'))
+    parser.add_argument('--density', type=int, default=20, help=_('BENCHMARK_DENSITY_HELP'))
+    parser.add_argument('--books', type=int, default=2, help=_('BENCHMARK_BOOKS_HELP'))
+    parser.add_argument('--chapters', type=int, default=6, help=_('BENCHMARK_CHAPTERS_HELP'))
+    parser.add_argument('--cbz-ratio', type=float, default=0.5, help=_('BENCHMARK_CBZ_RATIO_HELP'))
+    parser.add_argument('--repeat', type=int, default=3, help=_('BENCHMARK_REPEAT_HELP'))
+    parser.add_argument('--seed', type=int, default=0, help=_('BENCHMARK_SEED_HELP'))
+    parser.add_argument('--ocr-backend', choices=fake_ocr.OCR_BACKENDS, default='fake', help=_('BENCHMARK_OCR_BACKEND_HELP'))
+    parser.add_argument('--fake-ocr-ms-per-megapixel', type=float, default=0.0, help=_('BENCHMARK_FAKE_OCR_COST_HELP'))
+    parser.add_argument('--real-calibre', action='store_true', help=_('BENCHMARK_REAL_CALIBRE_HELP'))
+    parser.add_argument('--results-dir', default=DEFAULT_RESULTS_DIR, help=_('BENCHMARK_RESULTS_DIR_HELP'))
+    parser.add_argument('--compare', default=None, help=_('BENCHMARK_COMPARE_HELP'))
+    parser.add_argument('--threshold', type=float, default=5.0, help=_('BENCHMARK_THRESHOLD_HELP'))
+    args = parser.parse_args(argv)
+
+    stages = [stage.strip() for stage in args.stages.split(',') if stage.strip()]
+    unknown_stages = set(stages) - set(ALL_STAGES)
+    if unknown_stages:
+        parser.error(_('BENCHMARK_UNKNOWN_STAGES').format(', '.join(sorted(unknown_stages))))
+
+    fake_ocr.install_ocr_backend(args.ocr_backend, args.fake_ocr_ms_per_megapixel)
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='convertimage_bench_') as work_dir:
+        print(_('BENCHMARK_START').format(', '.join(stages), args.ocr_backend, work_dir))
+        results.update(bench_image_stages(stages, work_dir, args.heights, args.width, args.density, args.repeat, args.seed))
+        if 'epub' in stages:
+            results.update(bench_epub(work_dir, args.chapters, args.density, args.repeat, args.seed, args.real_calibre))
+        if 'end_to_end' in stages:
+            results.update(bench_end_to_end(work_dir, args))
+
+    current = {
+        'label': args.label,
+        'created_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'git_commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'parameters': {name: value for name, value in vars(args).items() if name not in ('results_dir', 'compare', 'threshold')},
+        'results': results,
+    }
+
+    os.makedirs(args.results_dir, exist_ok=True)
+    result_path = os.path.join(args.results_dir, f"{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}_{args.label}.json")
+    previous_path = args.compare or find_previous_result(args.results_dir)
+    with open(result_path, 'w', encoding='utf-8') as f:
+        json.dump(current, f, ensure_ascii=False, indent=2)
+
+    for stage, stage_results in results.items():
+        for parameter, summary in stage_results.items():
+            print(_('BENCHMARK_RESULT_LINE').format(stage, parameter, summary['median_seconds'], summary['min_seconds'],
+                                                    summary.get('pages_per_second', '-'), summary.get('megapixels_per_second', '-')))
+    print(_('BENCHMARK_RESULT_SAVED').format(result_path))
+
+    if previous_path:
+        with open(previous_path, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+        print(_('BENCHMARK_COMPARING').format(previous_path, previous.get('label'), previous.get('git_commit')))
+        for stage, parameter, previous_median, current_median, change_percent in compare_results(previous, current):
+            verdict = ''
+            if change_percent > args.threshold:
+                verdict = _('BENCHMARK_SLOWER')
+            elif change_percent < -args.threshold:
+                verdict = _('BENCHMARK_FASTER')
+            print(_('BENCHMARK_COMPARISON_LINE').format(stage, parameter, previous_median, current_median, change_percent, verdict))
+    return result_path
+
+if __name__ == "__main__":
+    main()
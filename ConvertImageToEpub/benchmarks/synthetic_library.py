@@ -0,0 +1,107 @@
+import io
+import os
+import json
+import random
+import zipfile
+from PIL import Image, ImageDraw, ImageFont
+
+# --- Génération d'images et de bibliothèques synthétiques pour les benchmarks ---
+# Une image imite une capture d'écran de webnovel : une colonne de paragraphes sur fond uni, très haute.
+# Le texte est tiré d'un générateur pseudo-aléatoire initialisé par une graine : mêmes paramètres = mêmes images,
+# et le texte rendu est connu (manifest.json), ce qui permet aussi de mesurer la qualité d'un vrai moteur OCR.
+
+WORDS = (
+    "the", "sword", "of", "heaven", "cultivator", "sect", "elder", "young", "master", "qi", "realm", "breakthrough",
+    "dragon", "palace", "disciple", "ancient", "technique", "spirit", "stone", "mountain", "village", "storm", "blade",
+    "silent", "moon", "river", "array", "talisman", "demon", "beast", "core", "formation", "pill", "furnace", "night",
+    "shadow", "guard", "empire", "heir", "system", "level", "quest", "reward", "status", "window", "skill", "mana",
+)
+
+BACKGROUND_COLOR = (250, 250, 245)
+TEXT_COLOR = (20, 20, 20)
+FONT_SIZE = 22
+MARGIN = 40
+
+def _load_font(size=FONT_SIZE):
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:
+        # Pillow < 10.1 : police bitmap par défaut, sans choix de taille
+        return ImageFont.load_default()
+
+# --- Texte connu d'une image : une ligne = une phrase, en paragraphes séparés par une ligne vide ---
+def generate_text_lines(line_count, seed, words_per_line=8):
+    rng = random.Random(seed)
+    lines = []
+    for line_index in range(line_count):
+        if line_index and rng.random() < 0.15:
+            lines.append("")
+            continue
+        words = [rng.choice(WORDS) for _ in range(words_per_line)]
+        lines.append(" ".join(words).capitalize() + ".")
+    return lines
+
+# --- Image synthétique de hauteur donnée ; density = lignes de texte par 1000 pixels de hauteur ---
+# Retourne (image PIL en RGB, lignes de texte rendues).
+def render_text_image(width, height, density, seed):
+    line_count = max(1, int(height / 1000 * density))
+    lines = generate_text_lines(line_count, seed)
+    img = Image.new('RGB', (width, height), BACKGROUND_COLOR)
+    draw = ImageDraw.Draw(img)
+    font = _load_font()
+    line_spacing = max(FONT_SIZE, (height - 2 * MARGIN) // line_count)
+    for line_index, line in enumerate(lines):
+        y = MARGIN + line_index * line_spacing
+        if y > height - MARGIN:
+            lines = lines[:line_index]
+            break
+        if line:
+            draw.text((MARGIN, y), line, fill=TEXT_COLOR, font=font)
+    return img, lines
+
+# --- Dossier d'unité de chapitre contenant 1.png ; retourne le texte connu ---
+def write_chapter_folder(chapter_dir, width, height, density, seed):
+    os.makedirs(chapter_dir, exist_ok=True)
+    img, lines = render_text_image(width, height, density, seed)
+    img.save(os.path.join(chapter_dir, '1.png'))
+    return lines
+
+# --- Fichier .cbz d'un chapitre (une seule page '1.png') ; retourne le texte connu ---
+def write_chapter_cbz(cbz_file_path, width, height, density, seed):
+    img, lines = render_text_image(width, height, density, seed)
+    buffer = io.BytesIO()
+    img.save(buffer, 'PNG')
+    with zipfile.ZipFile(cbz_file_path, 'w', zipfile.ZIP_STORED) as zip_ref:
+        zip_ref.writestr('1.png', buffer.getvalue())
+    return lines
+
+# --- Bibliothèque factice : <racine>/Book NN/Chapter N (dossier) ou Chapter N.cbz ---
+# heights : hauteurs utilisées à tour de rôle pour les chapitres ; cbz_ratio : part des chapitres livrés en .cbz.
+# Écrit <racine>/manifest.json (paramètres + texte connu de chaque chapitre) et retourne son contenu.
+def build_synthetic_library(root_dir, book_count, chapters_per_book, heights, width=800, density=20, cbz_ratio=0.5, seed=0):
+    rng = random.Random(seed)
+    manifest = {
+        'parameters': {'book_count': book_count, 'chapters_per_book': chapters_per_book, 'heights': list(heights),
+                       'width': width, 'density': density, 'cbz_ratio': cbz_ratio, 'seed': seed},
+        'chapters': {},
+    }
+    os.makedirs(root_dir, exist_ok=True)
+    chapter_counter = 0
+    for book_index in range(1, book_count + 1):
+        book_dir = os.path.join(root_dir, f"Book {book_index:02d}")
+        os.makedirs(book_dir, exist_ok=True)
+        for chapter_index in range(1, chapters_per_book + 1):
+            height = heights[chapter_counter % len(heights)]
+            chapter_seed = seed * 1000003 + chapter_counter
+            chapter_counter += 1
+            if rng.random() < cbz_ratio:
+                chapter_path = os.path.join(book_dir, f"Chapter {chapter_index}.cbz")
+                lines = write_chapter_cbz(chapter_path, width, height, density, chapter_seed)
+            else:
+                chapter_path = os.path.join(book_dir, f"Chapter {chapter_index}")
+                lines = write_chapter_folder(chapter_path, width, height, density, chapter_seed)
+            manifest['chapters'][os.path.relpath(chapter_path, root_dir)] = {
+                'width': width, 'height': height, 'text': "\n".join(lines)}
+    with open(os.path.join(root_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    return manifest
@@ -0,0 +1,118 @@
+import os
+import sys
+import json
+import time
+import argparse
+import datetime
+import pytesseract
+import config
+import split_large_images
+import OCR
+import ocr_engines
+
+# Importation du module de localisation
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from localization.main import get_translator
+_ = get_translator()
+
+# --- Calibration de la hauteur des segments ---
+# Le temps de Tesseract par pixel dépend de la hauteur des images qu'il reçoit (lancement du processus, analyse de la
+# mise en page...). Les mêmes lignes d'images réelles sont découpées par split_large_images.py à chaque hauteur de
+# SEGMENT_HEIGHT_CANDIDATES puis passées à Tesseract (sans le cache OCR) ; la hauteur au plus faible temps par mégapixel
+# est enregistrée dans SEGMENT_HEIGHT_CALIBRATION_PATH et utilisée par le découpage quand SEGMENT_TARGET_HEIGHT = 0.
+
+DEFAULT_MAX_ROWS = 20000
+
+# --- Pages à mesurer : [(fichier source, membre du .cbz ou None)] d'un fichier image, d'un .cbz ou d'un dossier d'unité de chapitre ---
+def resolve_image_pages(path):
+    if os.path.isdir(path):
+        return split_large_images.find_chapter_pages(path)
+    if not os.path.exists(path):
+        return []
+    if path.lower().endswith('.cbz'):
+        return split_large_images.list_archive_pages(path)
+    return [(path, None)]
+
+# --- Durée de l'OCR des lignes de l'image découpées à la hauteur visée (avec le moteur OCR_ENGINE) ---
+def time_ocr_at_height(img, target_height):
+    ocr_engine = OCR.get_ocr_engine()
+    elapsed_seconds = 0.0
+    for segment_top, segment_bottom in split_large_images.iter_segment_rows(img, target_height):
+        segment = img.crop((0, segment_top, img.width, segment_bottom))
+        start_time = time.perf_counter()
+        ocr_engine.image_to_string(segment, OCR.OCR_LANGUAGE, OCR.TESSERACT_CONFIG)
+        elapsed_seconds += time.perf_counter() - start_time
+    return elapsed_seconds
+
+def parse_int_list(value):
+    return [int(item) for item in value.split(',') if item.strip()]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=_('CALIBRATION_DESCRIPTION'))
+    parser.add_argument('--image', action='append', required=True, help=_('CALIBRATION_IMAGE_HELP'))
+    parser.add_argument('--heights', type=parse_int_list, default=config.SEGMENT_HEIGHT_CANDIDATES, help=_('CALIBRATION_HEIGHTS_HELP'))
+    parser.add_argument('--max-rows', type=int, default=DEFAULT_MAX_ROWS, help=_('CALIBRATION_MAX_ROWS_HELP'))
+    parser.add_argument('--output', default=config.SEGMENT_HEIGHT_CALIBRATION_PATH, help=_('CALIBRATION_OUTPUT_HELP'))
+    args = parser.parse_args(argv)
+
+    heights = sorted({height for height in args.heights if 0 < height <= split_large_images.MAX_IMAGE_HEIGHT})
+    if not heights:
+        parser.error(_('CALIBRATION_NO_VALID_HEIGHT').format(split_large_images.MAX_IMAGE_HEIGHT))
+
+    # {hauteur: [secondes, mégapixels]} cumulés sur toutes les images
+    totals = {height: [0.0, 0.0] for height in heights}
+    measured_images = []
+    for path in args.image:
+        image_pages = resolve_image_pages(path)
+        if not image_pages:
+            print(_('CALIBRATION_IMAGE_NOT_FOUND').format(path))
+            continue
+        for source_path, member_name in image_pages:
+            with split_large_images.open_source_image(source_path, member_name) as (image_name, img):
+                sample = img.crop((0, 0, img.width, min(img.height, args.max_rows)))
+                if sample.mode != 'L' and sample.mode != 'RGB':
+                    sample = sample.convert('L')
+            megapixels = sample.width * sample.height / 1e6
+            print(_('CALIBRATION_MEASURING').format(image_name, sample.width, sample.height))
+            for height in heights:
+                try:
+                    elapsed_seconds = time_ocr_at_height(sample, height)
+                except pytesseract.TesseractNotFoundError:
+                    print(_('TESSERACT_NOT_FOUND'))
+                    return 1
+                except ocr_engines.OCREngineUnavailableError as e:
+                    print(_('OCR_ENGINE_UNAVAILABLE').format(OCR.OCR_ENGINE, e))
+                    return 1
+                totals[height][0] += elapsed_seconds
+                totals[height][1] += megapixels
+                print(_('CALIBRATION_RESULT_LINE').format(height, elapsed_seconds, elapsed_seconds / megapixels))
+            measured_images.append(f"{source_path}:{member_name}" if member_name else source_path)
+
+    if not measured_images:
+        print(_('CALIBRATION_NOTHING_MEASURED'))
+        return 1
+
+    measurements = {str(height): {'seconds': round(seconds, 3), 'megapixels': round(megapixels, 3),
+                                  'seconds_per_megapixel': round(seconds / megapixels, 4)}
+                    for height, (seconds, megapixels) in totals.items()}
+    target_height = min(heights, key=lambda height: totals[height][0] / totals[height][1])
+
+    output_dir = os.path.dirname(args.output)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'target_height': target_height,
+            'created_at': datetime.datetime.now().isoformat(timespec='seconds'),
+            'ocr_language': OCR.OCR_LANGUAGE,
+            'tesseract_config': OCR.TESSERACT_CONFIG,
+            'split_on_blank_rows': split_large_images.SPLIT_ON_BLANK_ROWS,
+            'images': measured_images,
+            'measurements': measurements,
+        }, f, indent=2)
+    print(_('CALIBRATION_BEST_HEIGHT').format(target_height, measurements[str(target_height)]['seconds_per_megapixel']))
+    print(_('CALIBRATION_SAVED').format(args.output))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+import os
+import re
+import zipfile
+import hashlib
+import contextlib
+from PIL import Image
+
+# --- Lecture des chapitres directement dans les fichiers .cbz (sans dossier _unzipped sur le disque) ---
+# Un chapitre .cbz garde '<nom>_unzipped' comme unité de chapitre (clé de la base d'état, dossier des textes produits),
+# mais ses pages sont décodées depuis l'archive : aucune page n'est écrite puis relue sur le disque.
+
+IGNORED_MEMBER_NAMES = ('.ds_store', 'thumbs.db')
+CHAPTER_IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+CBZ_EXTENSIONS = ('.cbz', '.CBZ')
+
+# --- Fichier .cbz d'origine d'une unité de chapitre '<nom>_unzipped', ou None ---
+def find_source_archive(chapter_unit_dir):
+    chapter_unit_dir = os.path.normpath(chapter_unit_dir)
+    unit_name = os.path.basename(chapter_unit_dir)
+    if not unit_name.endswith('_unzipped'):
+        return None
+    for extension in CBZ_EXTENSIONS:
+        cbz_file_path = os.path.join(os.path.dirname(chapter_unit_dir), f"{unit_name[:-len('_unzipped')]}{extension}")
+        if os.path.isfile(cbz_file_path):
+            return cbz_file_path
+    return None
+
+# --- Clé de tri naturel : 'page2' avant 'page10' ---
+def natsort_key(s):
+    return [int(text) if text.isdigit() else text.lower() for text in re.split('([0-9]+)', s)]
+
+# --- Membres de l'archive qui contiennent les pages du chapitre, dans l'ordre naturel de leurs noms ---
+def select_chapter_image_members(zip_ref):
+    image_members = []
+    for member in zip_ref.namelist():
+        member_base_name = os.path.basename(member).lower()
+        if member.endswith('/') or member_base_name in IGNORED_MEMBER_NAMES:
+            continue
+        if member_base_name.endswith(CHAPTER_IMAGE_EXTENSIONS):
+            image_members.append(member)
+    return sorted(image_members, key=natsort_key)
+
+# --- Noms des membres de l'archive qui contiennent les pages du chapitre, dans leur ordre ([] si aucune image) ---
+def list_chapter_image_members(cbz_file_path):
+    with zipfile.ZipFile(cbz_file_path, 'r') as zip_ref:
+        return select_chapter_image_members(zip_ref)
+
+# --- Taille et date de modification du fichier : si elles n'ont pas changé, inutile de relire le répertoire central ---
+def archive_file_stat(cbz_file_path):
+    stat = os.stat(cbz_file_path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+# --- Signature du contenu de l'archive : nom, CRC et taille de chaque membre (lus dans le répertoire central, sans décompression) ---
+def compute_archive_signature(cbz_file_path):
+    digest = hashlib.sha256()
+    with zipfile.ZipFile(cbz_file_path, 'r') as zip_ref:
+        for info in sorted(zip_ref.infolist(), key=lambda info: info.filename):
+            digest.update(f"{info.filename}|{info.CRC:08x}|{info.file_size}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+# --- Ouvre un membre de l'archive qui contient une page du chapitre (la première si member est None), décompressé au fil de la lecture ---
+# Utilisation : with open_chapter_image_file(cbz) as (nom_du_membre, fichier): ... ; lève FileNotFoundError si aucune image.
+@contextlib.contextmanager
+def open_chapter_image_file(cbz_file_path, member=None):
+    with zipfile.ZipFile(cbz_file_path, 'r') as zip_ref:
+        if member is None:
+            image_members = select_chapter_image_members(zip_ref)
+            if not image_members:
+                raise FileNotFoundError(f"{os.path.basename(cbz_file_path)}: {', '.join(CHAPTER_IMAGE_EXTENSIONS)}")
+            member = image_members[0]
+        with zip_ref.open(member, 'r') as member_file:
+            yield os.path.basename(member), member_file
+
+# --- Ouvre une page du chapitre dans l'archive (le membre est décompressé au fil de la lecture par le décodeur) ---
+# Utilisation : with open_chapter_image(cbz) as (nom_du_membre, image): ... ; lève FileNotFoundError si aucune image.
+@contextlib.contextmanager
+def open_chapter_image(cbz_file_path, member=None):
+    with open_chapter_image_file(cbz_file_path, member) as (member_name, member_file):
+        yield member_name, Image.open(member_file)
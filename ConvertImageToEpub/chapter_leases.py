@@ -0,0 +1,220 @@
+import os
+import json
+import time
+import uuid
+import socket
+import datetime
+import threading
+
+# --- Mode distribué : plusieurs orchestrateurs (une machine chacun) se partagent les chapitres d'une même bibliothèque ---
+# La coordination passe par des fichiers dans un dossier partagé (LEASE_DIR), sans serveur :
+#   <LEASE_DIR>/<livre>/<chapitre>.lease : bail d'un chapitre, créé de façon atomique (O_CREAT | O_EXCL) par la machine
+#                                          qui le traite, renouvelé (date de modification) toutes les heartbeat_seconds ;
+#   <LEASE_DIR>/<livre>/<chapitre>.done  : chapitre terminé ; valable tant que la source (image ou .cbz) n'est pas plus récente ;
+#   <LEASE_DIR>/<livre>/_book.lease / _book.done : post-traitement du livre (rassemblement des textes), fait par une seule machine.
+# Un bail qui n'a pas été renouvelé depuis ttl_seconds appartient à une machine arrêtée : il est repris par la première
+# machine qui le renomme (un seul renommage peut réussir).
+# La base d'état SQLite reste propre à chaque machine (STATE_DB_PATH doit être local) : les marqueurs .done y sont recopiés.
+
+CLAIM_ACQUIRED = 'acquired'
+CLAIM_BUSY = 'busy'
+CLAIM_DONE = 'done'
+
+LEASE_SUFFIX = '.lease'
+DONE_SUFFIX = '.done'
+BOOK_LEASE_NAME = '_book'
+
+_lock = threading.Lock()
+_lease_dir = None
+_node_name = None
+_ttl_seconds = 120
+_heartbeat_seconds = 30
+# {chemin du bail: (livre, chapitre)} : baux détenus par cette machine
+_held_leases = {}
+_heartbeat_thread = None
+_stop_event = None
+
+def is_enabled():
+    return _lease_dir is not None
+
+def get_node_name():
+    return _node_name
+
+def default_node_name():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+# --- Démarre la coordination (et le renouvellement des baux en arrière-plan) ---
+def start(lease_dir, node_name=None, ttl_seconds=120, heartbeat_seconds=30):
+    global _lease_dir, _node_name, _ttl_seconds, _heartbeat_seconds, _heartbeat_thread, _stop_event
+    os.makedirs(lease_dir, exist_ok=True)
+    _lease_dir = lease_dir
+    _node_name = node_name or default_node_name()
+    _ttl_seconds = ttl_seconds
+    _heartbeat_seconds = heartbeat_seconds
+    _stop_event = threading.Event()
+    _heartbeat_thread = threading.Thread(target=_heartbeat_loop, args=(_stop_event,), daemon=True)
+    _heartbeat_thread.start()
+
+# --- Arrête le renouvellement et libère les baux encore détenus (chapitres interrompus, repris par une autre machine) ---
+def stop():
+    global _lease_dir, _heartbeat_thread
+    if _lease_dir is None:
+        return
+    _stop_event.set()
+    _heartbeat_thread.join()
+    _heartbeat_thread = None
+    with _lock:
+        held_lease_paths = list(_held_leases)
+        _held_leases.clear()
+    for lease_path in held_lease_paths:
+        _remove_own_lease(lease_path)
+    _lease_dir = None
+
+def _lease_base_path(book_folder_name, chapter_unit_path=None):
+    name = os.path.basename(chapter_unit_path) if chapter_unit_path else BOOK_LEASE_NAME
+    return os.path.join(_lease_dir, book_folder_name, name)
+
+def _read_lease_owner(lease_path):
+    try:
+        with open(lease_path, 'r', encoding='utf-8') as f:
+            return json.load(f).get('node')
+    except (OSError, ValueError):
+        return None
+
+def _remove_own_lease(lease_path):
+    if _read_lease_owner(lease_path) == _node_name:
+        try:
+            os.remove(lease_path)
+        except FileNotFoundError:
+            pass
+
+# --- Renouvelle les baux détenus ; un bail repris par une autre machine (celle-ci a été jugée arrêtée) est abandonné ---
+def _heartbeat_loop(stop_event):
+    while not stop_event.wait(_heartbeat_seconds):
+        with _lock:
+            held_lease_paths = list(_held_leases)
+        for lease_path in held_lease_paths:
+            if _read_lease_owner(lease_path) != _node_name:
+                with _lock:
+                    _held_leases.pop(lease_path, None)
+                continue
+            try:
+                os.utime(lease_path, None)
+            except OSError:
+                pass
+
+# --- Le marqueur .done existe et n'est pas plus ancien que la source (image, .cbz ou dossier du livre) ---
+def _is_done(base_path, source_path):
+    try:
+        done_mtime = os.stat(base_path + DONE_SUFFIX).st_mtime
+    except FileNotFoundError:
+        return False
+    if not source_path:
+        return True
+    try:
+        return done_mtime >= os.stat(source_path).st_mtime
+    except FileNotFoundError:
+        return True
+
+# --- Reprend un bail expiré ; retourne (True, ancien propriétaire) si le bail peut être recréé, (False, None) sinon ---
+def _reclaim_if_expired(lease_path):
+    try:
+        lease_age = time.time() - os.stat(lease_path).st_mtime
+    except FileNotFoundError:
+        return True, None
+    if lease_age < _ttl_seconds:
+        return False, None
+
+    previous_owner = _read_lease_owner(lease_path)
+    expired_path = f"{lease_path}.{uuid.uuid4().hex}.expired"
+    try:
+        # Seule une machine peut réussir ce renommage
+        os.rename(lease_path, expired_path)
+    except FileNotFoundError:
+        return True, None
+    except OSError:
+        return False, None
+    try:
+        if time.time() - os.stat(expired_path).st_mtime < _ttl_seconds:
+            # Le propriétaire a renouvelé son bail juste avant le renommage : il est vivant, le bail lui est rendu
+            try:
+                os.link(expired_path, lease_path)
+            except OSError:
+                pass
+            return False, None
+        return True, previous_owner
+    finally:
+        try:
+            os.remove(expired_path)
+        except OSError:
+            pass
+
+def _claim(base_path, book_folder_name, chapter_unit_path, source_path):
+    if _is_done(base_path, source_path):
+        return CLAIM_DONE, None
+    lease_path = base_path + LEASE_SUFFIX
+    with _lock:
+        if lease_path in _held_leases:
+            return CLAIM_ACQUIRED, None
+    os.makedirs(os.path.dirname(lease_path), exist_ok=True)
+
+    expired_owner = None
+    for _attempt in range(2):
+        try:
+            lease_fd = os.open(lease_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            reclaimable, previous_owner = _reclaim_if_expired(lease_path)
+            if not reclaimable:
+                return CLAIM_BUSY, None
+            expired_owner = expired_owner or previous_owner
+            continue
+        with os.fdopen(lease_fd, 'w', encoding='utf-8') as f:
+            json.dump({'node': _node_name, 'book': book_folder_name,
+                       'chapter': os.path.basename(chapter_unit_path) if chapter_unit_path else None,
+                       'claimed_at': datetime.datetime.now().isoformat(timespec='seconds')}, f)
+        with _lock:
+            _held_leases[lease_path] = (book_folder_name, chapter_unit_path)
+        # Une autre machine a pu terminer entre le test du marqueur et la création du bail
+        if _is_done(base_path, source_path):
+            _release(base_path, done=False)
+            return CLAIM_DONE, None
+        return CLAIM_ACQUIRED, expired_owner
+    return CLAIM_BUSY, None
+
+def _release(base_path, done):
+    lease_path = base_path + LEASE_SUFFIX
+    if done:
+        with open(base_path + DONE_SUFFIX, 'w', encoding='utf-8') as f:
+            json.dump({'node': _node_name, 'finished_at': datetime.datetime.now().isoformat(timespec='seconds')}, f)
+    with _lock:
+        held = _held_leases.pop(lease_path, None) is not None
+    if held:
+        _remove_own_lease(lease_path)
+
+# --- Réserve un chapitre pour cette machine ---
+# source_path : image ou .cbz source du chapitre (un marqueur .done plus ancien que la source est ignoré)
+# Retourne (CLAIM_ACQUIRED, ancienne machine si le bail expiré d'une machine arrêtée a été repris),
+# (CLAIM_BUSY, None) si une autre machine le traite, ou (CLAIM_DONE, None) s'il a déjà été traité.
+def claim_chapter(book_folder_name, chapter_unit_path, source_path=None):
+    return _claim(_lease_base_path(book_folder_name, chapter_unit_path), book_folder_name, chapter_unit_path, source_path)
+
+# --- Libère le bail d'un chapitre ; done=True écrit son marqueur .done (les autres machines ne le traiteront pas) ---
+def release_chapter(book_folder_name, chapter_unit_path, done):
+    _release(_lease_base_path(book_folder_name, chapter_unit_path), done)
+
+# --- Efface le marqueur .done d'un chapitre (son contenu a changé pendant son traitement : il doit être retraité) ---
+def forget_chapter(book_folder_name, chapter_unit_path):
+    try:
+        os.remove(_lease_base_path(book_folder_name, chapter_unit_path) + DONE_SUFFIX)
+    except FileNotFoundError:
+        pass
+
+def is_chapter_done(book_folder_name, chapter_unit_path, source_path=None):
+    return _is_done(_lease_base_path(book_folder_name, chapter_unit_path), source_path)
+
+# --- Réserve le post-traitement d'un livre (book_folder_path : un marqueur plus ancien que le dossier du livre est ignoré) ---
+def claim_book(book_folder_name, book_folder_path):
+    return _claim(_lease_base_path(book_folder_name), book_folder_name, None, book_folder_path)
+
+def release_book(book_folder_name, done):
+    _release(_lease_base_path(book_folder_name), done)
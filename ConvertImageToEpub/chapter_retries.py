@@ -0,0 +1,32 @@
+# --- Nouveaux essais des chapitres échoués pendant une exécution ---
+# Un échec peut être passager (étape hors délai sur une machine surchargée, worker tué, partage réseau indisponible...) :
+# le chapitre est réessayé après un délai qui double à chaque échec (RETRY_BACKOFF_BASE_SECONDS, x2, x4... borné par
+# RETRY_BACKOFF_MAX_SECONDS), pendant que les autres chapitres continuent. Après max_attempts échecs, il est mis en
+# quarantaine (enregistrée par l'orchestrateur dans la base d'état) : les exécutions suivantes ne le retentent plus.
+
+class ChapterRetries:
+    def __init__(self, max_attempts=3, backoff_base_seconds=30, backoff_max_seconds=600):
+        self.max_attempts = max_attempts
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        # {unité de chapitre: nombre d'échecs pendant cette exécution}
+        self._failed_attempts = {}
+        # [(livre, unité de chapitre)] mis en quarantaine pendant cette exécution
+        self.quarantined = []
+
+    def get_failed_attempts(self, chapter_unit_path):
+        return self._failed_attempts.get(chapter_unit_path, 0)
+
+    # --- Enregistre un échec ; retourne le délai avant le nouvel essai, ou None si le chapitre doit être mis en quarantaine ---
+    def record_failure(self, book_name, chapter_unit_path):
+        failed_attempts = self._failed_attempts.get(chapter_unit_path, 0) + 1
+        if failed_attempts < self.max_attempts:
+            self._failed_attempts[chapter_unit_path] = failed_attempts
+            return min(self.backoff_base_seconds * 2 ** (failed_attempts - 1), self.backoff_max_seconds)
+        self._failed_attempts.pop(chapter_unit_path, None)
+        self.quarantined.append((book_name, chapter_unit_path))
+        return None
+
+    # --- Le chapitre a réussi, ou son contenu a changé (mode watch) : ses échecs précédents ne comptent plus ---
+    def reset(self, chapter_unit_path):
+        self._failed_attempts.pop(chapter_unit_path, None)
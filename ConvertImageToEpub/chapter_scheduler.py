@@ -0,0 +1,105 @@
+import os
+import heapq
+import zipfile
+import itertools
+import cbz_archive
+import split_large_images
+
+# --- Ordonnancement des unités de chapitre entre les livres ---
+# Au lieu de soumettre les chapitres livre par livre (un gros livre occupait alors tout le pool), l'orchestrateur
+# place chaque chapitre dans l'ordonnanceur et lui demande le suivant à chaque place libre du pool :
+#   1. les livres prioritaires (PRIORITY_BOOKS / --priority-book) passent d'abord ;
+#   2. entre les autres livres, le suivant est celui qui a reçu le moins de travail (coût cumulé des chapitres lancés) :
+#      un petit livre se termine vite au lieu d'attendre derrière un gros ;
+#   3. dans un livre, le chapitre le plus coûteux part en premier (LPT) pour réduire la durée totale de l'exécution.
+
+# --- Pages d'une unité de chapitre : celles du .cbz s'il est donné (chapitre pas encore extrait), sinon find_chapter_pages ---
+def find_chapter_unit_pages(chapter_unit_path, cbz_file_path=None):
+    if cbz_file_path:
+        return split_large_images.list_archive_pages(cbz_file_path)
+    return split_large_images.find_chapter_pages(chapter_unit_path)
+
+# --- En-têtes des pages d'une unité de chapitre, dans leur ordre : [((largeur, hauteur), mode, lignes décodées en même temps)] ---
+# Lus sans décoder les pixels ; None si le chapitre n'a pas de page ou si une page est illisible. Les lignes décodées
+# en même temps sont moins nombreuses que la hauteur pour une image lue par bandes.
+def read_chapter_page_headers(chapter_unit_path, cbz_file_path=None):
+    try:
+        pages = find_chapter_unit_pages(chapter_unit_path, cbz_file_path)
+        if not pages:
+            return None
+        page_headers = []
+        archive_path = pages[0][0] if pages[0][1] is not None else None
+        if archive_path:
+            # Toutes les pages d'un .cbz sont lues avec un seul répertoire central
+            with zipfile.ZipFile(archive_path, 'r') as zip_ref:
+                for _source_path, member_name in pages:
+                    with zip_ref.open(member_name, 'r') as image_file:
+                        page_headers.append(split_large_images.read_image_file_header(image_file))
+        else:
+            for source_path, _member_name in pages:
+                with open(source_path, 'rb') as image_file:
+                    page_headers.append(split_large_images.read_image_file_header(image_file))
+        return page_headers
+    except Exception:
+        return None
+
+# --- Dimensions du chapitre à partir de celles de ses pages : (plus grande largeur, somme des hauteurs) ---
+def get_chapter_image_size(page_sizes):
+    return max(width for width, _height in page_sizes), sum(height for _width, height in page_sizes)
+
+# --- Dimensions (largeur, hauteur) des pages d'une unité de chapitre mises bout à bout, lues dans leurs seuls en-têtes ; None si illisible ---
+def read_chapter_image_size(chapter_unit_path, cbz_file_path=None):
+    page_headers = read_chapter_page_headers(chapter_unit_path, cbz_file_path)
+    return get_chapter_image_size([page_header[0] for page_header in page_headers]) if page_headers else None
+
+# --- Coût estimé d'une unité de chapitre : nombre de pixels de ses pages ---
+# Si une page ne peut pas être ouverte, la taille des fichiers sert d'approximation ; 0 si aucune source n'est trouvée.
+def estimate_chapter_unit_cost(chapter_unit_path, cbz_file_path=None):
+    page_headers = read_chapter_page_headers(chapter_unit_path, cbz_file_path)
+    if page_headers is not None:
+        return sum(width * height for (width, height), _mode, _decoded_height in page_headers)
+    try:
+        archive_path = cbz_file_path or cbz_archive.find_source_archive(chapter_unit_path)
+        if archive_path:
+            return os.path.getsize(archive_path)
+        return sum(os.path.getsize(source_path) for source_path, _member_name in split_large_images.find_chapter_pages(chapter_unit_path))
+    except OSError:
+        return 0
+
+class ChapterScheduler:
+    def __init__(self, priority_books=()):
+        self.priority_books = set(priority_books)
+        # {livre: tas de (-coût, ordre d'arrivée, unité de chapitre, données de la tâche)}
+        self._queues = {}
+        # {livre: coût cumulé des chapitres déjà lancés}
+        self._served_costs = {}
+        self._arrival_order = itertools.count()
+
+    def __len__(self):
+        return sum(len(queue) for queue in self._queues.values())
+
+    # --- Ajoute un chapitre ; task est rendu tel quel par pop_next ---
+    def add(self, book_name, chapter_unit_path, cost, task):
+        if book_name not in self._queues:
+            self._queues[book_name] = []
+        if book_name not in self._served_costs:
+            # Un livre qui arrive en cours d'exécution part du niveau des livres actifs, sans "rattrapage" qui bloquerait les autres
+            active_served_costs = [self._served_costs[name] for name, queue in self._queues.items() if queue and name in self._served_costs]
+            self._served_costs[book_name] = min(active_served_costs, default=0)
+        heapq.heappush(self._queues[book_name], (-cost, next(self._arrival_order), chapter_unit_path, task))
+
+    # --- Retire le prochain chapitre à lancer : (livre, unité de chapitre, task), ou None si la file est vide ---
+    def pop_next(self):
+        candidate_books = [book_name for book_name, queue in self._queues.items() if queue]
+        if not candidate_books:
+            return None
+        priority_candidates = [book_name for book_name in candidate_books if book_name in self.priority_books]
+        if priority_candidates:
+            candidate_books = priority_candidates
+        book_name = min(candidate_books, key=lambda name: (self._served_costs[name], name))
+
+        negative_cost, _order, chapter_unit_path, task = heapq.heappop(self._queues[book_name])
+        self._served_costs[book_name] += -negative_cost
+        if not self._queues[book_name]:
+            del self._queues[book_name]
+        return book_name, chapter_unit_path, task
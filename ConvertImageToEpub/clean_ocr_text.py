@@ -10,25 +10,16 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from localization.main import get_translator
 _ = get_translator()
 
-parser = argparse.ArgumentParser(description=_('SCRIPT_DESCRIPTION'))
-parser.add_argument('--chapter_unit', type=str, required=True,
-                    help=_('CHAPTER_UNIT_HELP'))
-args = parser.parse_args()
-CHAPTER_UNIT_DIR = args.chapter_unit
-
 OUTPUT_TEXT_SUBFOLDER_NAME = config.OUTPUT_TEXT_SUBFOLDER_NAME
-INPUT_TEXT_DIR = os.path.join(CHAPTER_UNIT_DIR, OUTPUT_TEXT_SUBFOLDER_NAME)
-
 OUTPUT_CLEANED_TEXT_SUBFOLDER_NAME = config.OUTPUT_CLEANED_TEXT_SUBFOLDER_NAME
-OUTPUT_CLEANED_TEXT_DIR = os.path.join(CHAPTER_UNIT_DIR, OUTPUT_CLEANED_TEXT_SUBFOLDER_NAME)
 
-ERROR_LOG_FILE = os.path.join(CHAPTER_UNIT_DIR, 'clean_errors.log') 
+ERROR_LOG_FILE_NAME = 'clean_errors.log'
 
-def log_error(message, filename="N/A"):
+def log_error(chapter_unit_dir, message, filename="N/A"):
     timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    log_message = f"[{timestamp}] [{_('UNITÉ_CHAPITRE')}: {os.path.basename(CHAPTER_UNIT_DIR)}] [{_('FICHIER')}: {filename}] {_('ERREUR')}: {message}"
+    log_message = f"[{timestamp}] [{_('UNITÉ_CHAPITRE')}: {os.path.basename(chapter_unit_dir)}] [{_('FICHIER')}: {filename}] {_('ERREUR')}: {message}"
     
-    with open(ERROR_LOG_FILE, 'a', encoding='utf-8') as f:
+    with open(os.path.join(chapter_unit_dir, ERROR_LOG_FILE_NAME), 'a', encoding='utf-8') as f:
         f.write(log_message + '\n')
     print(f"  {log_message}")
 
@@ -45,44 +36,56 @@ def clean_text(text):
     text = text.replace('\f', '\n\n')
     return text.strip()
 
-
-if not os.path.exists(OUTPUT_CLEANED_TEXT_DIR):
-    os.makedirs(OUTPUT_CLEANED_TEXT_DIR)
-    print(_('OUTPUT_FOLDER_CREATED').format(OUTPUT_CLEANED_TEXT_DIR))
-
-if os.path.exists(ERROR_LOG_FILE):
-    os.remove(ERROR_LOG_FILE)
-    print(_('PREVIOUS_LOG_DELETED').format(ERROR_LOG_FILE))
-
-print(_('START_POST_PROCESSING').format(os.path.basename(CHAPTER_UNIT_DIR)))
-print(_('CLEANED_FILES_SAVED').format(OUTPUT_CLEANED_TEXT_DIR))
-
-if not os.path.exists(INPUT_TEXT_DIR):
-    log_error(_('INPUT_FOLDER_NOT_FOUND').format(OUTPUT_TEXT_SUBFOLDER_NAME), "N/A")
-else:
-    for filename in os.listdir(INPUT_TEXT_DIR):
-        if not filename.lower().endswith('.txt'):
-            print(_('WARNING_NOT_TXT').format(filename))
-            continue
+# --- Fonction principale : nettoyage des textes OCR d'une unité de chapitre (appelable par les workers) ---
+def clean_chapter_unit(chapter_unit_dir):
+    input_text_dir = os.path.join(chapter_unit_dir, OUTPUT_TEXT_SUBFOLDER_NAME)
+    output_cleaned_text_dir = os.path.join(chapter_unit_dir, OUTPUT_CLEANED_TEXT_SUBFOLDER_NAME)
+    error_log_file = os.path.join(chapter_unit_dir, ERROR_LOG_FILE_NAME)
+
+    if not os.path.exists(output_cleaned_text_dir):
+        os.makedirs(output_cleaned_text_dir)
+        print(_('OUTPUT_FOLDER_CREATED').format(output_cleaned_text_dir))
+
+    if os.path.exists(error_log_file):
+        os.remove(error_log_file)
+        print(_('PREVIOUS_LOG_DELETED').format(error_log_file))
+
+    print(_('START_POST_PROCESSING').format(os.path.basename(chapter_unit_dir)))
+    print(_('CLEANED_FILES_SAVED').format(output_cleaned_text_dir))
+
+    if not os.path.exists(input_text_dir):
+        log_error(chapter_unit_dir, _('INPUT_FOLDER_NOT_FOUND').format(OUTPUT_TEXT_SUBFOLDER_NAME), "N/A")
+    else:
+        for filename in os.listdir(input_text_dir):
+            if not filename.lower().endswith('.txt'):
+                print(_('WARNING_NOT_TXT').format(filename))
+                continue
         
-        input_filepath = os.path.join(INPUT_TEXT_DIR, filename)
-        output_filepath = os.path.join(OUTPUT_CLEANED_TEXT_DIR, filename)
+            input_filepath = os.path.join(input_text_dir, filename)
+            output_filepath = os.path.join(output_cleaned_text_dir, filename)
 
-        print(_('PROCESSING_FILE').format(filename))
+            print(_('PROCESSING_FILE').format(filename))
 
-        try:
-            with open(input_filepath, 'r', encoding='utf-8') as f:
-                raw_text = f.read()
+            try:
+                with open(input_filepath, 'r', encoding='utf-8') as f:
+                    raw_text = f.read()
             
-            cleaned_text = clean_text(raw_text)
+                cleaned_text = clean_text(raw_text)
 
-            with open(output_filepath, 'w', encoding='utf-8') as f:
-                f.write(cleaned_text)
+                with open(output_filepath, 'w', encoding='utf-8') as f:
+                    f.write(cleaned_text)
             
-            print(_('CLEANING_SUCCESSFUL').format(filename, os.path.basename(output_filepath)))
+                print(_('CLEANING_SUCCESSFUL').format(filename, os.path.basename(output_filepath)))
+
+            except Exception as e:
+                log_error(chapter_unit_dir, _('ERROR_WHILE_CLEANING').format(filename, e), filename)
 
-        except Exception as e:
-            log_error(_('ERROR_WHILE_CLEANING').format(filename, e), filename)
+    print(_('POST_PROCESSING_FINISHED').format(os.path.basename(chapter_unit_dir)))
+    print(_('CHECK_LOG_FOR_ERRORS').format(error_log_file))
 
-print(_('POST_PROCESSING_FINISHED').format(os.path.basename(CHAPTER_UNIT_DIR)))
-print(_('CHECK_LOG_FOR_ERRORS').format(ERROR_LOG_FILE))
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=_('SCRIPT_DESCRIPTION'))
+    parser.add_argument('--chapter_unit', type=str, required=True,
+                        help=_('CHAPTER_UNIT_HELP'))
+    args = parser.parse_args()
+    clean_chapter_unit(args.chapter_unit)
@@ -3,13 +3,66 @@
 # --- Global path for the files of the Orchestrator ---
 ORCHESTRATOR_LOG_FILE_PATH = 'D:\\novel\\scripts\\orchestrator_log.log'
 GLOBAL_ERROR_LOG_FILE_PATH = 'D:\\novel\\scripts\\global_errors.log'
+# Structured log (one JSON event per line: time, level, message, chapter, stage, duration). Empty = disabled
+ORCHESTRATOR_JSONL_LOG_FILE_PATH = ''
+# Maximum delay (seconds) before buffered log lines are flushed to disk
+LOG_FLUSH_INTERVAL_SECONDS = 1.0
 PROGRESS_LOG_FILE_PATH = 'D:\\novel\\scripts\\processed_chapters.progress'
+# SQLite state database (per chapter / per stage progress). The old PROGRESS_LOG_FILE_PATH JSON file is imported into it on first start
+STATE_DB_PATH = 'D:\\novel\\scripts\\pipeline_state.sqlite3'
 GLOBAL_BOOKS_ROOT_DIR = 'D:\\novel'
 SCRIPTS_DIR = 'D:\\novel\\scripts'
 
 # --- Paramèters for the OCR and the treatement for the image ---
 OCR_LANGUAGE = 'eng'
+# Engine that reads the segments (ocr_engines.py):
+# 'pytesseract' : one tesseract process per segment (the image goes through a temporary file, the model is reloaded each time)
+# 'tesserocr' : Tesseract loaded once in each worker, pixels passed from memory (needs the optional package: pip install tesserocr)
+# 'fake' : deterministic text without Tesseract, to try the pipeline (FAKE_OCR_MS_PER_MEGAPIXEL simulates its cost)
+OCR_ENGINE = 'pytesseract'
+FAKE_OCR_MS_PER_MEGAPIXEL = 0.0
 MAX_IMAGE_HEIGHT = 10000
+# Height (pixels) aimed at for each segment, never above MAX_IMAGE_HEIGHT.
+# 0 = the height measured by calibrate_segment_height.py (SEGMENT_HEIGHT_CALIBRATION_PATH), MAX_IMAGE_HEIGHT if not calibrated
+SEGMENT_TARGET_HEIGHT = 0
+SEGMENT_HEIGHT_CALIBRATION_PATH = 'D:\\novel\\scripts\\segment_height_calibration.json'
+# Segment heights timed by calibrate_segment_height.py
+SEGMENT_HEIGHT_CANDIDATES = [2000, 3000, 4000, 6000, 8000, 10000]
+# True = cut each segment in the blank band (rows without text) nearest to the target height, so no text line is cut in half
+# False = cut at exact multiples of the target height (old behaviour)
+SPLIT_ON_BLANK_ROWS = True
+# Blank rows are searched this many pixels above and below each target height
+SPLIT_SEARCH_WINDOW_PIXELS = 1500
+# True = a tall PNG image (8 bits per channel, not interlaced) is decoded by strips while it is split: only the rows not
+# split yet are kept in memory, whatever the height of the image. False = the whole image is decoded first (old behaviour)
+PNG_STRIP_DECODING = True
+
+# --- Paramèters for the OCR preprocessing (ocr_preprocessing.py) ---
+# True = each segment is prepared with NumPy before Tesseract: deskewed, downscaled if its text is bigger than
+# OCR_PREPROCESS_TARGET_X_HEIGHT, then binarised. Measure the effect on a book with evaluate_ocr_preprocessing.py
+OCR_PREPROCESSING = False
+# 'otsu' : one threshold for the whole segment
+# 'adaptive' : a threshold per neighbourhood (uneven backgrounds, gradients, watermarks)
+# 'none' : grey levels kept
+OCR_PREPROCESS_BINARIZATION = 'otsu'
+# Width (pixels) of the neighbourhood of the 'adaptive' threshold
+OCR_PREPROCESS_ADAPTIVE_WINDOW = 41
+# True = text lines leaning by up to OCR_PREPROCESS_MAX_SKEW_DEGREES are straightened
+OCR_PREPROCESS_DESKEW = True
+OCR_PREPROCESS_MAX_SKEW_DEGREES = 2.0
+# Height (pixels) of the lowercase letters aimed at: bigger text is downscaled to it (never upscaled). 0 = no rescaling
+OCR_PREPROCESS_TARGET_X_HEIGHT = 24
+# Settings per book folder name, overriding the values above (as suggested by evaluate_ocr_preprocessing.py), e.g.
+# {'MyBook': {'enabled': True, 'binarization': 'adaptive', 'deskew': False, 'target_x_height': 0}}
+OCR_PREPROCESSING_BY_BOOK = {}
+
+# --- Paramèters for the blank segment detection (segment_classifier.py) ---
+# True = segments without text (blank bands, separators, plain banners) are detected from their ink and skipped without Tesseract
+SKIP_BLANK_SEGMENTS = True
+# A segment whose share of ink pixels is at most this value is blank
+BLANK_SEGMENT_MAX_INK_RATIO = 0.00005
+# Height (pixels) under which a band of ink is a line or a rule, not a line of text
+BLANK_SEGMENT_MIN_TEXT_LINE_HEIGHT = 6
 
 # --- Name of the subdirectories (shouldn't be modified) folders are deleted after it is transfer to FINAL_COLLECTED_TEXTS_SUBFOLDER_NAME---
 PROCESSED_IMAGES_SUBFOLDER_NAME = 'images_processed'
@@ -22,4 +75,99 @@ FINAL_COLLECTED_TEXTS_SUBFOLDER_NAME = 'final_texts'
 EXCLUDE_DIR_NAMES = {"traiter", "script", "backup", "temp", "sortie", "scripts", "a traiter", "__pycache__"}
 
 # --- Paramèters parallel treatement  ---
-MAX_CONCURRENT_CHAPTER_UNITS = 4
\ No newline at end of file
+MAX_CONCURRENT_CHAPTER_UNITS = 4
+# Memory budget (MB) for the chapters processed at the same time: a chapter only starts if its estimated peak memory
+# (computed from the image header) fits in what is left. 0 = half of the physical memory, -1 = no budget (count only)
+MEMORY_BUDGET_MB = 0
+# Number of threads listing the book folders in parallel during the detection phase
+DISCOVERY_THREADS = 8
+# Number of threads copying the final texts when final_texts is on another filesystem (otherwise they are just renamed)
+FINAL_TEXTS_COPY_THREADS = 8
+# Book folder names processed before the others (also: python orchestrator.py --priority-book NAME)
+PRIORITY_BOOKS = []
+
+# --- Paramèters for the stage workers (split / OCR / clean) ---
+# 'pool' : the stages run as functions inside long-lived worker processes (no interpreter cold start per chapter)
+# 'subprocess' : the stages run as separate scripts, one Python process per stage per chapter (old behaviour)
+STAGE_EXECUTION_MODE = 'pool'
+# Number of worker processes of the pool (0 = number of CPU cores)
+STAGE_WORKER_PROCESSES = 0
+# OCR of a chapter split into one task per segment, spread over all the workers ('pool' mode only)
+OCR_SEGMENT_PARALLELISM = True
+# 'stream' : split -> OCR -> clean of a chapter in memory, only the cleaned text is written (stream_pipeline.py)
+# 'disk' : each stage writes its output folder (images_processed, sortieTXT), useful for debugging
+PIPELINE_MODE = 'stream'
+# False : the image of a .cbz chapter is read directly from the archive (no '_unzipped' copy of the pages on disk)
+# True : the .cbz is extracted to '<name>_unzipped' before splitting, as before
+CBZ_EXTRACT_TO_DISK = False
+# Number of pages of a multi-page chapter (all the images of its folder or .cbz, in natural order) decoded, split and,
+# in 'stream' mode, OCR'd at the same time (threads inside the chapter task). 1 = one page after the other
+PAGE_WORKER_THREADS = 4
+
+# --- Paramèters for the stage timeouts and the retries of the failed chapters ---
+# Maximum duration (seconds) of each stage for one chapter, 0 = no limit. Beyond it, the stage is killed with all its
+# child processes (Tesseract...) and the chapter fails. In 'pool' mode only the workers running that stage are killed; the pool
+# is then restarted and the other chapters it interrupted are retried without counting it as a failed attempt
+TIMEOUT_SECONDS_BY_STAGE = {
+    'split_large_images.py': 600,
+    'OCR.py': 3600,
+    'clean_ocr_text.py': 300,
+    'stream_pipeline.py': 3600,
+}
+# Maximum duration (seconds) of Tesseract on one segment, 0 = no limit. A hung Tesseract is killed and the segment is logged as an error
+OCR_SEGMENT_TIMEOUT_SECONDS = 300
+# Number of attempts of a failed chapter before it is quarantined (skipped by the next runs, see --retry-quarantined)
+CHAPTER_MAX_ATTEMPTS = 3
+# Delay before the second attempt of a failed chapter, doubled at each new failure up to RETRY_BACKOFF_MAX_SECONDS
+RETRY_BACKOFF_BASE_SECONDS = 30
+RETRY_BACKOFF_MAX_SECONDS = 600
+
+# --- Paramèters for the run metrics (run_metrics.py) ---
+# Folder of the end-of-run report (run_metrics.json and run_metrics.html: stage durations, pages/s, megapixels/s, queue wait, utilisation), '' = no report
+METRICS_REPORT_DIR = 'D:\\novel\\scripts'
+# Prometheus textfile (node_exporter textfile collector format), rewritten after each book, '' = not written
+METRICS_PROMETHEUS_TEXTFILE_PATH = ''
+
+# --- Paramèters for the profiling mode (python orchestrator.py --profile) ---
+# True = profile each stage of each chapter (one profile file per chapter and a summary of the hottest functions per stage)
+PROFILE_MODE = False
+# Folder of the profiles, one subfolder per run
+PROFILE_OUTPUT_DIR = 'D:\\novel\\scripts\\profiles'
+# 'cprofile' : always available
+# 'py-spy' : sampling profiler (low overhead), used when STAGE_EXECUTION_MODE = 'subprocess' and py-spy is installed
+PROFILER = 'cprofile'
+# Number of functions listed in the summary of each stage
+PROFILE_TOP_FUNCTIONS = 30
+# Number of slowest chapters logged at the end of the run with their image dimensions (0 = disabled, also: --slowest-chapters N)
+SLOWEST_CHAPTERS_LOG_COUNT = 0
+
+# --- Paramèters for the distributed mode (python orchestrator.py --distributed) ---
+# True = several machines mounting the same library share its chapters: each chapter is claimed through a lease file
+# in LEASE_DIR, so no chapter is processed twice. STATE_DB_PATH must then be a local path on each machine.
+DISTRIBUTED_MODE = False
+# Folder of the lease files, on the shared library (the same folder for all the machines)
+LEASE_DIR = 'D:\\novel\\scripts\\leases'
+# Name of this machine in the lease files ('' = host name and process id)
+NODE_NAME = ''
+# A lease not renewed for this many seconds belongs to a stopped machine and is taken over (the clocks of the machines must be synchronised)
+LEASE_TTL_SECONDS = 120
+# Interval between two renewals of the leases held by this machine
+LEASE_HEARTBEAT_SECONDS = 30
+# Delay before trying again a chapter being processed by another machine
+LEASE_RETRY_SECONDS = 15
+
+# --- Paramèters for the watch mode (python orchestrator.py --watch) ---
+# True = always keep watching the library for new chapters / .cbz files after the first pass
+WATCH_MODE = False
+# 'auto' : filesystem events through the optional watchdog package (inotify...), polling if it is not installed
+# 'polling' : always rescan the library every WATCH_POLL_INTERVAL_SECONDS
+WATCH_BACKEND = 'auto'
+WATCH_POLL_INTERVAL_SECONDS = 5
+# A new or modified chapter / .cbz is queued once it has not changed for this many seconds (copy finished)
+WATCH_DEBOUNCE_SECONDS = 10
+
+# --- Paramèters for the OCR result cache (a segment whose pixels didn't change is never OCR'd twice) ---
+OCR_CACHE_ENABLED = True
+OCR_CACHE_DIR = 'D:\\novel\\scripts\\ocr_cache'
+# Maximum size of the cache on disk, the least recently used results are deleted beyond it
+OCR_CACHE_MAX_SIZE_MB = 500
@@ -1,9 +1,12 @@
 import os
 import re
 import json
+import time
 import shutil
 import subprocess
 from pathlib import Path
+import run_metrics
+from state_store import StateStore, EPUB_STATUS_SUCCESS, EPUB_STATUS_FAIL
 
 # === CONFIGURATION ===
 GLOBAL_BOOKS_ROOT_DIR = r"D:\\novel\\scripts"
@@ -17,6 +20,11 @@ FINAL_TEXTS_SUBFOLDER_NAME = "final_texts"
 EXCLUDE_BOOK_FOLDERS = {"traiter", "script", "backup", "temp", "__pycache__"}
 LOG_FILE = os.path.join(GLOBAL_BOOKS_ROOT_DIR, "calibre_automation.log")
 PROGRESS_FILE = os.path.join(GLOBAL_BOOKS_ROOT_DIR, "calibre_processed_books.progress")
+# Base SQLite de progression (remplace PROGRESS_FILE, qui est importé au premier lancement)
+STATE_DB_FILE = os.path.join(GLOBAL_BOOKS_ROOT_DIR, "calibre_processed_books.sqlite3")
+# Rapport de fin d'exécution (calibre_run_metrics.json / .html) et fichier texte Prometheus ("" = non écrit)
+METRICS_REPORT_DIR = GLOBAL_BOOKS_ROOT_DIR
+METRICS_PROMETHEUS_TEXTFILE_PATH = ""
 
 # === LOGGING ===
 def log(msg, level="INFO"):
@@ -29,17 +37,15 @@ def log(msg, level="INFO"):
 def natsort_key(s):
     return [int(text) if text.isdigit() else text.lower() for text in re.split(r'([0-9]+)', s)]
 
-def load_progress():
-    if os.path.exists(PROGRESS_FILE):
-        with open(PROGRESS_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {}
-
-def save_progress(progress):
-    temp = PROGRESS_FILE + ".tmp"
-    with open(temp, "w", encoding="utf-8") as f:
-        json.dump(progress, f, indent=2)
-    shutil.move(temp, PROGRESS_FILE)
+def open_progress_store():
+    store = StateStore(STATE_DB_FILE)
+    if store.is_empty() and os.path.exists(PROGRESS_FILE):
+        try:
+            imported = store.import_json_epub_progress(PROGRESS_FILE)
+            log(f"Progression de {imported} livres importée depuis {PROGRESS_FILE}")
+        except json.JSONDecodeError:
+            log(f"Fichier de progression illisible, ignoré : {PROGRESS_FILE}", level="WARNING")
+    return store
 
 # === COMMANDS ===
 def run_cmd(cmd):
@@ -106,24 +112,16 @@ def extract_book_id(output):
     return None
 
 # === Main TREATEMENT ===
-def process_book(book_path):
+def process_book(book_path, store):
     book_name = os.path.basename(book_path)
     log(f"\n--- Traitement du livre: {book_name} ---")
 
-    progress = load_progress()
-    book_progress = progress.get(book_name)
+    done_epubs, failed_epubs, book_complete = store.get_epub_progress(book_name)
 
-    if book_progress is True:
+    if book_complete:
         log(f"Livre déjà marqué comme traité : {book_name}", level="INFO")
         return
 
-    done_epubs = set()
-    failed_epubs = set()
-
-    if isinstance(book_progress, dict):
-        done_epubs = set(book_progress.get("success", []))
-        failed_epubs = set(book_progress.get("fail", []))
-
     final_texts = os.path.join(book_path, FINAL_TEXTS_SUBFOLDER_NAME)
     exports = os.path.join(GLOBAL_EPUB_OUTPUT_DIR, book_name)
     os.makedirs(exports, exist_ok=True)
@@ -158,13 +156,17 @@ def process_book(book_path):
         total += 1
         temp_epub = os.path.join(book_path, f"temp_{chapter_index:04d}.epub")
 
+        chapter_start_time = time.monotonic()
         try:
-            if not convert_txt_to_epub(chapter_path, temp_epub):
-                raise Exception("Conversion échouée")
+            with run_metrics.time_stage("convert", book_name, fname):
+                if not convert_txt_to_epub(chapter_path, temp_epub):
+                    raise Exception("Conversion échouée")
 
-            set_epub_metadata(temp_epub, new_title, "A definir", book_name, chapter_index)
+            with run_metrics.time_stage("metadata", book_name, fname):
+                set_epub_metadata(temp_epub, new_title, "A definir", book_name, chapter_index)
 
-            add_output = add_to_calibre(temp_epub)
+            with run_metrics.time_stage("calibre_add", book_name, fname):
+                add_output = add_to_calibre(temp_epub)
             log(f"Sortie brute calibredb add:\n{add_output}", level="DEBUG")
             book_id = extract_book_id(add_output) if add_output else None
 
@@ -178,37 +180,33 @@ def process_book(book_path):
                     raise Exception("ID Calibre non détecté")
 
             final_epub_path = os.path.join(exports, epub_name)
-            shutil.copy(temp_epub, final_epub_path)
-            remove_from_calibre(book_id)
+            with run_metrics.time_stage("export", book_name, fname):
+                shutil.copy(temp_epub, final_epub_path)
+            with run_metrics.time_stage("calibre_remove", book_name, fname):
+                remove_from_calibre(book_id)
 
             success += 1
             done_epubs.add(epub_name)
+            failed_epubs.discard(epub_name)
 
-            # immediate save after success
-            progress[book_name] = {
-                "success": sorted(done_epubs),
-                "fail": sorted(failed_epubs),
-                "complete": False  # pas encore fini le livre
-            }
-            save_progress(progress)
+            # immediate save after success (une seule ligne écrite, pas toute la progression du livre)
+            store.record_epub_chapter(book_name, epub_name, EPUB_STATUS_SUCCESS)
 
         except Exception as e:
             log(f"Erreur sur le chapitre {epub_name} : {e}", level="ERROR")
             failures.append(epub_name)
             failed_epubs.add(epub_name)
+            store.record_epub_chapter(book_name, epub_name, EPUB_STATUS_FAIL)
         finally:
             if os.path.exists(temp_epub):
                 os.remove(temp_epub)
+            run_metrics.record_chapter_task(time.monotonic() - chapter_start_time)
 
     # Marque comme complet si pas d’échecs
-    progress[book_name] = {
-        "success": sorted(done_epubs),
-        "fail": sorted(failed_epubs),
-        "complete": len(failed_epubs) == 0
-    }
-    save_progress(progress)
-
-    if progress[book_name]["complete"]:
+    book_complete = len(failed_epubs) == 0
+    store.set_epub_book_complete(book_name, book_complete)
+
+    if book_complete:
         log(f"✅ Livre complet traité et marqué comme terminé : {book_name}")
     else:
         log(f"💾 Progression partielle sauvegardée : {len(done_epubs)} chapitres OK, {len(failed_epubs)} échecs")
@@ -223,15 +221,26 @@ if __name__ == "__main__":
     if os.path.exists(LOG_FILE):
         os.remove(LOG_FILE)
 
-    progress = load_progress()
+    store = open_progress_store()
+    run_metrics.start_run("epub", 1)
+    complete_books = store.get_complete_epub_books()
     books = [f for f in os.listdir(GLOBAL_BOOKS_ROOT_DIR)
              if os.path.isdir(os.path.join(GLOBAL_BOOKS_ROOT_DIR, f))
              and f.lower() not in EXCLUDE_BOOK_FOLDERS
-             and progress.get(f) is not True]
+             and f not in complete_books]
 
     books = sorted(books, key=natsort_key)
 
     for book in books:
-        process_book(os.path.join(GLOBAL_BOOKS_ROOT_DIR, book))
+        process_book(os.path.join(GLOBAL_BOOKS_ROOT_DIR, book), store)
+
+    store.close()
+
+    run_metrics.finish_run()
+    try:
+        for report_path in run_metrics.write_reports(METRICS_REPORT_DIR, "calibre_run_metrics", METRICS_PROMETHEUS_TEXTFILE_PATH):
+            log(f"Mesures de l'exécution écrites dans {report_path}")
+    except OSError as e:
+        log(f"Impossible d'écrire les mesures de l'exécution : {e}", level="WARNING")
 
     log("\n--- Traitement EPUB terminé ---")
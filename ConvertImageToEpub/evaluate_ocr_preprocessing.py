@@ -0,0 +1,196 @@
+import os
+import sys
+import json
+import time
+import difflib
+import argparse
+import datetime
+import itertools
+import pytesseract
+import config
+import split_large_images
+import ocr_preprocessing
+import calibrate_segment_height
+import OCR
+
+# Importation du module de localisation
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from localization.main import get_translator
+_ = get_translator()
+
+# --- Mesure de l'effet de la préparation des segments (ocr_preprocessing.py) sur la durée et la précision de l'OCR ---
+# Les mêmes pages d'un livre sont découpées comme par split_large_images.py puis passées à Tesseract (sans le cache OCR)
+# sans préparation, puis avec chaque combinaison de réglages demandée. La précision est la similarité des mots avec
+# un texte de référence (--reference, texte corrigé à la main des mêmes pages), sinon la confiance moyenne de Tesseract
+# par mot. Le réglage conseillé est le plus rapide parmi ceux dont la précision est à ACCURACY_TOLERANCE points de la
+# meilleure ; il s'ajoute au livre dans OCR_PREPROCESSING_BY_BOOK (config.py).
+
+DEFAULT_MAX_ROWS = 20000
+# Écart de précision (points de pourcentage) en dessous duquel deux réglages sont jugés aussi précis
+ACCURACY_TOLERANCE = 1.0
+# Réglage de référence : segments passés tels quels à Tesseract
+BASELINE_SETTINGS = {'enabled': False, 'binarization': 'none', 'deskew': False, 'target_x_height': 0}
+
+# --- Réglages essayés : la référence sans préparation, puis toutes les combinaisons demandées ---
+def build_candidate_settings(binarizations, deskew_modes, x_heights):
+    candidates = [dict(BASELINE_SETTINGS)]
+    for binarization, deskew, target_x_height in itertools.product(binarizations, deskew_modes, x_heights):
+        if binarization == 'none' and not deskew and not target_x_height:
+            continue
+        candidates.append({'enabled': True, 'binarization': binarization, 'deskew': deskew, 'target_x_height': target_x_height})
+    return candidates
+
+# --- Libellé court d'un réglage pour la console ---
+def describe_settings(settings):
+    if not settings['enabled']:
+        return _('PREPROCESS_EVAL_BASELINE')
+    parts = [settings['binarization']]
+    if settings['deskew']:
+        parts.append('deskew')
+    if settings['target_x_height']:
+        parts.append(f"x-height {settings['target_x_height']}")
+    return ', '.join(parts)
+
+# --- Mots lus par Tesseract dans une image et leurs confiances (0 à 100) ---
+def ocr_words(img):
+    data = pytesseract.image_to_data(img, lang=OCR.OCR_LANGUAGE, config=OCR.TESSERACT_CONFIG, output_type=pytesseract.Output.DICT)
+    words, confidences = [], []
+    for text, confidence in zip(data['text'], data['conf']):
+        if text.strip() and float(confidence) >= 0:
+            words.append(text.strip())
+            confidences.append(float(confidence))
+    return words, confidences
+
+# --- Similarité (%) entre les mots lus et ceux du texte de référence, dans l'ordre ---
+def compute_word_accuracy(words, reference_words):
+    if not words and not reference_words:
+        return 100.0
+    return 100.0 * difflib.SequenceMatcher(None, reference_words, words, autojunk=False).ratio()
+
+# --- OCR de tous les échantillons avec un réglage : (secondes, [mots lus par groupe d'échantillons], confiances) ---
+# sample_groups : [[image PIL, ...] par argument --image] ; la durée comprend la préparation des segments.
+def measure_settings(sample_groups, settings):
+    elapsed_seconds = 0.0
+    group_words = []
+    confidences = []
+    for samples in sample_groups:
+        words = []
+        for sample in samples:
+            for segment_top, segment_bottom in split_large_images.iter_segment_rows(sample):
+                segment = sample.crop((0, segment_top, sample.width, segment_bottom))
+                start_time = time.perf_counter()
+                if settings['enabled']:
+                    segment, _details = ocr_preprocessing.preprocess_segment(segment, settings)
+                segment_words, segment_confidences = ocr_words(segment)
+                elapsed_seconds += time.perf_counter() - start_time
+                words.extend(segment_words)
+                confidences.extend(segment_confidences)
+        group_words.append(words)
+    return elapsed_seconds, group_words, confidences
+
+def parse_list(value):
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+def parse_int_list(value):
+    return [int(item) for item in parse_list(value)]
+
+def parse_deskew_modes(value):
+    return [item.lower() in ('on', 'true', '1', 'yes') for item in parse_list(value)]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=_('PREPROCESS_EVAL_DESCRIPTION'))
+    parser.add_argument('--image', action='append', required=True, help=_('PREPROCESS_EVAL_IMAGE_HELP'))
+    parser.add_argument('--reference', action='append', default=[], help=_('PREPROCESS_EVAL_REFERENCE_HELP'))
+    parser.add_argument('--binarizations', type=parse_list, default=['otsu', 'adaptive'], help=_('PREPROCESS_EVAL_BINARIZATIONS_HELP'))
+    parser.add_argument('--deskew', type=parse_deskew_modes, default=[True, False], help=_('PREPROCESS_EVAL_DESKEW_HELP'))
+    parser.add_argument('--x-heights', type=parse_int_list, default=[0, config.OCR_PREPROCESS_TARGET_X_HEIGHT or 24], help=_('PREPROCESS_EVAL_X_HEIGHTS_HELP'))
+    parser.add_argument('--max-rows', type=int, default=DEFAULT_MAX_ROWS, help=_('PREPROCESS_EVAL_MAX_ROWS_HELP'))
+    parser.add_argument('--book', help=_('PREPROCESS_EVAL_BOOK_HELP'))
+    parser.add_argument('--output', help=_('PREPROCESS_EVAL_OUTPUT_HELP'))
+    args = parser.parse_args(argv)
+
+    invalid_methods = [method for method in args.binarizations if method not in ocr_preprocessing.BINARIZATION_METHODS]
+    if invalid_methods:
+        parser.error(_('PREPROCESS_EVAL_INVALID_BINARIZATION').format(', '.join(invalid_methods), ', '.join(ocr_preprocessing.BINARIZATION_METHODS)))
+    if args.reference and len(args.reference) != len(args.image):
+        parser.error(_('PREPROCESS_EVAL_REFERENCE_COUNT_MISMATCH').format(len(args.reference), len(args.image)))
+    book_name = args.book or os.path.basename(os.path.dirname(os.path.normpath(args.image[0])))
+    output_path = args.output or os.path.join(config.SCRIPTS_DIR, f"ocr_preprocessing_{book_name}.json")
+
+    # Échantillons (MAX_ROWS premières lignes de chaque page), groupés par argument --image
+    sample_groups = []
+    reference_words = []
+    measured_images = []
+    for image_index, path in enumerate(args.image):
+        image_pages = calibrate_segment_height.resolve_image_pages(path)
+        if not image_pages:
+            print(_('PREPROCESS_EVAL_IMAGE_NOT_FOUND').format(path))
+            continue
+        samples = []
+        for source_path, member_name in image_pages:
+            with split_large_images.open_source_image(source_path, member_name) as (_image_name, img):
+                sample = img.crop((0, 0, img.width, min(img.height, args.max_rows)))
+                if sample.mode != 'L' and sample.mode != 'RGB':
+                    sample = sample.convert('L')
+            samples.append(sample)
+            measured_images.append(f"{source_path}:{member_name}" if member_name else source_path)
+        sample_groups.append(samples)
+        if args.reference:
+            with open(args.reference[image_index], 'r', encoding='utf-8') as f:
+                reference_words.append(f.read().split())
+
+    if not sample_groups:
+        print(_('PREPROCESS_EVAL_NOTHING_MEASURED'))
+        return 1
+
+    results = []
+    for settings in build_candidate_settings(args.binarizations, args.deskew, args.x_heights):
+        print(_('PREPROCESS_EVAL_MEASURING').format(describe_settings(settings)))
+        try:
+            elapsed_seconds, group_words, confidences = measure_settings(sample_groups, settings)
+        except pytesseract.TesseractNotFoundError:
+            print(_('TESSERACT_NOT_FOUND'))
+            return 1
+        result = {
+            'settings': settings,
+            'seconds': round(elapsed_seconds, 3),
+            'mean_confidence': round(sum(confidences) / len(confidences), 2) if confidences else 0.0,
+            'word_count': sum(len(words) for words in group_words),
+        }
+        if reference_words:
+            result['word_accuracy'] = round(sum(compute_word_accuracy(words, reference) * len(reference)
+                                                for words, reference in zip(group_words, reference_words))
+                                            / max(1, sum(len(reference) for reference in reference_words)), 2)
+        # Variation de la durée par rapport à la référence sans préparation (négative = plus rapide)
+        result['time_change_percent'] = round(100.0 * (elapsed_seconds / results[0]['seconds'] - 1), 1) if results and results[0]['seconds'] else 0.0
+        accuracy_text = f"{result['word_accuracy']:.1f}%" if reference_words else '-'
+        print(_('PREPROCESS_EVAL_RESULT_LINE').format(result['seconds'], result['time_change_percent'], result['mean_confidence'], accuracy_text))
+        results.append(result)
+
+    accuracy_metric = 'word_accuracy' if reference_words else 'mean_confidence'
+    best_accuracy = max(result[accuracy_metric] for result in results)
+    suggested = min((result for result in results if result[accuracy_metric] >= best_accuracy - ACCURACY_TOLERANCE),
+                    key=lambda result: result['seconds'])
+
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'book': book_name,
+            'created_at': datetime.datetime.now().isoformat(timespec='seconds'),
+            'ocr_language': OCR.OCR_LANGUAGE,
+            'tesseract_config': OCR.TESSERACT_CONFIG,
+            'segment_target_height': split_large_images.SEGMENT_TARGET_HEIGHT,
+            'images': measured_images,
+            'accuracy_metric': accuracy_metric,
+            'results': results,
+            'suggested_settings': suggested['settings'],
+        }, f, indent=2)
+    print(_('PREPROCESS_EVAL_SUGGESTED').format(describe_settings(suggested['settings']), suggested['time_change_percent'], accuracy_metric))
+    print(f"    OCR_PREPROCESSING_BY_BOOK = {{{book_name!r}: {suggested['settings']!r}}}")
+    print(_('PREPROCESS_EVAL_SAVED').format(output_path))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -22,7 +22,7 @@ def extract_cbz_content(cbz_file_path, output_parent_dir_for_extraction):
     print(_('EXTRACTING_CBZ').format(os.path.basename(cbz_file_path), output_chapter_dir))
     try:
         with zipfile.ZipFile(cbz_file_path, 'r') as zip_ref:
-            extracted_files = []
+            # Toutes les pages gardent leur nom : la découpe les traite dans l'ordre naturel de leurs noms
             for member in zip_ref.namelist():
                 if member.endswith('/'):
                     continue
@@ -35,23 +35,6 @@ def extract_cbz_content(cbz_file_path, output_parent_dir_for_extraction):
                 with zip_ref.open(member, 'r') as source:
                     with open(dest_path, "wb") as target:
                         shutil.copyfileobj(source, target)
-                extracted_files.append(dest_path)
-
-            main_image_found = False
-            for f in extracted_files:
-                if os.path.basename(f).lower() == '1.png':
-                    main_image_found = True
-                    break
-            
-            if not main_image_found and extracted_files:
-                img_files = [f for f in extracted_files if f.lower().endswith(('.png', '.jpg', '.jpeg'))]
-                img_files.sort()
-                if img_files:
-                    first_img_path = img_files[0]
-                    target_1_png_path = os.path.join(output_chapter_dir, '1.png')
-                    if os.path.abspath(first_img_path) != os.path.abspath(target_1_png_path):
-                        os.rename(first_img_path, target_1_png_path)
-                        print(_('RENAMED_FOR_COMPATIBILITY').format(os.path.basename(first_img_path)))
         
         print(_('EXTRACTION_FINISHED').format(os.path.basename(cbz_file_path)))
         return output_chapter_dir
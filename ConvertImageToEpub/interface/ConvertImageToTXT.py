@@ -61,12 +61,35 @@ def create_ui():
                 f.write(f"# --- Global path for the files of the Orchestrator ---\n")
                 f.write(f"ORCHESTRATOR_LOG_FILE_PATH = '{values['-ORCHESTRATOR_LOG_FILE_PATH-'].replace('\\', '\\\\')}'\n")
                 f.write(f"GLOBAL_ERROR_LOG_FILE_PATH = '{values['-GLOBAL_ERROR_LOG_FILE_PATH-'].replace('\\', '\\\\')}'\n")
+                f.write(f"ORCHESTRATOR_JSONL_LOG_FILE_PATH = {config.ORCHESTRATOR_JSONL_LOG_FILE_PATH!r}\n")
+                f.write(f"LOG_FLUSH_INTERVAL_SECONDS = {config.LOG_FLUSH_INTERVAL_SECONDS!r}\n")
                 f.write(f"PROGRESS_LOG_FILE_PATH = '{values['-PROGRESS_LOG_FILE_PATH-'].replace('\\', '\\\\')}'\n")
+                f.write(f"STATE_DB_PATH = {config.STATE_DB_PATH!r}\n")
                 f.write(f"GLOBAL_BOOKS_ROOT_DIR = '{values['-GLOBAL_BOOKS_ROOT_DIR-'].replace('\\', '\\\\')}'\n")
                 f.write(f"SCRIPTS_DIR = '{values['-SCRIPTS_DIR-'].replace('\\', '\\\\')}'\n\n")
                 f.write(f"# --- Paramèters for the OCR and the treatement for the image ---\n")
                 f.write(f"OCR_LANGUAGE = '{values['-OCR_LANGUAGE-']}'\n")
-                f.write(f"MAX_IMAGE_HEIGHT = {int(values['-MAX_IMAGE_HEIGHT-'])}\n\n")
+                f.write(f"OCR_ENGINE = {config.OCR_ENGINE!r}\n")
+                f.write(f"FAKE_OCR_MS_PER_MEGAPIXEL = {config.FAKE_OCR_MS_PER_MEGAPIXEL!r}\n")
+                f.write(f"MAX_IMAGE_HEIGHT = {int(values['-MAX_IMAGE_HEIGHT-'])}\n")
+                f.write(f"SEGMENT_TARGET_HEIGHT = {config.SEGMENT_TARGET_HEIGHT!r}\n")
+                f.write(f"SEGMENT_HEIGHT_CALIBRATION_PATH = {config.SEGMENT_HEIGHT_CALIBRATION_PATH!r}\n")
+                f.write(f"SEGMENT_HEIGHT_CANDIDATES = {config.SEGMENT_HEIGHT_CANDIDATES!r}\n")
+                f.write(f"SPLIT_ON_BLANK_ROWS = {config.SPLIT_ON_BLANK_ROWS!r}\n")
+                f.write(f"SPLIT_SEARCH_WINDOW_PIXELS = {config.SPLIT_SEARCH_WINDOW_PIXELS!r}\n")
+                f.write(f"PNG_STRIP_DECODING = {config.PNG_STRIP_DECODING!r}\n\n")
+                f.write(f"# --- Paramèters for the OCR preprocessing (ocr_preprocessing.py) ---\n")
+                f.write(f"OCR_PREPROCESSING = {config.OCR_PREPROCESSING!r}\n")
+                f.write(f"OCR_PREPROCESS_BINARIZATION = {config.OCR_PREPROCESS_BINARIZATION!r}\n")
+                f.write(f"OCR_PREPROCESS_ADAPTIVE_WINDOW = {config.OCR_PREPROCESS_ADAPTIVE_WINDOW!r}\n")
+                f.write(f"OCR_PREPROCESS_DESKEW = {config.OCR_PREPROCESS_DESKEW!r}\n")
+                f.write(f"OCR_PREPROCESS_MAX_SKEW_DEGREES = {config.OCR_PREPROCESS_MAX_SKEW_DEGREES!r}\n")
+                f.write(f"OCR_PREPROCESS_TARGET_X_HEIGHT = {config.OCR_PREPROCESS_TARGET_X_HEIGHT!r}\n")
+                f.write(f"OCR_PREPROCESSING_BY_BOOK = {config.OCR_PREPROCESSING_BY_BOOK!r}\n\n")
+                f.write(f"# --- Paramèters for the blank segment detection (segment_classifier.py) ---\n")
+                f.write(f"SKIP_BLANK_SEGMENTS = {config.SKIP_BLANK_SEGMENTS!r}\n")
+                f.write(f"BLANK_SEGMENT_MAX_INK_RATIO = {config.BLANK_SEGMENT_MAX_INK_RATIO!r}\n")
+                f.write(f"BLANK_SEGMENT_MIN_TEXT_LINE_HEIGHT = {config.BLANK_SEGMENT_MIN_TEXT_LINE_HEIGHT!r}\n\n")
                 f.write(f"# --- Name of the subdirectories (shouldn't be modified) ---\n")
                 f.write(f"PROCESSED_IMAGES_SUBFOLDER_NAME = '{config.PROCESSED_IMAGES_SUBFOLDER_NAME}'\n")
                 f.write(f"OUTPUT_TEXT_SUBFOLDER_NAME = '{config.OUTPUT_TEXT_SUBFOLDER_NAME}'\n")
@@ -78,6 +101,46 @@ def create_ui():
                 f.write(f"EXCLUDE_DIR_NAMES = {excluded_dirs}\n\n")
                 f.write(f"# --- Paramèters parallel treatement  ---\n")
                 f.write(f"MAX_CONCURRENT_CHAPTER_UNITS = {int(values['-MAX_CONCURRENT_CHAPTER_UNITS-'])}\n")
+                f.write(f"MEMORY_BUDGET_MB = {config.MEMORY_BUDGET_MB!r}\n")
+                f.write(f"DISCOVERY_THREADS = {config.DISCOVERY_THREADS!r}\n")
+                f.write(f"FINAL_TEXTS_COPY_THREADS = {config.FINAL_TEXTS_COPY_THREADS!r}\n")
+                f.write(f"PRIORITY_BOOKS = {config.PRIORITY_BOOKS!r}\n\n")
+                f.write(f"# --- Paramèters for the stage workers (split / OCR / clean) ---\n")
+                f.write(f"STAGE_EXECUTION_MODE = {config.STAGE_EXECUTION_MODE!r}\n")
+                f.write(f"STAGE_WORKER_PROCESSES = {config.STAGE_WORKER_PROCESSES!r}\n")
+                f.write(f"OCR_SEGMENT_PARALLELISM = {config.OCR_SEGMENT_PARALLELISM!r}\n")
+                f.write(f"PIPELINE_MODE = {config.PIPELINE_MODE!r}\n")
+                f.write(f"CBZ_EXTRACT_TO_DISK = {config.CBZ_EXTRACT_TO_DISK!r}\n")
+                f.write(f"PAGE_WORKER_THREADS = {config.PAGE_WORKER_THREADS!r}\n")
+                f.write(f"\n# --- Paramèters for the stage timeouts and the retries of the failed chapters ---\n")
+                f.write(f"TIMEOUT_SECONDS_BY_STAGE = {config.TIMEOUT_SECONDS_BY_STAGE!r}\n")
+                f.write(f"OCR_SEGMENT_TIMEOUT_SECONDS = {config.OCR_SEGMENT_TIMEOUT_SECONDS!r}\n")
+                f.write(f"CHAPTER_MAX_ATTEMPTS = {config.CHAPTER_MAX_ATTEMPTS!r}\n")
+                f.write(f"RETRY_BACKOFF_BASE_SECONDS = {config.RETRY_BACKOFF_BASE_SECONDS!r}\n")
+                f.write(f"RETRY_BACKOFF_MAX_SECONDS = {config.RETRY_BACKOFF_MAX_SECONDS!r}\n")
+                f.write(f"\n# --- Paramèters for the run metrics (run_metrics.py) ---\n")
+                f.write(f"METRICS_REPORT_DIR = {config.METRICS_REPORT_DIR!r}\n")
+                f.write(f"METRICS_PROMETHEUS_TEXTFILE_PATH = {config.METRICS_PROMETHEUS_TEXTFILE_PATH!r}\n")
+                f.write(f"PROFILE_MODE = {config.PROFILE_MODE!r}\n")
+                f.write(f"PROFILE_OUTPUT_DIR = {config.PROFILE_OUTPUT_DIR!r}\n")
+                f.write(f"PROFILER = {config.PROFILER!r}\n")
+                f.write(f"PROFILE_TOP_FUNCTIONS = {config.PROFILE_TOP_FUNCTIONS!r}\n")
+                f.write(f"SLOWEST_CHAPTERS_LOG_COUNT = {config.SLOWEST_CHAPTERS_LOG_COUNT!r}\n")
+                f.write(f"DISTRIBUTED_MODE = {config.DISTRIBUTED_MODE!r}\n")
+                f.write(f"LEASE_DIR = {config.LEASE_DIR!r}\n")
+                f.write(f"NODE_NAME = {config.NODE_NAME!r}\n")
+                f.write(f"LEASE_TTL_SECONDS = {config.LEASE_TTL_SECONDS!r}\n")
+                f.write(f"LEASE_HEARTBEAT_SECONDS = {config.LEASE_HEARTBEAT_SECONDS!r}\n")
+                f.write(f"LEASE_RETRY_SECONDS = {config.LEASE_RETRY_SECONDS!r}\n")
+                f.write(f"\n# --- Paramèters for the watch mode (python orchestrator.py --watch) ---\n")
+                f.write(f"WATCH_MODE = {config.WATCH_MODE!r}\n")
+                f.write(f"WATCH_BACKEND = {config.WATCH_BACKEND!r}\n")
+                f.write(f"WATCH_POLL_INTERVAL_SECONDS = {config.WATCH_POLL_INTERVAL_SECONDS!r}\n")
+                f.write(f"WATCH_DEBOUNCE_SECONDS = {config.WATCH_DEBOUNCE_SECONDS!r}\n")
+                f.write(f"\n# --- Paramèters for the OCR result cache ---\n")
+                f.write(f"OCR_CACHE_ENABLED = {config.OCR_CACHE_ENABLED!r}\n")
+                f.write(f"OCR_CACHE_DIR = {config.OCR_CACHE_DIR!r}\n")
+                f.write(f"OCR_CACHE_MAX_SIZE_MB = {config.OCR_CACHE_MAX_SIZE_MB!r}\n")
             
             messagebox.showinfo(strings["SUCCESS"], strings["SAVE_SUCCESS_MESSAGE"])
 
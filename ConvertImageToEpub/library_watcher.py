@@ -0,0 +1,177 @@
+import os
+import time
+import threading
+
+# watchdog (inotify sous Linux, ReadDirectoryChangesW sous Windows...) est optionnel : sans lui, la bibliothèque est scrutée périodiquement
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+# --- Surveillance de la bibliothèque (mode --watch de orchestrator.py) ---
+# Les éléments surveillés sont les entrées d'un dossier de livre : <racine>/<livre>/<chapitre ou fichier .cbz>.
+# Un élément nouveau ou modifié n'est signalé qu'une fois son contenu stable pendant debounce_seconds
+# (fichier .cbz ou images en cours de copie), et seulement si ce contenu diffère de celui déjà connu.
+
+SUPPORTED_IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.tiff', '.tif')
+
+BACKEND_WATCHDOG = 'watchdog'
+BACKEND_POLLING = 'polling'
+
+# --- Signature du contenu : taille + date du fichier .cbz, ou des images au premier niveau d'un dossier de chapitre ---
+# Les sous-dossiers et les logs écrits par le pipeline dans l'unité de chapitre ne la modifient pas.
+def content_signature(item_path):
+    try:
+        if not os.path.isdir(item_path):
+            stat = os.stat(item_path)
+            return (stat.st_size, stat.st_mtime_ns)
+        images = []
+        with os.scandir(item_path) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.lower().endswith(SUPPORTED_IMAGE_EXTENSIONS):
+                    stat = entry.stat()
+                    images.append((entry.name, stat.st_size, stat.st_mtime_ns))
+        return frozenset(images)
+    except FileNotFoundError:
+        return None
+
+class _LibraryEventHandler(FileSystemEventHandler):
+    def __init__(self, watcher):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        self.watcher._on_path_changed(event.src_path, event.event_type)
+        dest_path = getattr(event, 'dest_path', None)
+        if dest_path:
+            self.watcher._on_path_changed(dest_path, event.event_type)
+
+class LibraryWatcher:
+    # is_watched_item(nom_du_livre, nom_de_l_élément, est_un_dossier) -> bool : filtre fourni par l'orchestrateur
+    def __init__(self, root_dir, is_watched_item, poll_interval_seconds=5.0, debounce_seconds=10.0, backend='auto'):
+        self.root_dir = os.path.abspath(root_dir)
+        self.is_watched_item = is_watched_item
+        self.poll_interval_seconds = poll_interval_seconds
+        self.debounce_seconds = debounce_seconds
+        self.requested_backend = backend
+        self.backend = None
+        self._observer = None
+        self._lock = threading.Lock()
+        self._wake_up = threading.Event()
+        self._dirty_paths = set()
+        self._polled_contents = {}
+        self._known_contents = {}
+        # Éléments modifiés en attente de stabilité : {chemin: (signature du contenu, date du dernier changement)}
+        self._pending = {}
+
+    # --- Liste les éléments surveillés d'un livre (ou de toute la bibliothèque) ---
+    def _scan_items(self, book_names=None):
+        items = set()
+        try:
+            if book_names is None:
+                with os.scandir(self.root_dir) as books:
+                    book_names = [book.name for book in books if book.is_dir()]
+        except FileNotFoundError:
+            return items
+        for book_name in book_names:
+            try:
+                with os.scandir(os.path.join(self.root_dir, book_name)) as entries:
+                    for entry in entries:
+                        if self.is_watched_item(book_name, entry.name, entry.is_dir()):
+                            items.add(entry.path)
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+        return items
+
+    # --- Ramène un chemin quelconque sous la racine à l'élément surveillé qui le contient (<racine>/<livre>/<élément>) ---
+    def _on_path_changed(self, path, event_type):
+        relative_parts = os.path.relpath(os.path.abspath(path), self.root_dir).split(os.sep)
+        if not relative_parts or relative_parts[0] in ('.', '..'):
+            return
+        if len(relative_parts) == 1:
+            # Un dossier de livre entier a été ajouté ou déplacé : tous ses éléments sont à vérifier
+            # (les simples modifications du dossier du livre sont déjà signalées au niveau de ses éléments)
+            if event_type not in ('created', 'moved'):
+                return
+            changed_items = self._scan_items([relative_parts[0]])
+        else:
+            item_path = os.path.join(self.root_dir, relative_parts[0], relative_parts[1])
+            if not self.is_watched_item(relative_parts[0], relative_parts[1], os.path.isdir(item_path)):
+                return
+            changed_items = {item_path}
+        with self._lock:
+            self._dirty_paths.update(changed_items)
+        self._wake_up.set()
+
+    # --- Mémorise l'état actuel de la bibliothèque (déjà traitée par le premier passage) et démarre la surveillance ---
+    # Retourne le mode de surveillance utilisé ('watchdog' ou 'polling').
+    def start(self):
+        self._known_contents = {item_path: content_signature(item_path) for item_path in self._scan_items()}
+        self._polled_contents = dict(self._known_contents)
+
+        self.backend = BACKEND_POLLING
+        if self.requested_backend != BACKEND_POLLING and Observer is not None:
+            try:
+                self._observer = Observer()
+                self._observer.schedule(_LibraryEventHandler(self), self.root_dir, recursive=True)
+                self._observer.start()
+                self.backend = BACKEND_WATCHDOG
+            except OSError:
+                # Limite de surveillances inotify atteinte, système de fichiers réseau... : on scrute périodiquement
+                self._observer = None
+        return self.backend
+
+    def stop(self):
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+
+    # --- Scrutation : éléments nouveaux ou dont le contenu a changé depuis le passage précédent ---
+    # (la date d'un dossier ne change pas quand une image existante est réécrite : on compare donc le contenu)
+    def _poll_changed_items(self):
+        current_contents = {item_path: content_signature(item_path) for item_path in self._scan_items()}
+        changed_items = {item_path for item_path, signature in current_contents.items()
+                         if self._polled_contents.get(item_path) != signature}
+        for removed_item_path in set(self._polled_contents) - set(current_contents):
+            self._known_contents.pop(removed_item_path, None)
+        self._polled_contents = current_contents
+        return changed_items
+
+    # --- Attend au plus poll_interval_seconds et retourne les éléments nouveaux ou modifiés dont le contenu est stable ---
+    def wait_for_stable_items(self):
+        timeout = self.poll_interval_seconds
+        if self._pending:
+            timeout = min(timeout, self.debounce_seconds)
+        if self.backend == BACKEND_WATCHDOG:
+            self._wake_up.wait(timeout)
+            self._wake_up.clear()
+            with self._lock:
+                changed_items = self._dirty_paths
+                self._dirty_paths = set()
+        else:
+            time.sleep(timeout)
+            changed_items = self._poll_changed_items()
+
+        now = time.monotonic()
+        for item_path in changed_items:
+            if item_path not in self._pending:
+                self._pending[item_path] = (content_signature(item_path), now)
+
+        stable_items = []
+        for item_path, (signature, changed_at) in list(self._pending.items()):
+            current_signature = content_signature(item_path)
+            if current_signature is None:
+                # L'élément a été supprimé (ou renommé) avant d'être stable
+                del self._pending[item_path]
+                self._known_contents.pop(item_path, None)
+            elif current_signature != signature:
+                self._pending[item_path] = (current_signature, now)
+            elif now - changed_at >= self.debounce_seconds:
+                del self._pending[item_path]
+                if current_signature and current_signature != self._known_contents.get(item_path):
+                    self._known_contents[item_path] = current_signature
+                    stable_items.append(item_path)
+        return sorted(stable_items)
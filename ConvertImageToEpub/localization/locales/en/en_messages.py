@@ -2,10 +2,13 @@
 ORCHESTRATOR_START = "--- Starting Book Processing Orchestrator (PARALLELIZED) ---"
 GLOBAL_BOOKS_ROOT_DIR_MSG = "Global book directory: {}"
 MAX_CONCURRENT_CHAPTER_UNITS_MSG = "Chapter units processed in parallel: {}"
+PRIORITY_BOOKS_MSG = "Priority books (processed first): {}"
 LOADING_RESUME_POINTS = "Loading resume points for {} books."
 BOOK_MARKED_AS_PROCESSED = "  Book '{}': Marked as ENTIRELY PROCESSED."
-LAST_PROCESSED_CHAPTER = "  Book '{}': Last chapter processed '{}'"
+BOOK_COMPLETED_CHAPTERS_COUNT = "  Book '{}': {} chapter(s) already processed"
 PROGRESS_FILE_CORRUPTED = "WARNING: The progress file '{}' is corrupted or empty. Restarting from scratch for all books."
+PROGRESS_FILE_IMPORTED = "Imported the resume points of {} books from the old progress file '{}' into the state database '{}'."
+CRITICAL_ERROR_SAVE_PROGRESS = "CRITICAL ERROR: unable to save the progress in '{}': {}"
 NO_RESUME_POINT_FOUND = "No resume point found. Starting full processing."
 IGNORED_NON_DIRECTORY = "IGNORED (non-directory root item): '{}'."
 IGNORED_EXCLUDED_DIR = "IGNORED: The directory '{}' is excluded by name."
@@ -14,15 +17,13 @@ START_DETECTION_BOOK = "Starting detection for book/folder: {}"
 BOOK_FOLDER_PATH = "Book folder path: {}"
 IGNORED_SYSTEM_SUBFOLDER = "  IGNORED (system or excluded subfolder): '{}'"
 IGNORED_NON_CBZ_FILE = "  IGNORED (non-CBZ file in book folder): '{}'"
-CBZ_DETECTED = "  Detected a CBZ file in the book folder: '{}'. Attempting extraction..."
-CBZ_EXTRACTED = "  CBZ '{}' extracted and its folder added to the processing list."
+CBZ_DETECTED = "  Extracting the CBZ file of the chapter: '{}'..."
+CBZ_EXTRACTED = "  CBZ '{}' extracted."
 CBZ_EXTRACTION_FAILED = "  FAILED to extract CBZ '{}'. This chapter will be ignored."
+CBZ_QUEUED = "  Detected a CBZ file in the book folder: '{}'. It will be read when its chapter is processed."
 NO_CHAPTER_UNIT_FOUND = "NO chapter unit (folder or CBZ) found for the book: '{}'."
-RESUME_POINT_DETECTED = "  Resume point detected for '{}': '{}'."
-RESUMING_AFTER_CHAPTER = "    Resuming AFTER chapter '{}'."
+RESUME_COMPLETED_CHAPTERS = "  Resume for '{}': {} of {} chapter(s) already processed. Only the missing chapters are submitted."
 IGNORED_ALREADY_PROCESSED = "    IGNORED (already processed): '{}'."
-RESUME_POINT_NOT_FOUND = "WARNING: The last processed chapter '{}' was not found in the current list of chapters for '{}'. Resuming from the first unprocessed chapter (if it exists)."
-RESUME_POINT_NOT_FOUND_NO_MORE = "WARNING: Resume point '{}' not found and no more chapters to process. Book potentially incomplete."
 ALL_CHAPTERS_ALREADY_PROCESSED = "  All chapters of '{}' have already been processed or no new chapters to submit."
 SUBMITTING_CHAPTERS = "Submitting {} chapter units for '{}' to the processing pool..."
 ALL_TASKS_SUBMITTED = "--- All chapter processing tasks submitted. Waiting for completion... ---"
@@ -40,14 +41,21 @@ CLEANED_FILES_FOUND = "{} Cleaned file(s) already present in '{}'. Skipping full
 PROCESSING_SKIPPED_CLEANED = "{} Chapter unit processing skipped (cleaned file already present)."
 RAW_OCR_FOUND_RESUME = "{} Raw OCR file(s) already present in '{}'. Resuming from the cleaning step."
 STOP_CLEAN_FAIL = "{} Stopping due to text cleaning failure."
+STOP_STREAM_FAIL = "{} Stopping due to in-memory processing (split -> OCR -> clean) failure."
 PROCESSING_RESUMED_CLEANING = "{} Chapter unit processing finished (resuming from cleaning)."
 NO_OUTPUT_FOUND = "{} No output file found. Starting full processing."
+SPLIT_ALREADY_DONE_RESUME = "{} Image splitting already finished (segments still present in '{}'). Resuming from the OCR step."
 STOP_SPLIT_FAIL = "{} Stopping due to image splitting failure."
+STOP_CBZ_EXTRACTION_FAIL = "{} Stopping due to CBZ extraction failure."
+CBZ_CHANGED_REPROCESS = "The CBZ file '{}' of book '{}' has changed since it was processed. The chapter will be processed again."
 STOP_OCR_FAIL = "{} Stopping due to OCR failure."
 PROCESSING_FINISHED = "{} Chapter unit processing finished."
 EXECUTING_SCRIPT = "--- Executing {} for '{}' ---"
 SCRIPT_OUTPUT = "  Output from {}:\n{}"
 SCRIPT_WARNING = "  Error/Warning from {}:\n{}"
+SCRIPT_OUTPUT_LINE = "  [{}] {}"
+SCRIPT_WARNING_LINE = "  [{}] Error/Warning: {}"
+STAGE_DURATION = "  {} finished for {} in {:.2f}s"
 SCRIPT_SUCCESS = "--- {} finished successfully. ---"
 SCRIPT_FAILED = "!!! ERROR: {} failed for '{}' !!!"
 SCRIPT_NOT_FOUND = "!!! CRITICAL ERROR: {} not found !!!"
@@ -59,10 +67,53 @@ FOLDER_NOT_FOUND = "    Folder '{}' not found, no cleanup needed."
 CLEANUP_FINISHED_FOR = "  Cleanup finished for '{}'."
 START_COLLECTING_FINAL_TXT = "--- Starting collection of final TXT files for book: {} ---"
 COPIED_TO_FINAL_FOLDER = "    Copied '{}' from '{}' to the final folder."
+MOVED_TO_FINAL_FOLDER = "    Moved '{}' from '{}' to the final folder."
 ERROR_COPYING_FILE = "    ERROR while copying '{}': {}"
 CLEANED_TXT_FOLDER_NOT_FOUND = "    Folder '{}' not found for '{}'."
 FINAL_TXT_COLLECTION_FINISHED = "--- Collection of {} final TXT files finished for book: {} ---"
 BOOK_COMPLETE_PROCESSING_MSG = "Complete processing of book: {}"
+STAGE_WORKERS_STARTED = "Persistent stage workers started: {} processes (split / OCR / clean run without a new Python interpreter per chapter)."
+OCR_CACHE_RUN_STATS = "OCR cache: {} hit(s), {} miss(es) during this run."
+BLANK_SEGMENTS_RUN_STATS = "{} segment(s) without text skipped before OCR during this run."
+OCR_CACHE_EVICTED = "OCR cache: {} old result(s) deleted to stay under the maximum size."
+METRICS_REPORT_WRITTEN = "Run metrics written to '{}'."
+METRICS_WRITE_FAILED = "Could not write the run metrics to '{}': {}"
+PROFILING_ENABLED = "Profiling mode ({}): one profile per stage and per chapter in '{}'"
+PROFILER_UNAVAILABLE = "Profiler '{}' unavailable (it needs STAGE_EXECUTION_MODE = 'subprocess' and the py-spy command): '{}' is used instead."
+PROFILE_SUMMARY_WRITTEN = "Hottest functions of the stage written: '{}'"
+PROFILE_SUMMARY_FAILED = "Could not summarize the profiles of '{}': {}"
+SLOWEST_CHAPTERS_HEADER = "--- {} slowest chapters of the run ---"
+SLOWEST_CHAPTER_LINE = "  {}. '{}' / '{}' : {:.2f}s (image {})"
+DISTRIBUTED_MODE_STARTED = "Distributed mode: node '{}', chapter leases in '{}' (taken over after {}s without renewal)."
+LEASE_CHAPTER_DONE_ELSEWHERE = "Chapter '{}' of '{}' was already processed by another node."
+LEASE_CHAPTER_BUSY = "Chapter '{}' of '{}' is being processed by another node: retry in {}s."
+LEASE_RECLAIMED = "Lease of chapter '{}' of '{}' taken over from the unresponsive node '{}'."
+LEASE_BOOK_DONE_ELSEWHERE = "Book '{}' was already post-processed by another node."
+LEASE_BOOK_BUSY = "Book '{}' is being post-processed by another node."
+LEASE_ERROR = "Lease of chapter '{}' of '{}' unavailable: {}"
+MEMORY_BUDGET_MSG = "Memory budget for the concurrent chapters: {:.0f} MB (estimated from the image headers)."
+MEMORY_BUDGET_STATS = "Memory budget: high-water mark {:.0f} MB of {:.0f} MB, {} of {} chapters waited for memory, {} chapters larger than the whole budget (run alone)."
+STAGE_TIMED_OUT = "!!! ERROR: {} exceeded its time limit of {} s for '{}': the process and its child processes were killed !!!"
+CHAPTER_RETRY_SCHEDULED = "Chapter '{}' of '{}' failed (attempt {} of {}): new attempt in {:.0f} s."
+STAGE_INTERRUPTED_BY_WORKER_RESTART = "{} was interrupted for '{}': the worker pool was stopped after another chapter exceeded its time limit."
+CHAPTER_RETRY_NOT_COUNTED = "Chapter '{}' of '{}' was interrupted by a worker pool restart: new attempt, not counted as a failure."
+CHAPTER_QUARANTINED = "Chapter '{}' of '{}' failed {} times: quarantined. The next runs will skip it (python orchestrator.py --retry-quarantined to try it again)."
+CHAPTER_QUARANTINED_DETAILS = "Chapter quarantined after {} failed attempts (see the previous errors of this chapter)."
+QUARANTINED_CHAPTER_SKIPPED = "Chapter '{}' of '{}' is quarantined after repeated failures: skipped (--retry-quarantined to try it again)."
+QUARANTINE_RELEASED = "{} quarantined chapter(s) released: they will be processed again."
+QUARANTINE_SUMMARY = "{} chapter(s) quarantined during this run: {}"
+ORCHESTRATOR_DESCRIPTION = "Converts the chapter images of every book under GLOBAL_BOOKS_ROOT_DIR into cleaned text files."
+WATCH_HELP = "After the first pass, keep watching the library and process new or modified chapters / .cbz files as soon as they are copied (stop with Ctrl+C)."
+PRIORITY_BOOK_HELP = "Name of a book folder to process before the others (can be repeated). Added to PRIORITY_BOOKS in config.py."
+PROFILE_HELP = "Profile each stage of each chapter (.pstats files and a summary of the hottest functions per stage in PROFILE_OUTPUT_DIR)."
+SLOWEST_CHAPTERS_HELP = "Log the N slowest chapters of the run with their image dimensions (overrides SLOWEST_CHAPTERS_LOG_COUNT)."
+DISTRIBUTED_HELP = "Share the library with the orchestrators of other machines through lease files in LEASE_DIR (STATE_DB_PATH must stay local to each machine)."
+RETRY_QUARANTINED_HELP = "Release the chapters quarantined by the previous runs (failed CHAPTER_MAX_ATTEMPTS times) so they are processed again."
+WATCH_MODE_STARTED = "--- Watch mode: watching '{}' ({}), a new chapter is processed once unchanged for {} s. Press Ctrl+C to stop. ---"
+WATCH_ITEM_DETECTED = "Watch mode: new or modified item '{}' in book '{}'."
+WATCH_CHAPTER_CHANGED = "Watch mode: chapter '{}' of book '{}' was already processed and has changed, it will be processed again."
+WATCH_CHANGED_WHILE_RUNNING = "Watch mode: '{}' (book '{}') changed while being processed, it will be processed again afterwards."
+WATCH_MODE_STOPPING = "--- Watch mode stopping: waiting for {} chapter(s) in progress... ---"
 # Messages for cleanup_script.py
 START_CLEANUP_SCRIPT = "--- Starting cleanup script ---"
 ROOT_DIR_TO_CLEAN = "Root directory to clean: {}"
@@ -84,7 +135,6 @@ DELETING_UNZIPPED_FOLDER = "    Deleting _unzipped folder: {}"
 # Messages for extract_cbz.py
 EXTRACTION_FOLDER_EXISTS = "  Extraction folder '{}' already exists. Deleting existing content for re-extraction."
 EXTRACTING_CBZ = "  Extracting '{}' to '{}'..."
-RENAMED_FOR_COMPATIBILITY = "    Renamed '{}' to '1.png' for compatibility."
 EXTRACTION_FINISHED = "  Extraction of '{}' finished."
 CBZ_CORRUPTED = "The CBZ file is corrupted or invalid."
 UNEXPECTED_EXTRACTION_ERROR = "Unexpected error during extraction: {}"
@@ -100,9 +150,15 @@ PREVIOUS_LOG_DELETED = "Previous log file '{}' deleted."
 START_SPLITTING = "Starting splitting/preparation for unit: {}"
 IMAGES_WILL_BE_SAVED_IN = "Split images will be saved in: {}"
 MAX_HEIGHT_ALLOWED = "Maximum allowed height: {} pixels"
-TARGET_FILE_NOT_FOUND = "The target file '{}' with a supported extension was not found in the chapter unit. Extensions searched: {}"
 IMAGE_MANAGEABLE_SIZE = "  Image '{}' has a manageable size ({}x{}). Copying without splitting."
 IMAGE_TOO_LARGE = "  Image '{}' is too large ({}x{}). Splitting into segments..."
+CHAPTER_IMAGES_NOT_FOUND = "No image with a supported extension was found in the chapter unit. Extensions searched: {}"
+CHAPTER_PAGES_FOUND = "  {} page(s) found in the chapter unit, {} processed at the same time."
+CHAPTER_PAGES_FAILED = "{} of {} page(s) could not be processed: the chapter fails so that it is retried, instead of being completed with missing pages."
+CHAPTER_SEGMENTS_FAILED = "{} of {} segment(s) could not be read by OCR: the chapter text is not written so that the chapter is retried."
+SEGMENT_TARGET_HEIGHT_INFO = "Target segment height: {} pixels"
+NO_BLANK_ROW_NEAR_CUT = "    No blank row near row {}: cut at row {}, the row with the least text."
+READING_IMAGE_FROM_CBZ = "  Reading image '{}' directly from the archive '{}'..."
 SAVED_SEGMENT = "    Saved: {}"
 SPLITTING_FINISHED = "  Splitting finished: {} segments created for '{}'."
 ERROR_DURING_PROCESSING = "Error during processing: {}"
@@ -137,9 +193,85 @@ NO_PNG_FILES_FOUND = "No PNG files found in the folder '{}' (after excluding _or
 OCR_SUCCESS = "    OCR successful on segment: {}"
 TESSERACT_NOT_FOUND = "Tesseract is not found. Make sure it is installed and its path is configured correctly."
 CRITICAL_TESSERACT_ERROR = "Tesseract not found. Stopping processing for this chapter."
+OCR_ENGINE_UNAVAILABLE = "OCR engine '{}' unavailable: {}. Check OCR_ENGINE in config.py."
+CRITICAL_OCR_ENGINE_ERROR = "OCR engine unavailable. Stopping processing for this chapter."
 UNEXPECTED_PROCESSING_ERROR = "Unexpected error during processing: {}"
 OCR_SEGMENT_ERROR = "OCR Error on this segment: {}"
+OCR_SEGMENT_TIMEOUT = "Tesseract exceeded its time limit of {} s on this segment and was killed"
 CHAPTER_NUMBER_NOT_FOUND = "Chapter number not found at the beginning of unit '{}'. The file name will be based on the full unit name."
 PROCESSING_COMPLETE = "  Complete processing of unit '{}' -> '{}'"
 OCR_FINISHED = "--- OCR processing for '{}' finished ---"
-CHECK_LOG_FOR_ERRORS = "Check the file '{}' for errors."
\ No newline at end of file
+OCR_CACHE_HIT = "    OCR result found in cache for segment: {}"
+OCR_SEGMENT_PREPROCESSED = "  Segment '{}' prepared: skew {:.2f}°, x-height {} px, scale {:.3f} ({:.2f}s)."
+SEGMENT_SKIPPED_NO_TEXT = "    No text found in segment {} ({}), skipped without OCR."
+SEGMENT_NO_TEXT_BLANK = "blank"
+SEGMENT_NO_TEXT_THIN_LINES = "only rules or thin lines"
+SEGMENT_NO_TEXT_NO_GLYPHS = "no text-like line"
+BLANK_SEGMENTS_CHAPTER_STATS = "    {} segment(s) without text skipped before OCR for this chapter."
+OCR_CACHE_CHAPTER_STATS = "    OCR cache: {} hit(s), {} miss(es) for this chapter."
+CHECK_LOG_FOR_ERRORS = "Check the file '{}' for errors."
+# Messages for stream_pipeline.py
+STREAM_SCRIPT_DESCRIPTION = "Script to split, OCR and clean a SINGLE chapter unit in memory (only the cleaned text is written)."
+STREAM_START = "Starting in-memory processing (split -> OCR -> clean) for unit: {}"
+STREAM_TEXT_SAVED = "  Cleaned text of unit '{}' saved: '{}'"
+STREAM_NO_SEGMENT = "No segment could be read from the pages of the chapter unit: no text written."
+STREAM_FINISHED = "--- In-memory processing for '{}' finished ---"
+# Messages for benchmarks/run_benchmarks.py
+BENCHMARK_DESCRIPTION = "Reproducible benchmarks of the pipeline stages on synthetic text images."
+BENCHMARK_LABEL_HELP = "Label added to the result file name (e.g. the name of the change being measured)."
+BENCHMARK_STAGES_HELP = "Comma-separated stages to measure, among: {}."
+BENCHMARK_HEIGHTS_HELP = "Comma-separated heights (pixels) of the synthetic chapter images."
+BENCHMARK_WIDTH_HELP = "Width (pixels) of the synthetic images."
+BENCHMARK_DENSITY_HELP = "Text density: lines of text per 1000 pixels of height."
+BENCHMARK_BOOKS_HELP = "Number of books in the end-to-end synthetic library."
+BENCHMARK_CHAPTERS_HELP = "Number of chapters per book (end-to-end library and EPUB stage)."
+BENCHMARK_CBZ_RATIO_HELP = "Share of the chapters delivered as .cbz files in the synthetic library (0 to 1)."
+BENCHMARK_REPEAT_HELP = "Number of measurements per stage; the median is reported."
+BENCHMARK_SEED_HELP = "Seed of the synthetic text generator (same seed = same images)."
+BENCHMARK_OCR_BACKEND_HELP = "OCR engine: 'fake' (no Tesseract, deterministic text), 'tesseract' (one process per segment) or 'tesserocr' (Tesseract loaded once per worker)."
+BENCHMARK_FAKE_OCR_COST_HELP = "Simulated cost of the fake OCR engine, in milliseconds per megapixel."
+BENCHMARK_REAL_CALIBRE_HELP = "Run the real Calibre commands in the EPUB stage instead of simulating them."
+BENCHMARK_RESULTS_DIR_HELP = "Folder where the JSON results are saved."
+BENCHMARK_COMPARE_HELP = "Result file to compare against (default: the most recent result in the results folder)."
+BENCHMARK_THRESHOLD_HELP = "Median change (in %) beyond which a stage is reported as slower or faster."
+BENCHMARK_UNKNOWN_STAGES = "Unknown stages: {}"
+BENCHMARK_START = "Benchmarking stages {} (OCR engine: {}) in the temporary folder '{}'..."
+BENCHMARK_RESULT_LINE = "  {:<10} {:>8} : median {:.4f}s, min {:.4f}s, pages/s {}, MP/s {}"
+BENCHMARK_RESULT_SAVED = "Results saved: '{}'"
+BENCHMARK_COMPARING = "Comparison with '{}' (label: {}, commit: {}):"
+BENCHMARK_COMPARISON_LINE = "  {:<10} {:>8} : {:.4f}s -> {:.4f}s ({:+.1f}%) {}"
+BENCHMARK_SLOWER = "SLOWER"
+BENCHMARK_FASTER = "FASTER"
+# Messages for calibrate_segment_height.py
+CALIBRATION_DESCRIPTION = "Measures the Tesseract time per megapixel for several segment heights and saves the fastest one for split_large_images.py."
+CALIBRATION_IMAGE_HELP = "Chapter image, .cbz file or chapter unit folder to measure (can be repeated; use a few typical chapters)."
+CALIBRATION_HEIGHTS_HELP = "Comma-separated segment heights (pixels) to measure (default: SEGMENT_HEIGHT_CANDIDATES)."
+CALIBRATION_MAX_ROWS_HELP = "Number of rows measured from the top of each image."
+CALIBRATION_OUTPUT_HELP = "JSON file where the result is saved (default: SEGMENT_HEIGHT_CALIBRATION_PATH)."
+CALIBRATION_NO_VALID_HEIGHT = "No segment height between 1 and MAX_IMAGE_HEIGHT ({})."
+CALIBRATION_IMAGE_NOT_FOUND = "Image not found: '{}'"
+CALIBRATION_MEASURING = "Measuring '{}' ({}x{})..."
+CALIBRATION_RESULT_LINE = "  height {:>6} : {:.2f}s, {:.3f}s per megapixel"
+CALIBRATION_NOTHING_MEASURED = "No image could be measured."
+CALIBRATION_BEST_HEIGHT = "Fastest segment height: {} pixels ({:.3f}s per megapixel)."
+CALIBRATION_SAVED = "Calibration saved: '{}'"
+
+# Messages for evaluate_ocr_preprocessing.py
+PREPROCESS_EVAL_DESCRIPTION = "Measures the OCR time and accuracy of a book's pages without and with each OCR preprocessing setting, and suggests the settings for OCR_PREPROCESSING_BY_BOOK."
+PREPROCESS_EVAL_IMAGE_HELP = "Chapter image, .cbz file or chapter unit folder of the book (can be repeated)."
+PREPROCESS_EVAL_REFERENCE_HELP = "Corrected text of the pages of the matching --image, in the same order (optional, can be repeated). Set --max-rows high enough to measure whole pages. Without it, the mean Tesseract confidence is used as accuracy."
+PREPROCESS_EVAL_BINARIZATIONS_HELP = "Comma-separated binarisation methods to try (none, otsu, adaptive)."
+PREPROCESS_EVAL_DESKEW_HELP = "Comma-separated deskew modes to try (on, off)."
+PREPROCESS_EVAL_X_HEIGHTS_HELP = "Comma-separated target x-heights in pixels to try (0 = no rescaling)."
+PREPROCESS_EVAL_MAX_ROWS_HELP = "Maximum number of rows measured per page."
+PREPROCESS_EVAL_BOOK_HELP = "Book folder name used for the report and the suggested settings (default: parent folder of the first --image)."
+PREPROCESS_EVAL_OUTPUT_HELP = "JSON report file (default: ocr_preprocessing_<book>.json in SCRIPTS_DIR)."
+PREPROCESS_EVAL_INVALID_BINARIZATION = "Unknown binarisation method(s): {}. Available methods: {}"
+PREPROCESS_EVAL_REFERENCE_COUNT_MISMATCH = "{} --reference file(s) for {} --image: give one reference per image or none."
+PREPROCESS_EVAL_IMAGE_NOT_FOUND = "Image not found, ignored: '{}'"
+PREPROCESS_EVAL_NOTHING_MEASURED = "No image could be measured."
+PREPROCESS_EVAL_BASELINE = "no preprocessing"
+PREPROCESS_EVAL_MEASURING = "Measuring: {}..."
+PREPROCESS_EVAL_RESULT_LINE = "  {:.2f}s (time {:+.1f}%), mean confidence {:.1f}, word accuracy {}"
+PREPROCESS_EVAL_SUGGESTED = "Suggested settings: {} (time {:+.1f}%, accuracy measured by {}). Line for config.py:"
+PREPROCESS_EVAL_SAVED = "Report saved: '{}'"
\ No newline at end of file
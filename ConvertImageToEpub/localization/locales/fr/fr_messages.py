@@ -2,10 +2,13 @@
 ORCHESTRATOR_START = "--- Démarrage de l'Orchestrateur de traitement de livres (PARALLELISE) ---"
 GLOBAL_BOOKS_ROOT_DIR_MSG = "Répertoire global des livres : {}"
 MAX_CONCURRENT_CHAPTER_UNITS_MSG = "Unités de chapitre traitées en parallèle : {}"
+PRIORITY_BOOKS_MSG = "Livres prioritaires (traités en premier) : {}"
 LOADING_RESUME_POINTS = "Chargement des points de reprise pour {} livres."
 BOOK_MARKED_AS_PROCESSED = "  Livre '{}': Marqué comme ENTIÈREMENT TRAITÉ."
-LAST_PROCESSED_CHAPTER = "  Livre '{}': Dernier chapitre traité '{}'"
+BOOK_COMPLETED_CHAPTERS_COUNT = "  Livre '{}' : {} chapitre(s) déjà traité(s)"
 PROGRESS_FILE_CORRUPTED = "AVERTISSEMENT: Le fichier de progression '{}' est corrompu ou vide. Reprise à zéro pour tous les livres."
+PROGRESS_FILE_IMPORTED = "Points de reprise de {} livres importés depuis l'ancien fichier de progression '{}' dans la base d'état '{}'."
+CRITICAL_ERROR_SAVE_PROGRESS = "ERREUR CRITIQUE : impossible d'enregistrer la progression dans '{}' : {}"
 NO_RESUME_POINT_FOUND = "Aucun point de reprise trouvé. Démarrage complet du traitement."
 IGNORED_NON_DIRECTORY = "IGNORÉ (élément racine non-répertoire) : '{}'."
 IGNORED_EXCLUDED_DIR = "IGNORÉ : Le répertoire '{}' est exclu par nom."
@@ -14,15 +17,13 @@ START_DETECTION_BOOK = "Début de la détection pour le livre/dossier : {}"
 BOOK_FOLDER_PATH = "Chemin du dossier du livre : {}"
 IGNORED_SYSTEM_SUBFOLDER = "  IGNORÉ (sous-dossier de système ou exclu) : '{}'"
 IGNORED_NON_CBZ_FILE = "  IGNORÉ (fichier non CBZ dans dossier livre) : '{}'"
-CBZ_DETECTED = "  Détecté un fichier CBZ dans le dossier livre : '{}'. Tentative d'extraction..."
-CBZ_EXTRACTED = "  CBZ '{}' extrait et son dossier ajouté à la liste de traitement."
+CBZ_DETECTED = "  Extraction du fichier CBZ du chapitre : '{}'..."
+CBZ_EXTRACTED = "  CBZ '{}' extrait."
 CBZ_EXTRACTION_FAILED = "  ÉCHEC d'extraction du CBZ '{}'. Ce chapitre sera ignoré."
+CBZ_QUEUED = "  Fichier CBZ détecté dans le dossier du livre : '{}'. Il sera lu au moment du traitement de son chapitre."
 NO_CHAPTER_UNIT_FOUND = "AUCUNE unité de chapitre (dossier ou CBZ) trouvée pour le livre : '{}'."
-RESUME_POINT_DETECTED = "  Point de reprise détecté pour '{}': '{}'."
-RESUMING_AFTER_CHAPTER = "    Reprise APRES le chapitre '{}'."
+RESUME_COMPLETED_CHAPTERS = "  Reprise pour '{}' : {} chapitre(s) sur {} déjà traité(s). Seuls les chapitres manquants sont soumis."
 IGNORED_ALREADY_PROCESSED = "    IGNORÉ (déjà traité) : '{}'."
-RESUME_POINT_NOT_FOUND = "AVERTISSEMENT : Le dernier chapitre traité '{}' n'a pas été trouvé dans la liste actuelle des chapitres de '{}'. Reprise à partir du premier chapitre non traité (si existant)."
-RESUME_POINT_NOT_FOUND_NO_MORE = "AVERTISSEMENT : Point de reprise '{}' non trouvé et plus de chapitres à traiter. Livre potentiellement incomplet."
 ALL_CHAPTERS_ALREADY_PROCESSED = "  Tous les chapitres de '{}' ont déjà été traités ou aucun nouveau chapitre à soumettre."
 SUBMITTING_CHAPTERS = "Soumission de {} unités de chapitre pour '{}' au pool de traitement..."
 ALL_TASKS_SUBMITTED = "--- Toutes les tâches de traitement de chapitre soumises. Attente de la complétion... ---"
@@ -40,14 +41,21 @@ CLEANED_FILES_FOUND = "{} Fichier(s) nettoyé(s) déjà présent(s) dans '{}'. S
 PROCESSING_SKIPPED_CLEANED = "{} Traitement de l'unité de chapitre ignoré (fichier nettoyé déjà présent)."
 RAW_OCR_FOUND_RESUME = "{} Fichier(s) OCR brut(s) déjà présent(s) dans '{}'. Reprise à partir de l'étape de nettoyage."
 STOP_CLEAN_FAIL = "{} Arrêt suite à l'échec du nettoyage du texte."
+STOP_STREAM_FAIL = "{} Arrêt suite à l'échec du traitement en mémoire (découpe -> OCR -> nettoyage)."
 PROCESSING_RESUMED_CLEANING = "{} Traitement de l'unité de chapitre terminé (reprise du nettoyage)."
 NO_OUTPUT_FOUND = "{} Aucun fichier de sortie trouvé. Démarrage du traitement complet."
+SPLIT_ALREADY_DONE_RESUME = "{} Découpe des images déjà terminée (segments toujours présents dans '{}'). Reprise à l'étape OCR."
 STOP_SPLIT_FAIL = "{} Arrêt suite à l'échec de la division des images."
+STOP_CBZ_EXTRACTION_FAIL = "{} Arrêt suite à l'échec de l'extraction du CBZ."
+CBZ_CHANGED_REPROCESS = "Le fichier CBZ '{}' du livre '{}' a changé depuis son traitement. Le chapitre va être retraité."
 STOP_OCR_FAIL = "{} Arrêt suite à l'échec de l'OCR."
 PROCESSING_FINISHED = "{} Traitement de l'unité de chapitre terminé."
 EXECUTING_SCRIPT = "--- Exécution de {} pour '{}' ---"
 SCRIPT_OUTPUT = "  Sortie de {}:\n{}"
 SCRIPT_WARNING = "  Erreur/Avertissement de {}:\n{}"
+SCRIPT_OUTPUT_LINE = "  [{}] {}"
+SCRIPT_WARNING_LINE = "  [{}] Erreur/Avertissement : {}"
+STAGE_DURATION = "  {} terminé pour {} en {:.2f}s"
 SCRIPT_SUCCESS = "--- {} terminé avec succès. ---"
 SCRIPT_FAILED = "!!! ERREUR : {} a échoué pour '{}' !!!"
 SCRIPT_NOT_FOUND = "!!! ERREUR CRITIQUE : {} introuvable !!!"
@@ -59,10 +67,53 @@ FOLDER_NOT_FOUND = "    Dossier '{}' non trouvé, pas de nettoyage nécessaire."
 CLEANUP_FINISHED_FOR = "  Nettoyage terminé pour '{}'."
 START_COLLECTING_FINAL_TXT = "--- Début de la collecte des fichiers TXT finaux pour le livre : {} ---"
 COPIED_TO_FINAL_FOLDER = "    Copié '{}' de '{}' vers le dossier final."
+MOVED_TO_FINAL_FOLDER = "    Déplacé '{}' de '{}' vers le dossier final."
 ERROR_COPYING_FILE = "    ERREUR lors de la copie de '{}': {}"
 CLEANED_TXT_FOLDER_NOT_FOUND = "    Dossier '{}' non trouvé pour '{}'."
 FINAL_TXT_COLLECTION_FINISHED = "--- Collecte de {} fichiers TXT finaux terminée pour le livre : {} ---"
 BOOK_COMPLETE_PROCESSING_MSG = "Traitement complet du livre : {}"
+STAGE_WORKERS_STARTED = "Workers persistants des étapes démarrés : {} processus (split / OCR / clean sans nouvel interpréteur Python par chapitre)."
+OCR_CACHE_RUN_STATS = "Cache OCR : {} segment(s) trouvé(s), {} segment(s) absent(s) pendant cette exécution."
+BLANK_SEGMENTS_RUN_STATS = "{} segment(s) sans texte ignoré(s) avant l'OCR pendant cette exécution."
+OCR_CACHE_EVICTED = "Cache OCR : {} ancien(s) résultat(s) supprimé(s) pour rester sous la taille maximale."
+METRICS_REPORT_WRITTEN = "Mesures de l'exécution écrites dans '{}'."
+METRICS_WRITE_FAILED = "Impossible d'écrire les mesures de l'exécution dans '{}' : {}"
+PROFILING_ENABLED = "Mode profilage ({}) : un profil par étape et par chapitre dans '{}'"
+PROFILER_UNAVAILABLE = "Profileur '{}' indisponible (il faut STAGE_EXECUTION_MODE = 'subprocess' et la commande py-spy) : '{}' est utilisé à la place."
+PROFILE_SUMMARY_WRITTEN = "Fonctions les plus coûteuses de l'étape écrites : '{}'"
+PROFILE_SUMMARY_FAILED = "Impossible de résumer les profils de '{}' : {}"
+SLOWEST_CHAPTERS_HEADER = "--- Les {} chapitres les plus lents de l'exécution ---"
+SLOWEST_CHAPTER_LINE = "  {}. '{}' / '{}' : {:.2f}s (image {})"
+DISTRIBUTED_MODE_STARTED = "Mode distribué : nœud '{}', baux des chapitres dans '{}' (repris après {}s sans renouvellement)."
+LEASE_CHAPTER_DONE_ELSEWHERE = "Le chapitre '{}' de '{}' a déjà été traité par un autre nœud."
+LEASE_CHAPTER_BUSY = "Le chapitre '{}' de '{}' est en cours de traitement sur un autre nœud : nouvel essai dans {}s."
+LEASE_RECLAIMED = "Bail du chapitre '{}' de '{}' repris au nœud '{}', qui ne répond plus."
+LEASE_BOOK_DONE_ELSEWHERE = "Le livre '{}' a déjà été post-traité par un autre nœud."
+LEASE_BOOK_BUSY = "Le livre '{}' est en cours de post-traitement sur un autre nœud."
+LEASE_ERROR = "Bail du chapitre '{}' de '{}' indisponible : {}"
+MEMORY_BUDGET_MSG = "Budget de mémoire des chapitres simultanés : {:.0f} Mo (estimé d'après les en-têtes des images)."
+MEMORY_BUDGET_STATS = "Budget de mémoire : plus haut niveau {:.0f} Mo sur {:.0f} Mo, {} chapitres sur {} ont attendu de la mémoire, {} chapitres plus gros que tout le budget (exécutés seuls)."
+STAGE_TIMED_OUT = "!!! ERREUR : {} a dépassé sa durée maximale de {} s pour '{}' : le processus et ses processus enfants ont été tués !!!"
+CHAPTER_RETRY_SCHEDULED = "Le chapitre '{}' de '{}' a échoué (essai {} sur {}) : nouvel essai dans {:.0f} s."
+STAGE_INTERRUPTED_BY_WORKER_RESTART = "{} a été interrompu pour '{}' : le pool de workers a été arrêté après le dépassement de délai d'un autre chapitre."
+CHAPTER_RETRY_NOT_COUNTED = "Le chapitre '{}' de '{}' a été interrompu par le redémarrage du pool de workers : nouvel essai, non compté comme un échec."
+CHAPTER_QUARANTINED = "Le chapitre '{}' de '{}' a échoué {} fois : mis en quarantaine. Les prochaines exécutions le sauteront (python orchestrator.py --retry-quarantined pour le réessayer)."
+CHAPTER_QUARANTINED_DETAILS = "Chapitre mis en quarantaine après {} essais échoués (voir les erreurs précédentes de ce chapitre)."
+QUARANTINED_CHAPTER_SKIPPED = "Le chapitre '{}' de '{}' est en quarantaine après des échecs répétés : ignoré (--retry-quarantined pour le réessayer)."
+QUARANTINE_RELEASED = "{} chapitre(s) sorti(s) de la quarantaine : ils seront retraités."
+QUARANTINE_SUMMARY = "{} chapitre(s) mis en quarantaine pendant cette exécution : {}"
+ORCHESTRATOR_DESCRIPTION = "Convertit les images des chapitres de chaque livre de GLOBAL_BOOKS_ROOT_DIR en fichiers texte nettoyés."
+WATCH_HELP = "Après le premier passage, continue à surveiller la bibliothèque et traite les chapitres / fichiers .cbz nouveaux ou modifiés dès la fin de leur copie (arrêt avec Ctrl+C)."
+PRIORITY_BOOK_HELP = "Nom d'un dossier de livre à traiter avant les autres (option répétable). S'ajoute à PRIORITY_BOOKS dans config.py."
+PROFILE_HELP = "Profiler chaque étape de chaque chapitre (fichiers .pstats et résumé des fonctions les plus coûteuses par étape dans PROFILE_OUTPUT_DIR)."
+SLOWEST_CHAPTERS_HELP = "Journaliser les N chapitres les plus lents de l'exécution avec les dimensions de leur image (remplace SLOWEST_CHAPTERS_LOG_COUNT)."
+DISTRIBUTED_HELP = "Partager la bibliothèque avec les orchestrateurs d'autres machines grâce à des baux dans LEASE_DIR (STATE_DB_PATH doit rester local à chaque machine)."
+RETRY_QUARANTINED_HELP = "Sortir de la quarantaine les chapitres des exécutions précédentes (échoués CHAPTER_MAX_ATTEMPTS fois) pour qu'ils soient retraités."
+WATCH_MODE_STARTED = "--- Mode watch : surveillance de '{}' ({}), un nouveau chapitre est traité après {} s sans modification. Ctrl+C pour arrêter. ---"
+WATCH_ITEM_DETECTED = "Mode watch : élément nouveau ou modifié '{}' dans le livre '{}'."
+WATCH_CHAPTER_CHANGED = "Mode watch : le chapitre '{}' du livre '{}' était déjà traité et a changé, il sera retraité."
+WATCH_CHANGED_WHILE_RUNNING = "Mode watch : '{}' (livre '{}') a changé pendant son traitement, il sera retraité ensuite."
+WATCH_MODE_STOPPING = "--- Arrêt du mode watch : attente de {} chapitre(s) en cours... ---"
 # Messages pour cleanup_script.py
 START_CLEANUP_SCRIPT = "--- Démarrage du script de nettoyage ---"
 ROOT_DIR_TO_CLEAN = "Répertoire racine à nettoyer : {}"
@@ -84,7 +135,6 @@ DELETING_UNZIPPED_FOLDER = "    Suppression du dossier _unzipped : {}"
 # Messages pour extract_cbz.py
 EXTRACTION_FOLDER_EXISTS = "  Dossier d'extraction '{}' existe déjà. Suppression du contenu existant pour réextraction."
 EXTRACTING_CBZ = "  Extraction de '{}' vers '{}'..."
-RENAMED_FOR_COMPATIBILITY = "    Renommé '{}' en '1.png' pour la compatibilité."
 EXTRACTION_FINISHED = "  Extraction de '{}' terminée."
 CBZ_CORRUPTED = "Le fichier CBZ est corrompu ou invalide."
 UNEXPECTED_EXTRACTION_ERROR = "Erreur inattendue lors de l'extraction : {}"
@@ -100,9 +150,15 @@ PREVIOUS_LOG_DELETED = "Fichier de log '{}' précédent supprimé."
 START_SPLITTING = "Démarrage de la division/préparation de l'unité : {}"
 IMAGES_WILL_BE_SAVED_IN = "Les images divisées seront sauvegardées dans : {}"
 MAX_HEIGHT_ALLOWED = "Hauteur maximale autorisée : {} pixels"
-TARGET_FILE_NOT_FOUND = "Le fichier cible '{}' avec une extension supportée n'a pas été trouvé dans l'unité de chapitre. Extensions cherchées : {}"
 IMAGE_MANAGEABLE_SIZE = "  Image '{}' est de taille gérable ({}x{}). Copie sans division."
 IMAGE_TOO_LARGE = "  Image '{}' est trop grande ({}x{}). Division en segments..."
+CHAPTER_IMAGES_NOT_FOUND = "Aucune image avec une extension supportée n'a été trouvée dans l'unité de chapitre. Extensions cherchées : {}"
+CHAPTER_PAGES_FOUND = "  {} page(s) trouvée(s) dans l'unité de chapitre, {} traitée(s) en même temps."
+CHAPTER_PAGES_FAILED = "{} page(s) sur {} n'ont pas pu être traitée(s) : le chapitre échoue pour être réessayé, au lieu d'être terminé avec des pages manquantes."
+CHAPTER_SEGMENTS_FAILED = "{} segment(s) sur {} n'ont pas pu être lu(s) par l'OCR : le texte du chapitre n'est pas écrit pour que le chapitre soit réessayé."
+SEGMENT_TARGET_HEIGHT_INFO = "Hauteur visée des segments : {} pixels"
+NO_BLANK_ROW_NEAR_CUT = "    Aucune ligne vide près de la ligne {} : coupe à la ligne {}, la moins chargée en texte."
+READING_IMAGE_FROM_CBZ = "  Lecture de l'image '{}' directement dans l'archive '{}'..."
 SAVED_SEGMENT = "    Sauvegardé : {}"
 SPLITTING_FINISHED = "  Division terminée : {} segments créés pour '{}'."
 ERROR_DURING_PROCESSING = "Erreur lors du traitement : {}"
@@ -137,9 +193,85 @@ NO_PNG_FILES_FOUND = "Aucun fichier PNG trouvé dans le dossier '{}' (après exc
 OCR_SUCCESS = "    OCR réussi sur le segment : {}"
 TESSERACT_NOT_FOUND = "Tesseract n'est pas trouvé. Assurez-vous qu'il est installé et que son chemin est correctement configuré."
 CRITICAL_TESSERACT_ERROR = "Tesseract non trouvé. Arrêt du traitement pour ce chapitre."
+OCR_ENGINE_UNAVAILABLE = "Moteur OCR '{}' indisponible : {}. Vérifiez OCR_ENGINE dans config.py."
+CRITICAL_OCR_ENGINE_ERROR = "Moteur OCR indisponible. Arrêt du traitement pour ce chapitre."
 UNEXPECTED_PROCESSING_ERROR = "Erreur inattendue lors du traitement : {}"
 OCR_SEGMENT_ERROR = "Erreur OCR sur ce segment : {}"
+OCR_SEGMENT_TIMEOUT = "Tesseract a dépassé sa durée maximale de {} s sur ce segment et a été tué"
 CHAPTER_NUMBER_NOT_FOUND = "Numéro de chapitre non trouvé au début de l'unité '{}'. Le nom du fichier sera basé sur l'unité complète."
 PROCESSING_COMPLETE = "  Traitement complet de l'unité '{}' -> '{}'"
 OCR_FINISHED = "--- Traitement OCR pour '{}' terminé ---"
-CHECK_LOG_FOR_ERRORS = "Vérifiez le fichier '{}' pour les erreurs."
\ No newline at end of file
+OCR_CACHE_HIT = "    Résultat OCR trouvé dans le cache pour le segment : {}"
+OCR_SEGMENT_PREPROCESSED = "  Segment '{}' préparé : inclinaison {:.2f}°, hauteur des minuscules {} px, échelle {:.3f} ({:.2f}s)."
+SEGMENT_SKIPPED_NO_TEXT = "    Aucun texte trouvé dans le segment {} ({}), ignoré sans OCR."
+SEGMENT_NO_TEXT_BLANK = "vide"
+SEGMENT_NO_TEXT_THIN_LINES = "uniquement des filets ou des traits fins"
+SEGMENT_NO_TEXT_NO_GLYPHS = "aucune ligne semblable à du texte"
+BLANK_SEGMENTS_CHAPTER_STATS = "    {} segment(s) sans texte ignoré(s) avant l'OCR pour ce chapitre."
+OCR_CACHE_CHAPTER_STATS = "    Cache OCR : {} trouvé(s), {} absent(s) pour ce chapitre."
+CHECK_LOG_FOR_ERRORS = "Vérifiez le fichier '{}' pour les erreurs."
+# Messages pour stream_pipeline.py
+STREAM_SCRIPT_DESCRIPTION = "Script pour découper, OCRiser et nettoyer UNE SEULE unité de chapitre en mémoire (seul le texte nettoyé est écrit)."
+STREAM_START = "Début du traitement en mémoire (découpe -> OCR -> nettoyage) pour l'unité : {}"
+STREAM_TEXT_SAVED = "  Texte nettoyé de l'unité '{}' enregistré : '{}'"
+STREAM_NO_SEGMENT = "Aucun segment n'a pu être lu dans les pages de l'unité de chapitre : aucun texte écrit."
+STREAM_FINISHED = "--- Traitement en mémoire pour '{}' terminé ---"
+# Messages pour benchmarks/run_benchmarks.py
+BENCHMARK_DESCRIPTION = "Benchmarks reproductibles des étapes du pipeline sur des images de texte synthétiques."
+BENCHMARK_LABEL_HELP = "Libellé ajouté au nom du fichier de résultats (ex. : le nom de la modification mesurée)."
+BENCHMARK_STAGES_HELP = "Étapes à mesurer, séparées par des virgules, parmi : {}."
+BENCHMARK_HEIGHTS_HELP = "Hauteurs (pixels) des images de chapitre synthétiques, séparées par des virgules."
+BENCHMARK_WIDTH_HELP = "Largeur (pixels) des images synthétiques."
+BENCHMARK_DENSITY_HELP = "Densité du texte : lignes de texte pour 1000 pixels de hauteur."
+BENCHMARK_BOOKS_HELP = "Nombre de livres de la bibliothèque synthétique de bout en bout."
+BENCHMARK_CHAPTERS_HELP = "Nombre de chapitres par livre (bibliothèque de bout en bout et étape EPUB)."
+BENCHMARK_CBZ_RATIO_HELP = "Part des chapitres livrés en fichiers .cbz dans la bibliothèque synthétique (0 à 1)."
+BENCHMARK_REPEAT_HELP = "Nombre de mesures par étape ; la médiane est retenue."
+BENCHMARK_SEED_HELP = "Graine du générateur de texte synthétique (même graine = mêmes images)."
+BENCHMARK_OCR_BACKEND_HELP = "Moteur OCR : 'fake' (sans Tesseract, texte déterministe), 'tesseract' (un processus par segment) ou 'tesserocr' (Tesseract chargé une fois par worker)."
+BENCHMARK_FAKE_OCR_COST_HELP = "Coût simulé du faux moteur OCR, en millisecondes par mégapixel."
+BENCHMARK_REAL_CALIBRE_HELP = "Exécuter les vraies commandes Calibre dans l'étape EPUB au lieu de les simuler."
+BENCHMARK_RESULTS_DIR_HELP = "Dossier où les résultats JSON sont enregistrés."
+BENCHMARK_COMPARE_HELP = "Fichier de résultats de référence (par défaut : le résultat le plus récent du dossier)."
+BENCHMARK_THRESHOLD_HELP = "Écart de médiane (en %) au-delà duquel une étape est signalée plus lente ou plus rapide."
+BENCHMARK_UNKNOWN_STAGES = "Étapes inconnues : {}"
+BENCHMARK_START = "Mesure des étapes {} (moteur OCR : {}) dans le dossier temporaire '{}'..."
+BENCHMARK_RESULT_LINE = "  {:<10} {:>8} : médiane {:.4f}s, min {:.4f}s, pages/s {}, MP/s {}"
+BENCHMARK_RESULT_SAVED = "Résultats enregistrés : '{}'"
+BENCHMARK_COMPARING = "Comparaison avec '{}' (libellé : {}, commit : {}) :"
+BENCHMARK_COMPARISON_LINE = "  {:<10} {:>8} : {:.4f}s -> {:.4f}s ({:+.1f}%) {}"
+BENCHMARK_SLOWER = "PLUS LENT"
+BENCHMARK_FASTER = "PLUS RAPIDE"
+# Messages pour calibrate_segment_height.py
+CALIBRATION_DESCRIPTION = "Mesure le temps de Tesseract par mégapixel pour plusieurs hauteurs de segment et enregistre la plus rapide pour split_large_images.py."
+CALIBRATION_IMAGE_HELP = "Image de chapitre, fichier .cbz ou dossier d'unité de chapitre à mesurer (répétable ; utiliser quelques chapitres typiques)."
+CALIBRATION_HEIGHTS_HELP = "Hauteurs de segment (pixels) à mesurer, séparées par des virgules (défaut : SEGMENT_HEIGHT_CANDIDATES)."
+CALIBRATION_MAX_ROWS_HELP = "Nombre de lignes mesurées depuis le haut de chaque image."
+CALIBRATION_OUTPUT_HELP = "Fichier JSON où le résultat est enregistré (défaut : SEGMENT_HEIGHT_CALIBRATION_PATH)."
+CALIBRATION_NO_VALID_HEIGHT = "Aucune hauteur de segment entre 1 et MAX_IMAGE_HEIGHT ({})."
+CALIBRATION_IMAGE_NOT_FOUND = "Image introuvable : '{}'"
+CALIBRATION_MEASURING = "Mesure de '{}' ({}x{})..."
+CALIBRATION_RESULT_LINE = "  hauteur {:>6} : {:.2f}s, {:.3f}s par mégapixel"
+CALIBRATION_NOTHING_MEASURED = "Aucune image n'a pu être mesurée."
+CALIBRATION_BEST_HEIGHT = "Hauteur de segment la plus rapide : {} pixels ({:.3f}s par mégapixel)."
+CALIBRATION_SAVED = "Calibration enregistrée : '{}'"
+
+# Messages for evaluate_ocr_preprocessing.py
+PREPROCESS_EVAL_DESCRIPTION = "Mesure la durée et la précision de l'OCR des pages d'un livre sans préparation puis avec chaque réglage de préparation, et conseille les réglages pour OCR_PREPROCESSING_BY_BOOK."
+PREPROCESS_EVAL_IMAGE_HELP = "Image de chapitre, fichier .cbz ou dossier d'unité de chapitre du livre (répétable)."
+PREPROCESS_EVAL_REFERENCE_HELP = "Texte corrigé des pages de l'--image correspondante, dans le même ordre (optionnel, répétable). Prévoir un --max-rows suffisant pour mesurer les pages entières. Sans lui, la confiance moyenne de Tesseract sert de précision."
+PREPROCESS_EVAL_BINARIZATIONS_HELP = "Méthodes de binarisation à essayer, séparées par des virgules (none, otsu, adaptive)."
+PREPROCESS_EVAL_DESKEW_HELP = "Modes de redressement à essayer, séparés par des virgules (on, off)."
+PREPROCESS_EVAL_X_HEIGHTS_HELP = "Hauteurs des minuscules visées en pixels, séparées par des virgules (0 = pas de mise à l'échelle)."
+PREPROCESS_EVAL_MAX_ROWS_HELP = "Nombre maximal de lignes mesurées par page."
+PREPROCESS_EVAL_BOOK_HELP = "Nom du dossier du livre utilisé pour le rapport et les réglages conseillés (par défaut : dossier parent de la première --image)."
+PREPROCESS_EVAL_OUTPUT_HELP = "Fichier du rapport JSON (par défaut : ocr_preprocessing_<livre>.json dans SCRIPTS_DIR)."
+PREPROCESS_EVAL_INVALID_BINARIZATION = "Méthode(s) de binarisation inconnue(s) : {}. Méthodes disponibles : {}"
+PREPROCESS_EVAL_REFERENCE_COUNT_MISMATCH = "{} fichier(s) --reference pour {} --image : donner une référence par image ou aucune."
+PREPROCESS_EVAL_IMAGE_NOT_FOUND = "Image introuvable, ignorée : '{}'"
+PREPROCESS_EVAL_NOTHING_MEASURED = "Aucune image n'a pu être mesurée."
+PREPROCESS_EVAL_BASELINE = "sans préparation"
+PREPROCESS_EVAL_MEASURING = "Mesure : {}..."
+PREPROCESS_EVAL_RESULT_LINE = "  {:.2f}s (durée {:+.1f}%), confiance moyenne {:.1f}, précision des mots {}"
+PREPROCESS_EVAL_SUGGESTED = "Réglages conseillés : {} (durée {:+.1f}%, précision mesurée par {}). Ligne pour config.py :"
+PREPROCESS_EVAL_SAVED = "Rapport enregistré : '{}'"
\ No newline at end of file
@@ -0,0 +1,126 @@
+import os
+import sys
+import json
+import queue
+import threading
+import time
+
+# --- Écrivain de logs unique, alimenté par une file ---
+# Les threads workers déposent leurs lignes dans la file et repartent aussitôt ; un seul thread en arrière-plan
+# garde les fichiers ouverts, écrit les lignes par lots, les affiche dans la console et vide les tampons
+# au plus toutes les LOG_FLUSH_INTERVAL_SECONDS. Optionnellement, chaque ligne est aussi écrite
+# comme événement JSON (une ligne JSON par événement) pour être exploitée par un programme.
+
+MAX_BATCH_SIZE = 1000
+
+_queue = None
+_thread = None
+_jsonl_file_path = None
+_flush_interval = 1.0
+_STOP = object()
+
+def is_running():
+    return _thread is not None
+
+# --- Démarre le thread d'écriture (jsonl_file_path vide ou None = pas de sortie JSONL) ---
+def start_log_sink(jsonl_file_path=None, flush_interval=1.0):
+    global _queue, _thread, _jsonl_file_path, _flush_interval
+    if _thread is not None:
+        return
+    _jsonl_file_path = jsonl_file_path or None
+    _flush_interval = flush_interval
+    _queue = queue.Queue()
+    _thread = threading.Thread(target=_writer_loop, name="log_sink", daemon=True)
+    _thread.start()
+
+# --- Arrête le thread d'écriture après avoir écrit toutes les lignes en attente ---
+def stop_log_sink():
+    global _queue, _thread
+    if _thread is None:
+        return
+    _queue.put(_STOP)
+    _thread.join()
+    _queue = None
+    _thread = None
+
+# --- Dépose une ligne de log (et son événement structuré) ; écrit directement si le thread n'est pas démarré ---
+def submit(log_file_path, line, console_line=None, event=None):
+    if _thread is not None:
+        _queue.put((log_file_path, line, console_line, event))
+        return
+    os.makedirs(os.path.dirname(log_file_path), exist_ok=True)
+    with open(log_file_path, 'a', encoding='utf-8') as f:
+        f.write(line + '\n')
+    if console_line is not None:
+        print(console_line)
+
+def _open_file(open_files, path):
+    f = open_files.get(path)
+    if f is None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        f = open(path, 'a', encoding='utf-8')
+        open_files[path] = f
+    return f
+
+def _write_batch(open_files, batch):
+    console_lines = []
+    for log_file_path, line, console_line, event in batch:
+        try:
+            _open_file(open_files, log_file_path).write(line + '\n')
+            if event is not None and _jsonl_file_path:
+                _open_file(open_files, _jsonl_file_path).write(json.dumps(event, ensure_ascii=False) + '\n')
+        except OSError as e:
+            console_lines.append(f"[log_sink] {log_file_path}: {e}")
+        if console_line is not None:
+            console_lines.append(console_line)
+    if console_lines:
+        print('\n'.join(console_lines))
+
+def _flush_all(open_files):
+    for f in open_files.values():
+        f.flush()
+    sys.stdout.flush()
+
+def _writer_loop():
+    open_files = {}
+    last_flush = time.monotonic()
+    stopping = False
+    try:
+        while True:
+            batch = []
+            if not stopping:
+                try:
+                    first_item = _queue.get(timeout=_flush_interval)
+                    if first_item is _STOP:
+                        stopping = True
+                    else:
+                        batch.append(first_item)
+                except queue.Empty:
+                    pass
+
+            # Vide ce qui est déjà en attente pour écrire un lot entier d'un coup
+            while len(batch) < MAX_BATCH_SIZE:
+                try:
+                    item = _queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                else:
+                    batch.append(item)
+
+            if batch:
+                _write_batch(open_files, batch)
+
+            now = time.monotonic()
+            if stopping and not batch:
+                _flush_all(open_files)
+                break
+            if now - last_flush >= _flush_interval:
+                _flush_all(open_files)
+                last_flush = now
+    finally:
+        for f in open_files.values():
+            f.close()
@@ -0,0 +1,156 @@
+import os
+import sys
+import time
+import ctypes
+import itertools
+import threading
+import contextlib
+
+# --- Contrôle d'admission des chapitres selon un budget de mémoire vive ---
+# MAX_CONCURRENT_CHAPTER_UNITS limite le nombre de chapitres, pas leur taille : quatre captures de 980x60000 pixels
+# décodées en même temps peuvent saturer la mémoire. Chaque tâche de chapitre réserve ici son pic de mémoire estimé
+# (calculé d'après l'en-tête de l'image, sans la décoder) avant de démarrer, et attend tant que le total réservé
+# dépasserait le budget. Les chapitres sont admis dans leur ordre d'arrivée (un gros chapitre n'est pas doublé
+# indéfiniment par des petits) ; un chapitre plus gros que tout le budget est admis seul.
+
+# Octets par pixel d'une image décodée par Pillow (les modes RGB / RGBA / I / F... occupent 4 octets par pixel)
+BYTES_PER_PIXEL_BY_MODE = {'1': 1, 'L': 1, 'P': 1, 'I;16': 2, 'I;16B': 2, 'I;16L': 2}
+DEFAULT_BYTES_PER_PIXEL = 4
+# Mémoire de Tesseract (processus séparé) par pixel du segment analysé : image binarisée, seuils, composants connexes...
+TESSERACT_BYTES_PER_PIXEL = 8
+# Mémoire fixe d'une tâche de chapitre (tampons de décodage et d'encodage PNG, texte, objets Python)
+CHAPTER_UNIT_OVERHEAD_BYTES = 32 * 1024 * 1024
+# Part de la mémoire physique utilisée comme budget quand MEMORY_BUDGET_MB = 0
+AUTO_BUDGET_FRACTION = 0.5
+
+_lock = threading.Condition()
+_budget_bytes = None
+_in_use_bytes = 0
+_high_water_bytes = 0
+_admitted_count = 0
+_waited_count = 0
+_oversized_count = 0
+_tickets = itertools.count()
+_next_ticket = 0
+
+def is_enabled():
+    return _budget_bytes is not None
+
+# --- Pic de mémoire estimé du traitement d'une page, d'après les dimensions et le mode de son image ---
+# Lignes décodées en même temps (toute l'image, sauf lecture par bandes) + copie en niveaux de gris (modes autres que
+# L / RGB) + segment découpé + Tesseract sur ce segment.
+def estimate_page_peak_memory(image_size, image_mode, decoded_height, max_segment_height):
+    width, height = image_size
+    bytes_per_pixel = BYTES_PER_PIXEL_BY_MODE.get(image_mode, DEFAULT_BYTES_PER_PIXEL)
+    decoded_bytes = width * decoded_height * bytes_per_pixel
+    segment_height = min(height, max_segment_height)
+    if image_mode not in ('L', 'RGB'):
+        # Une image qui tient dans un segment est convertie en entier, sinon chaque segment est converti séparément
+        converted_bytes = width * segment_height
+        bytes_per_pixel = 1
+    else:
+        converted_bytes = 0
+    segment_bytes = width * segment_height * bytes_per_pixel if height > max_segment_height else 0
+    tesseract_bytes = width * segment_height * TESSERACT_BYTES_PER_PIXEL
+    return decoded_bytes + converted_bytes + segment_bytes + tesseract_bytes
+
+# --- Pic de mémoire estimé d'une unité de chapitre, d'après les en-têtes de ses pages ---
+# page_headers : [((largeur, hauteur), mode, lignes décodées en même temps)] ; parallel_pages pages sont traitées à la
+# fois : au pire, ce sont les plus grosses.
+def estimate_chapter_unit_peak_memory(page_headers, max_segment_height, parallel_pages=1):
+    page_peaks = sorted((estimate_page_peak_memory(*page_header, max_segment_height) for page_header in page_headers), reverse=True)
+    return sum(page_peaks[:max(1, parallel_pages)]) + CHAPTER_UNIT_OVERHEAD_BYTES
+
+# --- Mémoire physique de la machine en octets, None si elle ne peut pas être lue ---
+def detect_physical_memory():
+    if sys.platform == 'win32':
+        class MEMORYSTATUSEX(ctypes.Structure):
+            _fields_ = [('dwLength', ctypes.c_ulong), ('dwMemoryLoad', ctypes.c_ulong),
+                        ('ullTotalPhys', ctypes.c_ulonglong), ('ullAvailPhys', ctypes.c_ulonglong),
+                        ('ullTotalPageFile', ctypes.c_ulonglong), ('ullAvailPageFile', ctypes.c_ulonglong),
+                        ('ullTotalVirtual', ctypes.c_ulonglong), ('ullAvailVirtual', ctypes.c_ulonglong),
+                        ('ullAvailExtendedVirtual', ctypes.c_ulonglong)]
+        memory_status = MEMORYSTATUSEX()
+        memory_status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(memory_status)):
+            return memory_status.ullTotalPhys
+        return None
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (ValueError, OSError, AttributeError):
+        return None
+
+# --- Budget en octets d'après MEMORY_BUDGET_MB : > 0 = valeur fixe, 0 = part de la mémoire physique, < 0 = pas de budget ---
+def resolve_budget_bytes(budget_mb):
+    if budget_mb > 0:
+        return int(budget_mb * 1024 * 1024)
+    if budget_mb == 0:
+        physical_memory = detect_physical_memory()
+        if physical_memory:
+            return int(physical_memory * AUTO_BUDGET_FRACTION)
+    return None
+
+def start(budget_bytes):
+    global _budget_bytes, _in_use_bytes, _high_water_bytes, _admitted_count, _waited_count, _oversized_count, _tickets, _next_ticket
+    with _lock:
+        _budget_bytes = budget_bytes
+        _in_use_bytes = 0
+        _high_water_bytes = 0
+        _admitted_count = 0
+        _waited_count = 0
+        _oversized_count = 0
+        _tickets = itertools.count()
+        _next_ticket = 0
+
+def stop():
+    global _budget_bytes
+    with _lock:
+        _budget_bytes = None
+        _lock.notify_all()
+
+# --- Réserve estimated_bytes le temps du bloc : with reserve(octets) as attente_en_secondes: ... ---
+# Sans budget, le bloc s'exécute aussitôt (attente de 0 s).
+@contextlib.contextmanager
+def reserve(estimated_bytes):
+    global _in_use_bytes, _high_water_bytes, _admitted_count, _waited_count, _oversized_count, _next_ticket
+    start_time = time.monotonic()
+    with _lock:
+        if _budget_bytes is None:
+            reserved_bytes = 0
+        else:
+            ticket = next(_tickets)
+            waited = False
+            # Premier arrivé, premier admis : on attend son tour, puis que la réservation tienne dans le budget
+            while _budget_bytes is not None and (ticket != _next_ticket or
+                                                 (_in_use_bytes and _in_use_bytes + estimated_bytes > _budget_bytes)):
+                waited = True
+                _lock.wait()
+            _next_ticket += 1
+            _lock.notify_all()
+            reserved_bytes = estimated_bytes
+            _in_use_bytes += reserved_bytes
+            _high_water_bytes = max(_high_water_bytes, _in_use_bytes)
+            _admitted_count += 1
+            if waited:
+                _waited_count += 1
+            if _budget_bytes is not None and estimated_bytes > _budget_bytes:
+                _oversized_count += 1
+    try:
+        yield time.monotonic() - start_time
+    finally:
+        if reserved_bytes:
+            with _lock:
+                _in_use_bytes -= reserved_bytes
+                _lock.notify_all()
+
+# --- État du budget : budget, mémoire réservée, plus haut niveau atteint, chapitres admis / ayant attendu / trop gros ---
+def get_stats():
+    with _lock:
+        return {
+            'budget_bytes': _budget_bytes,
+            'in_use_bytes': _in_use_bytes,
+            'high_water_bytes': _high_water_bytes,
+            'admitted_count': _admitted_count,
+            'waited_count': _waited_count,
+            'oversized_count': _oversized_count,
+        }
@@ -0,0 +1,99 @@
+import os
+import hashlib
+import threading
+import config
+
+# --- Cache disque des résultats OCR, adressé par le contenu ---
+# Clé = hash des pixels du segment + langue OCR + configuration Tesseract.
+# Un segment dont les pixels n'ont pas changé (relance après crash, cleanup_script.py, ré-extraction d'un CBZ...)
+# n'est donc jamais ré-OCRisé. La taille du cache est bornée : les entrées les moins récemment utilisées sont supprimées.
+OCR_CACHE_ENABLED = config.OCR_CACHE_ENABLED
+OCR_CACHE_DIR = config.OCR_CACHE_DIR
+OCR_CACHE_MAX_SIZE_BYTES = config.OCR_CACHE_MAX_SIZE_MB * 1024 * 1024
+
+# Nombre d'écritures entre deux vérifications de la taille du cache (par processus)
+EVICTION_CHECK_INTERVAL = 200
+
+_stores_since_eviction_check = 0
+# Les pages d'un chapitre sont traitées par plusieurs threads (PAGE_WORKER_THREADS) : un seul à la fois compte et fait l'éviction
+_eviction_lock = threading.Lock()
+
+def compute_cache_key(img, language, tesseract_config):
+    digest = hashlib.sha256()
+    digest.update(f"{img.mode}|{img.size[0]}x{img.size[1]}|{language}|{tesseract_config}|".encode('utf-8'))
+    digest.update(img.tobytes())
+    return digest.hexdigest()
+
+def _entry_path(cache_key):
+    return os.path.join(OCR_CACHE_DIR, cache_key[:2], f"{cache_key}.txt")
+
+# --- Retourne le texte en cache, ou None si absent ---
+def lookup(cache_key):
+    entry_path = _entry_path(cache_key)
+    try:
+        with open(entry_path, 'r', encoding='utf-8') as f:
+            text = f.read()
+    except (FileNotFoundError, OSError):
+        return None
+    try:
+        # Marque l'entrée comme récemment utilisée (éviction LRU sur la date de modification)
+        os.utime(entry_path, None)
+    except OSError:
+        pass
+    return text
+
+# --- Enregistre un résultat OCR (écriture atomique, plusieurs workers et plusieurs pages d'un chapitre peuvent écrire en même temps) ---
+def store(cache_key, text):
+    global _stores_since_eviction_check
+    entry_path = _entry_path(cache_key)
+    temp_path = f"{entry_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(temp_path, entry_path)
+    except OSError:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return
+
+    with _eviction_lock:
+        _stores_since_eviction_check += 1
+        if _stores_since_eviction_check >= EVICTION_CHECK_INTERVAL:
+            _stores_since_eviction_check = 0
+            enforce_size_limit()
+
+# --- Supprime les entrées les plus anciennes tant que le cache dépasse sa taille maximale ---
+# Retourne le nombre d'entrées supprimées.
+def enforce_size_limit():
+    if not os.path.isdir(OCR_CACHE_DIR):
+        return 0
+
+    entries = []
+    total_size = 0
+    for shard in os.scandir(OCR_CACHE_DIR):
+        if not shard.is_dir():
+            continue
+        for entry in os.scandir(shard.path):
+            if not entry.name.endswith('.txt'):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total_size += stat.st_size
+
+    evicted_count = 0
+    if total_size > OCR_CACHE_MAX_SIZE_BYTES:
+        entries.sort()
+        for _mtime, size, path in entries:
+            if total_size <= OCR_CACHE_MAX_SIZE_BYTES:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_size -= size
+            evicted_count += 1
+    return evicted_count
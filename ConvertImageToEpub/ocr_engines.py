@@ -0,0 +1,134 @@
+import time
+import zlib
+import shlex
+import threading
+import contextlib
+import pytesseract
+
+# tesserocr (API C++ de Tesseract dans le processus Python) est optionnel : il n'est nécessaire qu'avec OCR_ENGINE = 'tesserocr'
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+# --- Moteurs OCR interchangeables (OCR_ENGINE dans config.py) ---
+# Chaque moteur expose image_to_string(image, lang, tesseract_config, timeout) et cache_signature, ajoutée à la clé du
+# cache OCR (ocr_cache.py) pour que deux moteurs ne partagent pas leurs résultats.
+#   'pytesseract' : un processus tesseract par segment ; l'image passe par un fichier temporaire et le modèle
+#                   (traineddata) est rechargé à chaque appel.
+#   'tesserocr'   : Tesseract chargé une fois dans chaque processus worker ; les pixels lui sont passés directement
+#                   depuis la mémoire (SetImageBytes), sans fichier temporaire ni nouveau processus.
+#   'fake'        : texte déterministe calculé à partir des pixels, sans Tesseract (benchmarks, essais du pipeline).
+
+ENGINE_PYTESSERACT = 'pytesseract'
+ENGINE_TESSEROCR = 'tesserocr'
+ENGINE_FAKE = 'fake'
+OCR_ENGINES = (ENGINE_PYTESSERACT, ENGINE_TESSEROCR, ENGINE_FAKE)
+
+# --- Moteur demandé impossible à utiliser (module absent, langue ou modèle introuvable) : le chapitre s'arrête ---
+class OCREngineUnavailableError(Exception):
+    pass
+
+# --- Options de TESSERACT_CONFIG utiles à l'API : (psm, oem, dpi, {variable: valeur} des options -c) ---
+def parse_tesseract_config(tesseract_config):
+    psm, oem, dpi, variables = None, None, None, {}
+    arguments = shlex.split(tesseract_config or '')
+    for index, argument in enumerate(arguments[:-1]):
+        value = arguments[index + 1]
+        if argument == '--psm':
+            psm = int(value)
+        elif argument == '--oem':
+            oem = int(value)
+        elif argument == '--dpi':
+            dpi = int(value)
+        elif argument == '-c' and '=' in value:
+            name, variable_value = value.split('=', 1)
+            variables[name] = variable_value
+    return psm, oem, dpi, variables
+
+class PytesseractEngine:
+    name = ENGINE_PYTESSERACT
+    # Signature vide : les résultats déjà en cache restent valables
+    cache_signature = ''
+
+    def image_to_string(self, img, lang, tesseract_config, timeout=0):
+        return pytesseract.image_to_string(img, lang=lang, config=tesseract_config, timeout=timeout)
+
+class TesserocrEngine:
+    name = ENGINE_TESSEROCR
+    cache_signature = f':engine={ENGINE_TESSEROCR}'
+
+    def __init__(self):
+        if tesserocr is None:
+            raise OCREngineUnavailableError("tesserocr (pip install tesserocr)")
+        # Une instance de l'API ne traite qu'une image à la fois : les instances libres sont gardées par
+        # (langue, options) et réutilisées d'un segment et d'un chapitre à l'autre, quel que soit le thread.
+        self._idle_apis = {}
+        self._lock = threading.Lock()
+
+    def _create_api(self, lang, tesseract_config):
+        psm, oem, _dpi, variables = parse_tesseract_config(tesseract_config)
+        api_options = {'lang': lang}
+        if psm is not None:
+            api_options['psm'] = psm
+        if oem is not None:
+            api_options['oem'] = oem
+        try:
+            api = tesserocr.PyTessBaseAPI(**api_options)
+        except RuntimeError as e:
+            raise OCREngineUnavailableError(f"tesserocr ({lang}): {e}")
+        for name, value in variables.items():
+            api.SetVariable(name, value)
+        return api
+
+    @contextlib.contextmanager
+    def _acquire_api(self, lang, tesseract_config):
+        key = (lang, tesseract_config)
+        with self._lock:
+            idle_apis = self._idle_apis.setdefault(key, [])
+            api = idle_apis.pop() if idle_apis else None
+        if api is None:
+            api = self._create_api(lang, tesseract_config)
+        try:
+            yield api
+        finally:
+            api.Clear()
+            with self._lock:
+                self._idle_apis[key].append(api)
+
+    # timeout n'est pas appliqué (l'API ne peut pas être interrompue) : TIMEOUT_SECONDS_BY_STAGE arrête le worker bloqué
+    def image_to_string(self, img, lang, tesseract_config, timeout=0):
+        if img.mode not in ('L', 'RGB'):
+            img = img.convert('RGB' if img.mode in ('RGBA', 'P', 'CMYK') else 'L')
+        bytes_per_pixel = 1 if img.mode == 'L' else 3
+        _psm, _oem, dpi, _variables = parse_tesseract_config(tesseract_config)
+        with self._acquire_api(lang, tesseract_config) as api:
+            api.SetImageBytes(img.tobytes(), img.width, img.height, bytes_per_pixel, img.width * bytes_per_pixel)
+            if dpi:
+                api.SetSourceResolution(dpi)
+            return api.GetUTF8Text()
+
+class FakeEngine:
+    name = ENGINE_FAKE
+    cache_signature = f':engine={ENGINE_FAKE}'
+
+    # ms_per_megapixel : coût simulé, proportionnel à la taille du segment
+    def __init__(self, ms_per_megapixel=0.0):
+        self.ms_per_megapixel = ms_per_megapixel
+
+    def image_to_string(self, img, lang, tesseract_config, timeout=0):
+        width, height = img.size
+        if self.ms_per_megapixel:
+            time.sleep(width * height / 1e6 * self.ms_per_megapixel / 1000)
+        checksum = zlib.crc32(img.tobytes()[:65536])
+        return f"Fake OCR text for a {width}x{height} segment ({checksum:08x}).\n"
+
+# --- Crée le moteur OCR demandé (OCR_ENGINES) ; lève ValueError pour un nom inconnu ---
+def create_engine(engine_name, fake_ms_per_megapixel=0.0):
+    if engine_name == ENGINE_PYTESSERACT:
+        return PytesseractEngine()
+    if engine_name == ENGINE_TESSEROCR:
+        return TesserocrEngine()
+    if engine_name == ENGINE_FAKE:
+        return FakeEngine(fake_ms_per_megapixel)
+    raise ValueError(engine_name)
@@ -0,0 +1,155 @@
+import os
+import numpy as np
+from PIL import Image, ImageFilter
+import config
+
+# --- Préparation des segments avant Tesseract (optionnelle, OCR_PREPROCESSING) ---
+# Tesseract binarise lui-même chaque image et travaille mieux sur un texte dont la hauteur des minuscules (x-height)
+# reste modérée : une capture en couleur à gros caractères lui coûte du temps sans gain de précision.
+# Chaque segment est ici, avec des opérations NumPy vectorisées :
+#   1. redressé si ses lignes penchent (profil de projection sur des angles de ±OCR_PREPROCESS_MAX_SKEW_DEGREES) ;
+#   2. réduit si son texte dépasse OCR_PREPROCESS_TARGET_X_HEIGHT (jamais agrandi) : 24 pixels correspondent à un
+#      texte de 10 à 12 points à 300 dpi, la résolution annoncée à Tesseract par TESSERACT_CONFIG ;
+#   3. binarisé (Otsu ou seuil adaptatif), texte noir sur fond blanc, même pour un fond sombre.
+# L'effet sur la durée et la précision se mesure livre par livre avec evaluate_ocr_preprocessing.py.
+
+# Réglages par défaut (remplacés livre par livre par OCR_PREPROCESSING_BY_BOOK)
+DEFAULT_SETTINGS = {
+    'enabled': config.OCR_PREPROCESSING,
+    'binarization': config.OCR_PREPROCESS_BINARIZATION,
+    'deskew': config.OCR_PREPROCESS_DESKEW,
+    'target_x_height': config.OCR_PREPROCESS_TARGET_X_HEIGHT,
+}
+SETTINGS_BY_BOOK = config.OCR_PREPROCESSING_BY_BOOK
+BINARIZATION_METHODS = ('none', 'otsu', 'adaptive')
+
+ADAPTIVE_WINDOW = config.OCR_PREPROCESS_ADAPTIVE_WINDOW
+MAX_SKEW_DEGREES = config.OCR_PREPROCESS_MAX_SKEW_DEGREES
+# Pas des angles essayés pour le redressement, et angle en dessous duquel le segment n'est pas tourné
+SKEW_STEP_DEGREES = 0.1
+MIN_SKEW_DEGREES = 0.15
+# Nombre maximal de pixels d'encre utilisés pour mesurer l'inclinaison (tirés à intervalle régulier)
+SKEW_SAMPLE_PIXELS = 200000
+# Le texte n'est réduit que s'il dépasse la hauteur visée d'au moins ce facteur (inutile de rééchantillonner pour quelques pixels)
+RESCALE_MIN_RATIO = 1.2
+# Seuil adaptatif : un pixel est de l'encre s'il est plus sombre que la moyenne de son voisinage d'au moins cet écart
+ADAPTIVE_OFFSET = 10
+# Une ligne de texte fait au moins ce nombre de lignes de pixels (en dessous : poussières, soulignements)
+MIN_TEXT_LINE_HEIGHT = 4
+
+# --- Réglages du chapitre : ceux du livre dans OCR_PREPROCESSING_BY_BOOK, complétés par les valeurs par défaut ---
+# Le livre est le dossier parent de l'unité de chapitre (dossier de chapitre ou '<nom>_unzipped').
+def get_settings(chapter_unit_dir=None):
+    settings = dict(DEFAULT_SETTINGS)
+    if chapter_unit_dir:
+        book_folder_name = os.path.basename(os.path.dirname(os.path.normpath(chapter_unit_dir)))
+        settings.update(SETTINGS_BY_BOOK.get(book_folder_name, {}))
+    return settings
+
+# --- Texte ajouté à la clé du cache OCR : deux réglages différents ne partagent pas leurs résultats ---
+# '' sans préparation, pour que les résultats déjà en cache restent valables.
+def get_settings_signature(settings):
+    if not settings['enabled']:
+        return ''
+    return (f"preprocess:{settings['binarization']}:deskew={bool(settings['deskew'])}:x={settings['target_x_height']}"
+            f":window={ADAPTIVE_WINDOW}:skew={MAX_SKEW_DEGREES}")
+
+# --- Seuil d'Otsu d'une image en niveaux de gris (tableau uint8) : maximise la variance entre les deux classes ---
+def compute_otsu_threshold(pixels):
+    histogram = np.bincount(pixels.ravel(), minlength=256).astype(np.float64)
+    levels = np.arange(256, dtype=np.float64)
+    class_weights = np.cumsum(histogram)
+    class_sums = np.cumsum(histogram * levels)
+    total_weight, total_sum = class_weights[-1], class_sums[-1]
+    background_weights = total_weight - class_weights
+    with np.errstate(divide='ignore', invalid='ignore'):
+        between_class_variance = (class_sums * total_weight - class_weights * total_sum) ** 2 / (class_weights * background_weights)
+    between_class_variance[~np.isfinite(between_class_variance)] = 0
+    return int(between_class_variance.argmax())
+
+# --- Masque de l'encre (True = texte) d'une image en niveaux de gris ---
+# method : 'otsu' (un seuil pour tout le segment) ou 'adaptive' (seuil = moyenne du voisinage, pour les fonds inégaux).
+# Le fond est la classe majoritaire : un texte clair sur fond sombre donne le même masque qu'un texte sombre sur fond clair.
+def compute_ink_mask(gray, method='otsu'):
+    pixels = np.asarray(gray)
+    threshold = compute_otsu_threshold(pixels)
+    dark_background = np.count_nonzero(pixels > threshold) < pixels.size / 2
+    if method == 'adaptive':
+        # Moyenne locale calculée par Pillow (flou de boîte en C), comparée en une seule opération NumPy
+        local_mean = np.asarray(gray.filter(ImageFilter.BoxBlur(ADAPTIVE_WINDOW // 2)), dtype=np.int16)
+        difference = pixels.astype(np.int16) - local_mean
+        return difference > ADAPTIVE_OFFSET if dark_background else difference < -ADAPTIVE_OFFSET
+    return pixels > threshold if dark_background else pixels <= threshold
+
+# --- Inclinaison des lignes de texte en degrés (sens trigonométrique, comme Image.rotate pour la corriger) ---
+# Pour chaque angle essayé, les pixels d'encre sont projetés sur l'axe vertical le long de cette pente : les lignes
+# sont les plus nettes (somme des carrés du profil maximale) quand la pente suit celle du texte.
+def estimate_skew_angle(ink_mask):
+    rows, columns = np.nonzero(ink_mask)
+    if rows.size < 100:
+        return 0.0
+    if rows.size > SKEW_SAMPLE_PIXELS:
+        step = -(-rows.size // SKEW_SAMPLE_PIXELS)
+        rows, columns = rows[::step], columns[::step]
+    # Angles essayés du plus petit au plus grand en valeur absolue : à score égal, le segment n'est pas tourné
+    angles = np.arange(-MAX_SKEW_DEGREES, MAX_SKEW_DEGREES + SKEW_STEP_DEGREES / 2, SKEW_STEP_DEGREES)
+    angles = angles[np.argsort(np.abs(angles), kind='stable')]
+    # Rotation autour du centre de l'encre : un texte court décalé à gauche ne fait pas que glisser verticalement
+    columns = columns - columns.mean()
+    best_angle, best_score = 0.0, -1.0
+    for angle in angles:
+        projected_rows = np.round(rows + columns * np.tan(np.radians(angle))).astype(np.int64)
+        projected_rows -= projected_rows.min()
+        profile = np.bincount(projected_rows).astype(np.float64)
+        score = float(np.dot(profile, profile))
+        if score > best_score:
+            best_angle, best_score = float(angle), score
+    return -round(best_angle, 2) or 0.0
+
+# --- Hauteur des minuscules (x-height) en pixels, médiane sur les lignes de texte ; 0 si aucune ligne ---
+# Dans chaque ligne (suite de lignes de pixels contenant de l'encre), la zone des minuscules est celle où l'encre
+# est la plus dense : lignes de pixels qui ont au moins la moitié de l'encre de la plus chargée.
+def estimate_x_height(ink_mask):
+    row_ink = np.count_nonzero(ink_mask, axis=1)
+    inked_rows = row_ink > max(1, ink_mask.shape[1] // 500)
+    edges = np.flatnonzero(np.diff(np.concatenate(([False], inked_rows, [False])).astype(np.int8)))
+    x_heights = []
+    for line_top, line_bottom in zip(edges[0::2], edges[1::2]):
+        if line_bottom - line_top < MIN_TEXT_LINE_HEIGHT:
+            continue
+        line_ink = row_ink[line_top:line_bottom]
+        x_heights.append(np.count_nonzero(line_ink >= line_ink.max() / 2))
+    return int(np.median(x_heights)) if x_heights else 0
+
+# --- Prépare un segment pour Tesseract selon settings (get_settings) ; retourne (image, détails) ---
+# détails : {'skew_degrees', 'x_height', 'scale'} pour le journal et evaluate_ocr_preprocessing.py.
+def preprocess_segment(img, settings):
+    gray = img if img.mode == 'L' else img.convert('L')
+    details = {'skew_degrees': 0.0, 'x_height': 0, 'scale': 1.0}
+    ink_mask = None
+
+    if settings['deskew']:
+        ink_mask = compute_ink_mask(gray)
+        skew_degrees = estimate_skew_angle(ink_mask)
+        if abs(skew_degrees) >= MIN_SKEW_DEGREES:
+            # Les coins découverts par la rotation prennent la couleur du fond (niveau de gris le plus fréquent)
+            background = int(np.bincount(np.asarray(gray)[::8, ::8].ravel(), minlength=256).argmax())
+            gray = gray.rotate(skew_degrees, resample=Image.BILINEAR, fillcolor=background)
+            ink_mask = None
+        details['skew_degrees'] = round(skew_degrees, 2)
+
+    target_x_height = settings['target_x_height']
+    if target_x_height:
+        if ink_mask is None:
+            ink_mask = compute_ink_mask(gray)
+        x_height = estimate_x_height(ink_mask)
+        details['x_height'] = x_height
+        if x_height > target_x_height * RESCALE_MIN_RATIO:
+            scale = target_x_height / x_height
+            gray = gray.resize((max(1, round(gray.width * scale)), max(1, round(gray.height * scale))), Image.LANCZOS)
+            details['scale'] = round(scale, 3)
+
+    if settings['binarization'] == 'none':
+        return gray, details
+    # Image en mode '1' : texte noir (False) sur fond blanc (True)
+    return Image.fromarray(~compute_ink_mask(gray, settings['binarization'])), details
@@ -2,10 +2,15 @@ import os
 import subprocess
 import sys
 import datetime
+import time
+import threading
 import shutil
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 import re
 import json
+import errno
+import zipfile
 import config
 
 # Importation du module de localisation
@@ -16,51 +21,71 @@ _ = get_translator()
 # --- Chemins des fichiers de log globaux ---
 ORCHESTRATOR_LOG_FILE_PATH = config.ORCHESTRATOR_LOG_FILE_PATH
 GLOBAL_ERROR_LOG_FILE_PATH = config.GLOBAL_ERROR_LOG_FILE_PATH
+ORCHESTRATOR_JSONL_LOG_FILE_PATH = config.ORCHESTRATOR_JSONL_LOG_FILE_PATH
 PROGRESS_LOG_FILE_PATH = config.PROGRESS_LOG_FILE_PATH 
+STATE_DB_PATH = config.STATE_DB_PATH
 
 # --- Fonction pour journaliser les messages de l'orchestrateur ---
-def log_orchestrator_message(message, level="INFO"):
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+# Le message est déposé dans la file de log_sink (écriture par lots en arrière-plan) : les workers n'attendent
+# plus les écritures disque. chapter / stage / duration sont repris dans l'événement JSONL optionnel.
+def log_orchestrator_message(message, level="INFO", chapter=None, stage=None, duration=None):
+    now = datetime.datetime.now()
+    timestamp = now.strftime("%Y-%m-%d %H:%M:%S")
     log_message = f"[{timestamp}] [{level}] {message}"
-    os.makedirs(os.path.dirname(ORCHESTRATOR_LOG_FILE_PATH), exist_ok=True)
-    with open(ORCHESTRATOR_LOG_FILE_PATH, 'a', encoding='utf-8') as f:
-        f.write(log_message + '\n')
-    print(log_message)
+    event = {
+        'time': now.isoformat(timespec='milliseconds'),
+        'level': level,
+        'message': message,
+        'chapter': os.path.basename(chapter) if chapter else None,
+        'stage': stage,
+        'duration': round(duration, 3) if duration is not None else None,
+    }
+    log_sink.submit(ORCHESTRATOR_LOG_FILE_PATH, log_message, console_line=log_message, event=event)
 
 # --- Fonction pour journaliser les erreurs dans le fichier d'erreurs global ---
 def log_global_error(message, chapter_unit_path="N/A", script_name="N/A", error_details=""):
     timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     log_message = f"[{timestamp}] [{_('CHAPITRE')}: {os.path.basename(chapter_unit_path)}] [{_('SCRIPT')}: {script_name}] {_('ERREUR')}: {message}\n{_('Details')}: {error_details}\n"
-    os.makedirs(os.path.dirname(GLOBAL_ERROR_LOG_FILE_PATH), exist_ok=True)
-    with open(GLOBAL_ERROR_LOG_FILE_PATH, 'a', encoding='utf-8') as f:
-        f.write(log_message + '\n')
-    print(f"[{_('GLOBAL_ERROR')}] {log_message.strip()}")
-
-# --- Fonction pour charger les derniers chapitres traités / livres complets ---
-def load_last_processed_chapters():
-    if os.path.exists(PROGRESS_LOG_FILE_PATH):
+    log_sink.submit(GLOBAL_ERROR_LOG_FILE_PATH, log_message, console_line=f"[{_('GLOBAL_ERROR')}] {log_message.strip()}")
+
+# --- Ouvre la base d'état SQLite (et reprend l'ancien fichier .progress JSON s'il existe) ---
+def open_state_store():
+    store = StateStore(STATE_DB_PATH)
+    if store.is_empty() and os.path.exists(PROGRESS_LOG_FILE_PATH):
         try:
-            with open(PROGRESS_LOG_FILE_PATH, 'r', encoding='utf-8') as f:
-                # Stocke un dict {book_name: chapter_path ou True pour complet}
-                return json.load(f)
+            imported_count = store.import_json_chapter_progress(PROGRESS_LOG_FILE_PATH)
+            log_orchestrator_message(_('PROGRESS_FILE_IMPORTED').format(imported_count, os.path.basename(PROGRESS_LOG_FILE_PATH), STATE_DB_PATH), "INFO")
         except json.JSONDecodeError:
             log_orchestrator_message(_('PROGRESS_FILE_CORRUPTED').format(os.path.basename(PROGRESS_LOG_FILE_PATH)), "WARNING")
-            return {}
-    return {}
+    return store
 
-# --- Fonction pour sauvegarder le dernier chapitre traité / état complet d'un livre ---
-def save_last_processed_chapters(last_processed_chapters_map):
-    temp_path = PROGRESS_LOG_FILE_PATH + ".tmp"
+# --- Fonction pour enregistrer un chapitre traité (point de reprise du livre) ---
+# source_state : (taille:date, signature des CRC) du fichier .cbz source, mémorisé pour détecter une archive remplacée
+def save_processed_chapter(state_store, book_folder_name, chapter_unit_path, source_state=None):
     try:
-        with open(temp_path, 'w', encoding='utf-8') as f:
-            json.dump(last_processed_chapters_map, f, indent=4)
-        shutil.move(temp_path, PROGRESS_LOG_FILE_PATH)
+        state_store.mark_chapter_done(book_folder_name, chapter_unit_path)
+        if source_state is not None:
+            state_store.set_chapter_source(book_folder_name, chapter_unit_path, *source_state)
     except Exception as e:
-        log_orchestrator_message(_('CRITICAL_ERROR_SAVE_PROGRESS').format(os.path.basename(PROGRESS_LOG_FILE_PATH), e), "CRITICAL")
-
+        log_orchestrator_message(_('CRITICAL_ERROR_SAVE_PROGRESS').format(os.path.basename(STATE_DB_PATH), e), "CRITICAL")
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from extract_cbz import extract_cbz_content
+import stage_workers
+import OCR
+import split_large_images
+import log_sink
+import library_watcher
+import ocr_cache
+import cbz_archive
+import chapter_scheduler
+import chapter_retries
+import run_metrics
+import stage_profiler
+import chapter_leases
+import memory_budget
+import process_tree
+from state_store import StateStore, STAGE_STATUS_RUNNING, STAGE_STATUS_DONE, STAGE_STATUS_FAILED, CHAPTER_STATUS_DONE
 
 # --- Configuration GLOBALE de l'Orchestrateur ---
 GLOBAL_BOOKS_ROOT_DIR = config.GLOBAL_BOOKS_ROOT_DIR
@@ -73,31 +98,120 @@ FINAL_COLLECTED_TEXTS_SUBFOLDER_NAME = config.FINAL_COLLECTED_TEXTS_SUBFOLDER_NA
 EXCLUDE_DIR_NAMES = config.EXCLUDE_DIR_NAMES
 
 MAX_CONCURRENT_CHAPTER_UNITS = config.MAX_CONCURRENT_CHAPTER_UNITS 
+STAGE_EXECUTION_MODE = config.STAGE_EXECUTION_MODE
+DISCOVERY_THREADS = config.DISCOVERY_THREADS
+FINAL_TEXTS_COPY_THREADS = config.FINAL_TEXTS_COPY_THREADS
+PRIORITY_BOOKS = config.PRIORITY_BOOKS
+METRICS_REPORT_DIR = config.METRICS_REPORT_DIR
+METRICS_PROMETHEUS_TEXTFILE_PATH = config.METRICS_PROMETHEUS_TEXTFILE_PATH
+PIPELINE_MODE = config.PIPELINE_MODE
+CBZ_EXTRACT_TO_DISK = config.CBZ_EXTRACT_TO_DISK
+PROFILE_MODE = config.PROFILE_MODE
+PROFILE_OUTPUT_DIR = config.PROFILE_OUTPUT_DIR
+PROFILER = config.PROFILER
+PROFILE_TOP_FUNCTIONS = config.PROFILE_TOP_FUNCTIONS
+SLOWEST_CHAPTERS_LOG_COUNT = config.SLOWEST_CHAPTERS_LOG_COUNT
+DISTRIBUTED_MODE = config.DISTRIBUTED_MODE
+LEASE_DIR = config.LEASE_DIR
+NODE_NAME = config.NODE_NAME
+LEASE_TTL_SECONDS = config.LEASE_TTL_SECONDS
+LEASE_HEARTBEAT_SECONDS = config.LEASE_HEARTBEAT_SECONDS
+LEASE_RETRY_SECONDS = config.LEASE_RETRY_SECONDS
+MEMORY_BUDGET_MB = config.MEMORY_BUDGET_MB
+TIMEOUT_SECONDS_BY_STAGE = config.TIMEOUT_SECONDS_BY_STAGE
+CHAPTER_MAX_ATTEMPTS = config.CHAPTER_MAX_ATTEMPTS
+RETRY_BACKOFF_BASE_SECONDS = config.RETRY_BACKOFF_BASE_SECONDS
+RETRY_BACKOFF_MAX_SECONDS = config.RETRY_BACKOFF_MAX_SECONDS
 
 SPLIT_SCRIPT = os.path.join(SCRIPTS_DIR, 'split_large_images.py')
 OCR_SCRIPT = os.path.join(SCRIPTS_DIR, 'OCR.py')
 CLEAN_SCRIPT = os.path.join(SCRIPTS_DIR, 'clean_ocr_text.py')
+STREAM_SCRIPT = os.path.join(SCRIPTS_DIR, 'stream_pipeline.py')
 
 # --- Clé de tri naturel ---
 def natsort_key(s):
     return [int(text) if text.isdigit() else text.lower() for text in re.split('([0-9]+)', s)]
 
+# --- Lance un script enfant et journalise sa sortie au fil de l'eau ---
+# Retourne (code de retour, stdout, stderr) ; stdout et stderr ne sont conservés que pour le rapport d'erreur.
+# timeout : durée maximale en secondes (None : illimitée) ; au-delà, le script et tous ses processus enfants sont tués
+# et subprocess.TimeoutExpired est levée.
+def _run_script_streaming(command, script_name, chapter_unit_path, timeout=None):
+    process = subprocess.Popen(command,
+                               stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE,
+                               text=True,
+                               encoding='utf-8',
+                               errors='replace')
+    stderr_lines = []
+
+    timed_out = threading.Event()
+
+    def kill_on_timeout():
+        if process.poll() is None:
+            timed_out.set()
+            process_tree.kill_process_tree(process.pid)
+
+    timeout_timer = None
+    if timeout:
+        timeout_timer = threading.Timer(timeout, kill_on_timeout)
+        timeout_timer.daemon = True
+        timeout_timer.start()
+
+    def pump_stderr():
+        for line in process.stderr:
+            stderr_lines.append(line)
+            log_orchestrator_message(_('SCRIPT_WARNING_LINE').format(script_name, line.rstrip()), "WARNING", chapter=chapter_unit_path, stage=script_name)
+
+    stderr_thread = threading.Thread(target=pump_stderr, daemon=True)
+    stderr_thread.start()
+
+    stdout_lines = []
+    for line in process.stdout:
+        stdout_lines.append(line)
+        log_orchestrator_message(_('SCRIPT_OUTPUT_LINE').format(script_name, line.rstrip()), "DEBUG", chapter=chapter_unit_path, stage=script_name)
+
+    returncode = process.wait()
+    stderr_thread.join()
+    if timeout_timer is not None:
+        timeout_timer.cancel()
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(command, timeout, output=''.join(stdout_lines), stderr=''.join(stderr_lines))
+    return returncode, ''.join(stdout_lines), ''.join(stderr_lines)
+
+# Chapitres dont une étape a été interrompue par l'arrêt du pool de workers (autre chapitre hors délai) :
+# leur échec ne vient pas d'eux et n'est pas compté dans CHAPTER_MAX_ATTEMPTS
+_interrupted_chapter_units = set()
+_interrupted_chapter_units_lock = threading.Lock()
+
 # --- Fonction pour exécuter un script enfant (SILENCIEUSE) ---
-def run_child_script(script_path, chapter_unit_path_arg):
+# En mode 'pool', l'étape tourne dans un worker persistant (stage_workers) au lieu d'un nouveau processus Python.
+# profile_path : fichier du profil de l'étape (mode --profile), ou None
+# timeout : durée maximale de l'étape en secondes (None : illimitée), au-delà de laquelle ses processus sont tués
+def run_child_script(script_path, chapter_unit_path_arg, profile_path=None, timeout=None):
     script_name = os.path.basename(script_path)
     log_orchestrator_message(_('EXECUTING_SCRIPT').format(script_name, os.path.basename(chapter_unit_path_arg)), level="INFO")
     try:
-        command = [sys.executable, script_path, '--chapter_unit', chapter_unit_path_arg]
-        
-        result = subprocess.run(command,
-                                capture_output=True,
-                                text=True,
-                                check=True)
+        if STAGE_EXECUTION_MODE == 'pool':
+            success, stdout, stderr = stage_workers.run_stage(script_name, chapter_unit_path_arg, profile_path, timeout)
+            if not success:
+                raise subprocess.CalledProcessError(1, script_name, output=stdout, stderr=stderr)
+        else:
+            if profile_path:
+                command = stage_profiler.build_profiled_command(script_path, chapter_unit_path_arg, profile_path)
+            else:
+                command = [sys.executable, script_path, '--chapter_unit', chapter_unit_path_arg]
+
+            # La sortie du script est journalisée ligne par ligne pendant son exécution (pas de mise en mémoire complète)
+            returncode, stdout, stderr = _run_script_streaming(command, script_name, chapter_unit_path_arg, timeout)
+            if returncode != 0:
+                raise subprocess.CalledProcessError(returncode, command, output=stdout, stderr=stderr)
+            stdout, stderr = None, None
         
-        if result.stdout:
-            log_orchestrator_message(_('SCRIPT_OUTPUT').format(script_name, result.stdout.strip()), "DEBUG")
-        if result.stderr:
-            log_orchestrator_message(_('SCRIPT_WARNING').format(script_name, result.stderr.strip()), "WARNING")
+        if stdout:
+            log_orchestrator_message(_('SCRIPT_OUTPUT').format(script_name, stdout.strip()), "DEBUG", chapter=chapter_unit_path_arg, stage=script_name)
+        if stderr:
+            log_orchestrator_message(_('SCRIPT_WARNING').format(script_name, stderr.strip()), "WARNING", chapter=chapter_unit_path_arg, stage=script_name)
 
         log_orchestrator_message(_('SCRIPT_SUCCESS').format(script_name), level="INFO")
         return True
@@ -106,6 +220,19 @@ def run_child_script(script_path, chapter_unit_path_arg):
         log_orchestrator_message(_('SCRIPT_FAILED').format(script_name, os.path.basename(chapter_unit_path_arg)), "ERROR")
         log_global_error(_('SCRIPT_EXECUTION_FAILED'), chapter_unit_path_arg, script_name, error_details)
         return False
+    except subprocess.TimeoutExpired as e:
+        error_details = f"{_('STDERR')} : {e.stderr.strip() if e.stderr else _('None')}\n{_('STDOUT')} : {e.stdout.strip() if e.stdout else _('None')}"
+        log_orchestrator_message(_('STAGE_TIMED_OUT').format(script_name, timeout, os.path.basename(chapter_unit_path_arg)), "ERROR",
+                                 chapter=chapter_unit_path_arg, stage=script_name)
+        log_global_error(_('STAGE_TIMED_OUT').format(script_name, timeout, os.path.basename(chapter_unit_path_arg)),
+                         chapter_unit_path_arg, script_name, error_details)
+        return False
+    except stage_workers.StageWorkersRestarted:
+        with _interrupted_chapter_units_lock:
+            _interrupted_chapter_units.add(chapter_unit_path_arg)
+        log_orchestrator_message(_('STAGE_INTERRUPTED_BY_WORKER_RESTART').format(script_name, os.path.basename(chapter_unit_path_arg)),
+                                 "WARNING", chapter=chapter_unit_path_arg, stage=script_name)
+        return False
     except FileNotFoundError:
         error_details = _('SCRIPT_FILE_NOT_FOUND').format(script_name)
         log_orchestrator_message(_('SCRIPT_NOT_FOUND').format(script_name), "CRITICAL")
@@ -117,11 +244,31 @@ def run_child_script(script_path, chapter_unit_path_arg):
         log_global_error(error_details, chapter_unit_path_arg, script_name)
         return False
 
+# --- Exécute une étape pour un chapitre et enregistre son état (en cours / terminé / échoué) dans la base d'état ---
+# pages / megapixels : travail de l'étape pour ce chapitre (segments, taille de l'image), enregistré dans les mesures de l'exécution
+def run_chapter_stage(script_path, chapter_unit_path, book_folder_name, state_store, pages=None, megapixels=None):
+    script_name = os.path.basename(script_path)
+    state_store.record_stage(book_folder_name, chapter_unit_path, script_name, STAGE_STATUS_RUNNING)
+    profile_path = stage_profiler.chapter_profile_path(script_name, book_folder_name, chapter_unit_path) if stage_profiler.is_enabled() else None
+    start_time = time.monotonic()
+    success = run_child_script(script_path, chapter_unit_path, profile_path, TIMEOUT_SECONDS_BY_STAGE.get(script_name) or None)
+    duration = time.monotonic() - start_time
+    run_metrics.record_stage(script_name, duration, book_folder_name, chapter_unit_path, pages, megapixels, success)
+    state_store.record_stage(book_folder_name, chapter_unit_path, script_name,
+                             STAGE_STATUS_DONE if success else STAGE_STATUS_FAILED,
+                             duration)
+    log_orchestrator_message(_('STAGE_DURATION').format(script_name, os.path.basename(chapter_unit_path), duration), "DEBUG",
+                             chapter=chapter_unit_path, stage=script_name, duration=duration)
+    if not success:
+        state_store.mark_chapter_failed(book_folder_name, chapter_unit_path)
+    return success
+
 # --- Fonction pour nettoyer les dossiers intermédiaires ---
 def cleanup_intermediate_folders(chapter_unit_path, folders_to_clean_names):
     log_orchestrator_message(_('CLEANING_INTERMEDIATE_FILES').format(os.path.basename(chapter_unit_path)), level="INFO")
     for folder_name in folders_to_clean_names:
-        folder_path = os.path.join(chapter_unit_path, folder_name)
+        # normpath : "." désigne le dossier de l'unité lui-même (shutil.rmtree refuse un chemin se terminant par "/.")
+        folder_path = os.path.normpath(os.path.join(chapter_unit_path, folder_name))
         if os.path.exists(folder_path):
             try:
                 shutil.rmtree(folder_path)
@@ -132,14 +279,29 @@ def cleanup_intermediate_folders(chapter_unit_path, folders_to_clean_names):
             log_orchestrator_message(_('FOLDER_NOT_FOUND').format(os.path.basename(folder_path)), level="INFO")
     log_orchestrator_message(_('CLEANUP_FINISHED_FOR').format(os.path.basename(chapter_unit_path)), level="INFO")
 
+# --- Place un texte nettoyé dans final_texts par un simple renommage (aucune copie des données) ---
+# Retourne False si la source et la destination sont sur deux systèmes de fichiers différents : le fichier doit alors être copié.
+def move_final_text(source_file_path, destination_file_path):
+    try:
+        os.replace(source_file_path, destination_file_path)
+        return True
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        return False
+
 # --- Fonction : Collecter les fichiers TXT finaux pour un livre ---
+# Les textes sont déplacés (sortieTXT_cleaned est supprimé juste après) ; seuls ceux qui sont sur un autre
+# système de fichiers que final_texts sont copiés, en parallèle sur FINAL_TEXTS_COPY_THREADS threads.
 def collect_final_texts(book_root_dir, chapter_units_list):
     log_orchestrator_message(_('START_COLLECTING_FINAL_TXT').format(os.path.basename(book_root_dir)), level="INFO")
+    start_time = time.monotonic()
     
     final_output_book_dir = os.path.join(book_root_dir, FINAL_COLLECTED_TEXTS_SUBFOLDER_NAME)
     os.makedirs(final_output_book_dir, exist_ok=True)
 
     collected_count = 0
+    files_to_copy = []
     for chapter_unit_path in sorted(chapter_units_list, key=natsort_key):
         cleaned_txt_source_dir = os.path.join(chapter_unit_path, OUTPUT_CLEANED_TEXT_SUBFOLDER_NAME)
         
@@ -150,9 +312,11 @@ def collect_final_texts(book_root_dir, chapter_units_list):
                     destination_file_path = os.path.join(final_output_book_dir, txt_file_name)
                     
                     try:
-                        shutil.copy2(source_file_path, destination_file_path)
-                        log_orchestrator_message(_('COPIED_TO_FINAL_FOLDER').format(txt_file_name, os.path.basename(chapter_unit_path)), level="INFO")
-                        collected_count += 1
+                        if move_final_text(source_file_path, destination_file_path):
+                            log_orchestrator_message(_('MOVED_TO_FINAL_FOLDER').format(txt_file_name, os.path.basename(chapter_unit_path)), level="INFO")
+                            collected_count += 1
+                        else:
+                            files_to_copy.append((chapter_unit_path, txt_file_name, source_file_path, destination_file_path))
                     except Exception as e:
                         log_orchestrator_message(_('ERROR_COPYING_FILE').format(txt_file_name, e), "ERROR")
                         log_global_error(_('FAILED_TO_COPY_CLEANED_TXT'), chapter_unit_path, "collect_final_texts", str(e))
@@ -160,75 +324,105 @@ def collect_final_texts(book_root_dir, chapter_units_list):
         else:
             log_orchestrator_message(_('CLEANED_TXT_FOLDER_NOT_FOUND').format(os.path.basename(cleaned_txt_source_dir), os.path.basename(chapter_unit_path)), "WARNING")
 
+    # Copies entre systèmes de fichiers différents : lancées toutes ensemble pour que les écritures se recouvrent
+    if files_to_copy:
+        with ThreadPoolExecutor(max_workers=FINAL_TEXTS_COPY_THREADS) as copy_executor:
+            copy_futures = {copy_executor.submit(shutil.copy2, source_file_path, destination_file_path): (chapter_unit_path, txt_file_name)
+                            for chapter_unit_path, txt_file_name, source_file_path, destination_file_path in files_to_copy}
+            for copy_future in as_completed(copy_futures):
+                chapter_unit_path, txt_file_name = copy_futures[copy_future]
+                try:
+                    copy_future.result()
+                    log_orchestrator_message(_('COPIED_TO_FINAL_FOLDER').format(txt_file_name, os.path.basename(chapter_unit_path)), level="INFO")
+                    collected_count += 1
+                except Exception as e:
+                    log_orchestrator_message(_('ERROR_COPYING_FILE').format(txt_file_name, e), "ERROR")
+                    log_global_error(_('FAILED_TO_COPY_CLEANED_TXT'), chapter_unit_path, "collect_final_texts", str(e))
+
+    run_metrics.record_stage('collect', time.monotonic() - start_time, os.path.basename(book_root_dir))
     log_orchestrator_message(_('FINAL_TXT_COLLECTION_FINISHED').format(collected_count, os.path.basename(book_root_dir)), level="INFO")
 
-def _process_single_chapter_unit(chapter_unit_path, book_folder_name, last_processed_chapters_map):
+# --- Vérifie la présence d'au moins un fichier .txt dans un répertoire ---
+def has_txt_files(directory):
+    try:
+        with os.scandir(directory) as entries:
+            return any(entry.name.lower().endswith('.txt') for entry in entries)
+    except (FileNotFoundError, NotADirectoryError):
+        return False
+
+# --- Clé d'un fichier de final_texts : son nom sans extension, en minuscules ---
+def final_text_key(file_name):
+    return os.path.splitext(file_name)[0].lower()
+
+# --- Clé du texte final que produit une unité de chapitre (même nom que le fichier écrit par OCR.py / stream_pipeline.py) ---
+# "Chapter 12 - Titre" donne "chapter_0012_titre" ; "Chapter 12", "Chapter 12.5" et "Chapter 12 - Part 2" ont chacun la leur.
+def chapter_output_key(chapter_unit_name):
+    return OCR.format_output_filename_base(chapter_unit_name).lower()
+
+# --- Index des sorties déjà produites pour un livre (un seul parcours des dossiers par livre) ---
+# Partagé (en lecture seule) par toutes les tâches de chapitre du livre.
+def build_book_output_index(book_folder_path, chapter_units_list):
+    final_text_keys = set()
+    book_final_texts_dir = os.path.join(book_folder_path, FINAL_COLLECTED_TEXTS_SUBFOLDER_NAME)
+    try:
+        with os.scandir(book_final_texts_dir) as entries:
+            for entry in entries:
+                if entry.name.lower().endswith('.txt'):
+                    final_text_keys.add(final_text_key(entry.name))
+    except FileNotFoundError:
+        pass
+
+    chapters_with_cleaned_txt = set()
+    chapters_with_raw_txt = set()
+    for chapter_unit_path in chapter_units_list:
+        if has_txt_files(os.path.join(chapter_unit_path, OUTPUT_CLEANED_TEXT_SUBFOLDER_NAME)):
+            chapters_with_cleaned_txt.add(chapter_unit_path)
+        elif has_txt_files(os.path.join(chapter_unit_path, OUTPUT_TEXT_SUBFOLDER_NAME)):
+            chapters_with_raw_txt.add(chapter_unit_path)
+
+    return {
+        'final_text_keys': final_text_keys,
+        'chapters_with_cleaned_txt': chapters_with_cleaned_txt,
+        'chapters_with_raw_txt': chapters_with_raw_txt,
+    }
+
+# cbz_file_path : fichier .cbz source du chapitre, extrait ici seulement si ses images sont nécessaires
+# page_sizes : [(largeur, hauteur)] des pages du chapitre, lues par la tâche pour les mesures de l'exécution (ou None)
+def _process_single_chapter_unit(chapter_unit_path, book_folder_name, state_store, book_output_index, cbz_file_path=None, page_sizes=None):
     message_prefix = f"[{_('CHAPITRE')}: '{os.path.basename(chapter_unit_path)}' {_('pour')} '{book_folder_name}']"
     log_orchestrator_message(_('PROCESSING_STARTED').format(message_prefix), "INFO")
+    source_state = read_cbz_source_state(cbz_file_path) if cbz_file_path else None
 
     ### DÉBUT DE LA NOUVELLE LOGIQUE DE VÉRIFICATION ###
-    chapter_name = os.path.basename(chapter_unit_path)
-    book_final_texts_dir = os.path.join(os.path.dirname(chapter_unit_path), FINAL_COLLECTED_TEXTS_SUBFOLDER_NAME) # Utilisez FINAL_COLLECTED_TEXTS_SUBFOLDER_NAME
-
-    # Fonction utilitaire pour vérifier la présence d'un fichier .txt dans un répertoire
-    def has_txt_files(directory):
-        if os.path.exists(directory):
-            return any(f.lower().endswith('.txt') for f in os.listdir(directory))
-        return False
+    # Les dossiers final_texts / sortieTXT_cleaned / sortieTXT du livre ont été parcourus une seule fois
+    # (build_book_output_index) : chaque vérification est une recherche en O(1) dans l'index.
 
     # 1. Vérifier dans le répertoire final_texts (le plus prioritaire)
-    # On doit chercher un fichier qui contient le nom du chapitre dans le nom du fichier texte final.
-    final_text_found = False
-    if os.path.exists(book_final_texts_dir):
-        # Pour le nommage des fichiers dans final_texts, ils sont formatés comme "Chapter_XXXX_Titre.txt"
-        # Donc nous allons chercher un fichier qui contient le nom de votre dossier de chapitre
-        # Assumons que le nom du chapitre dans le dossier est "Chapter 1" ou "Chapter 001_title"
-        # Et le fichier final dans final_texts est "Chapter 001_title_some_stuff.txt"
-        
-        # Simplifions le nom du chapitre pour la recherche (enlever _unzipped si c'est le cas)
-        search_chapter_name = chapter_name.replace('_unzipped', '').lower()
-        search_chapter_name = search_chapter_name.replace('chapter', '').strip().replace(' ', '_').replace('-', '_')
-        search_chapter_name = re.sub(r'[^a-z0-9_]', '', search_chapter_name) # Nettoyage pour la recherche
-
-        for f_name in os.listdir(book_final_texts_dir):
-            if f_name.lower().endswith('.txt'):
-                # Nettoyer le nom du fichier final de manière similaire
-                cleaned_f_name = f_name.replace('_unzipped', '').lower()
-                cleaned_f_name = cleaned_f_name.replace('chapter', '').strip().replace(' ', '_').replace('-', '_')
-                cleaned_f_name = re.sub(r'[^a-z0-9_]', '', cleaned_f_name)
-
-                if search_chapter_name in cleaned_f_name: # Vérifie si le nom simplifié du chapitre est dans le nom du fichier final
-                    final_text_found = True
-                    break
+    final_text_found = chapter_output_key(os.path.basename(chapter_unit_path)) in book_output_index['final_text_keys']
     
     if final_text_found:
         log_orchestrator_message(_('FINAL_TXT_FOUND').format(message_prefix, FINAL_COLLECTED_TEXTS_SUBFOLDER_NAME), "INFO")
         # Mettre à jour le fichier de progression pour ce livre si ce chapitre est traité
-        last_processed_chapters_map[book_folder_name] = chapter_unit_path
-        save_last_processed_chapters(last_processed_chapters_map)
+        save_processed_chapter(state_store, book_folder_name, chapter_unit_path, source_state)
         return _('PROCESSING_SKIPPED_FINAL').format(message_prefix)
 
     # 2. Vérifier dans sortieTXT_cleaned
-    cleaned_txt_dir = os.path.join(chapter_unit_path, OUTPUT_CLEANED_TEXT_SUBFOLDER_NAME)
-    if has_txt_files(cleaned_txt_dir):
+    if chapter_unit_path in book_output_index['chapters_with_cleaned_txt']:
         log_orchestrator_message(_('CLEANED_FILES_FOUND').format(message_prefix, OUTPUT_CLEANED_TEXT_SUBFOLDER_NAME), "INFO")
         # Mettre à jour le fichier de progression pour ce livre si ce chapitre est traité
-        last_processed_chapters_map[book_folder_name] = chapter_unit_path
-        save_last_processed_chapters(last_processed_chapters_map)
+        save_processed_chapter(state_store, book_folder_name, chapter_unit_path, source_state)
         return _('PROCESSING_SKIPPED_CLEANED').format(message_prefix)
 
     # 3. Vérifier dans sortieTXT
-    output_txt_dir = os.path.join(chapter_unit_path, OUTPUT_TEXT_SUBFOLDER_NAME)
-    if has_txt_files(output_txt_dir):
+    if chapter_unit_path in book_output_index['chapters_with_raw_txt']:
         log_orchestrator_message(_('RAW_OCR_FOUND_RESUME').format(message_prefix, OUTPUT_TEXT_SUBFOLDER_NAME), "INFO")
-        clean_success = run_child_script(CLEAN_SCRIPT, chapter_unit_path)
+        clean_success = run_chapter_stage(CLEAN_SCRIPT, chapter_unit_path, book_folder_name, state_store)
         if not clean_success:
             return _('STOP_CLEAN_FAIL').format(message_prefix)
         # Après un nettoyage réussi, on nettoie les dossiers intermédiaires (ici sortieTXT)
         cleanup_intermediate_folders(chapter_unit_path, [OUTPUT_TEXT_SUBFOLDER_NAME])
         # Puis on met à jour le progrès
-        last_processed_chapters_map[book_folder_name] = chapter_unit_path
-        save_last_processed_chapters(last_processed_chapters_map)
+        save_processed_chapter(state_store, book_folder_name, chapter_unit_path, source_state)
         return _('PROCESSING_RESUMED_CLEANING').format(message_prefix)
 
     ### FIN DE LA NOUVELLE LOGIQUE DE VÉRIFICATION ###
@@ -236,18 +430,61 @@ def _process_single_chapter_unit(chapter_unit_path, book_folder_name, last_proce
     # Si aucun fichier final n'est trouvé, procéder au traitement complet (split -> ocr -> clean)
     log_orchestrator_message(_('NO_OUTPUT_FOUND').format(message_prefix), "INFO")
 
-    split_success = run_child_script(SPLIT_SCRIPT, chapter_unit_path)
-    if not split_success:
-        return _('STOP_SPLIT_FAIL').format(message_prefix)
+    # Extraction du .cbz (tâche du chapitre : les autres chapitres continuent d'être traités pendant ce temps)
+    # Si CBZ_EXTRACT_TO_DISK est désactivé, l'image est lue directement dans l'archive par la découpe :
+    # le dossier '_unzipped' ne reçoit alors que les textes produits et les logs.
+    def extract_chapter_cbz():
+        if not CBZ_EXTRACT_TO_DISK:
+            os.makedirs(chapter_unit_path, exist_ok=True)
+            return True
+        log_orchestrator_message(_('CBZ_DETECTED').format(os.path.basename(cbz_file_path)), "INFO")
+        start_time = time.monotonic()
+        extracted = extract_cbz_content(cbz_file_path, os.path.dirname(cbz_file_path))
+        run_metrics.record_stage('extract', time.monotonic() - start_time, book_folder_name, chapter_unit_path, success=bool(extracted))
+        if extracted:
+            log_orchestrator_message(_('CBZ_EXTRACTED').format(os.path.basename(cbz_file_path)), "INFO")
+            return True
+        log_orchestrator_message(_('CBZ_EXTRACTION_FAILED').format(os.path.basename(cbz_file_path)), "ERROR")
+        return False
+
+    # Travail du chapitre pour les mesures de l'exécution : segments à OCRiser et mégapixels de ses pages (en-têtes seuls)
+    pages, megapixels = None, None
+    if page_sizes:
+        pages = sum(split_large_images.count_chapter_segments(height) for _width, height in page_sizes)
+        megapixels = sum(width * height for width, height in page_sizes) / 1e6
+
+    # Mode 'stream' : découpe, OCR et nettoyage en mémoire, seul le texte nettoyé est écrit (pas de dossiers intermédiaires)
+    if PIPELINE_MODE == 'stream':
+        if cbz_file_path and not extract_chapter_cbz():
+            return _('STOP_CBZ_EXTRACTION_FAIL').format(message_prefix)
+        stream_success = run_chapter_stage(STREAM_SCRIPT, chapter_unit_path, book_folder_name, state_store, pages, megapixels)
+        if not stream_success:
+            return _('STOP_STREAM_FAIL').format(message_prefix)
+        save_processed_chapter(state_store, book_folder_name, chapter_unit_path, source_state)
+        return _('PROCESSING_FINISHED').format(message_prefix)
+
+    # Reprise au niveau des étapes : si la découpe est terminée (base d'état) et que ses images sont encore là, on passe à l'OCR
+    processed_images_dir = os.path.join(chapter_unit_path, PROCESSED_IMAGES_SUBFOLDER_NAME)
+    split_already_done = (os.path.basename(SPLIT_SCRIPT) in state_store.get_completed_stages(book_folder_name, chapter_unit_path)
+                          and os.path.exists(processed_images_dir)
+                          and any(f.lower().endswith('.png') for f in os.listdir(processed_images_dir)))
+    if split_already_done:
+        log_orchestrator_message(_('SPLIT_ALREADY_DONE_RESUME').format(message_prefix, PROCESSED_IMAGES_SUBFOLDER_NAME), "INFO")
+    else:
+        if cbz_file_path and not extract_chapter_cbz():
+            return _('STOP_CBZ_EXTRACTION_FAIL').format(message_prefix)
+        split_success = run_chapter_stage(SPLIT_SCRIPT, chapter_unit_path, book_folder_name, state_store, pages, megapixels)
+        if not split_success:
+            return _('STOP_SPLIT_FAIL').format(message_prefix)
 
-    ocr_success = run_child_script(OCR_SCRIPT, chapter_unit_path)
+    ocr_success = run_chapter_stage(OCR_SCRIPT, chapter_unit_path, book_folder_name, state_store, pages, megapixels)
     if not ocr_success:
         return _('STOP_OCR_FAIL').format(message_prefix)
     
     # Nettoyage des images traitées après OCR, car elles ne sont plus nécessaires
     cleanup_intermediate_folders(chapter_unit_path, [PROCESSED_IMAGES_SUBFOLDER_NAME])
 
-    clean_success = run_child_script(CLEAN_SCRIPT, chapter_unit_path)
+    clean_success = run_chapter_stage(CLEAN_SCRIPT, chapter_unit_path, book_folder_name, state_store)
     if not clean_success:
         return _('STOP_CLEAN_FAIL').format(message_prefix)
 
@@ -255,170 +492,278 @@ def _process_single_chapter_unit(chapter_unit_path, book_folder_name, last_proce
     cleanup_intermediate_folders(chapter_unit_path, [OUTPUT_TEXT_SUBFOLDER_NAME])
 
     # Mettre à jour le fichier de progression pour ce livre
-    last_processed_chapters_map[book_folder_name] = chapter_unit_path
-    save_last_processed_chapters(last_processed_chapters_map)
+    save_processed_chapter(state_store, book_folder_name, chapter_unit_path, source_state)
 
     return _('PROCESSING_FINISHED').format(message_prefix)
 
-# --- Processus principal ---
-log_orchestrator_message(_('ORCHESTRATOR_START'), level="INFO")
-log_orchestrator_message(_('GLOBAL_BOOKS_ROOT_DIR_MSG').format(GLOBAL_BOOKS_ROOT_DIR), level="INFO")
-log_orchestrator_message(_('MAX_CONCURRENT_CHAPTER_UNITS_MSG').format(MAX_CONCURRENT_CHAPTER_UNITS), level="INFO")
-
-
-# Nettoyer les logs précédents au démarrage
-if os.path.exists(ORCHESTRATOR_LOG_FILE_PATH):
-    os.remove(ORCHESTRATOR_LOG_FILE_PATH)
-if os.path.exists(GLOBAL_ERROR_LOG_FILE_PATH):
-    os.remove(GLOBAL_ERROR_LOG_FILE_PATH)
-if os.path.exists(PROGRESS_LOG_FILE_PATH + ".tmp"):
-    os.remove(PROGRESS_LOG_FILE_PATH + ".tmp")
-# Ne pas supprimer PROGRESS_LOG_FILE_PATH ici, car on le charge en premier.
-
-# Charger les derniers chapitres traités
-last_processed_chapters_by_book = load_last_processed_chapters()
-if last_processed_chapters_by_book:
-    log_orchestrator_message(_('LOADING_RESUME_POINTS').format(len(last_processed_chapters_by_book)), "INFO")
-    for book_name, progress_status in last_processed_chapters_by_book.items():
-        if progress_status is True:
-            log_orchestrator_message(_('BOOK_MARKED_AS_PROCESSED').format(book_name), "INFO")
-        else:
-            log_orchestrator_message(_('LAST_PROCESSED_CHAPTER').format(book_name, os.path.basename(progress_status)), "INFO")
-else:
-    log_orchestrator_message(_('NO_RESUME_POINT_FOUND'), "INFO")
-
-
-all_futures = []
-book_chapter_units_map = {}
-
-with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_CHAPTER_UNITS) as executor:
-    # 1. Phase de Détection et Soumission des Tâches
-    for book_folder_name in sorted(os.listdir(GLOBAL_BOOKS_ROOT_DIR), key=natsort_key):
-        book_folder_path = os.path.join(GLOBAL_BOOKS_ROOT_DIR, book_folder_name)
-
-        if not os.path.isdir(book_folder_path):
-            log_orchestrator_message(_('IGNORED_NON_DIRECTORY').format(book_folder_name), "INFO")
-            continue
-
-        if book_folder_name.lower() in EXCLUDE_DIR_NAMES:
-            log_orchestrator_message(_('IGNORED_EXCLUDED_DIR').format(book_folder_name), "INFO")
-            continue
-
-        # --- NOUVELLE LOGIQUE : Sauter le livre entier si marqué comme COMPLET ---
-        if last_processed_chapters_by_book.get(book_folder_name) is True:
-            log_orchestrator_message(f"\n========================================================", level="INFO")
-            log_orchestrator_message(_('BOOK_MARKED_AS_PROCESSED_SKIP').format(book_folder_name), "INFO")
-            log_orchestrator_message(f"========================================================", level="INFO")
-            chapter_units_for_this_book_temp = []
-            for item_in_book_folder_name in sorted(os.listdir(book_folder_path), key=natsort_key):
-                item_in_book_folder_path = os.path.join(book_folder_path, item_in_book_folder_name)
-                if os.path.isdir(item_in_book_folder_path) and item_in_book_folder_name.lower() not in EXCLUDE_DIR_NAMES.union({
-                    PROCESSED_IMAGES_SUBFOLDER_NAME.lower(), OUTPUT_TEXT_SUBFOLDER_NAME.lower(), 
-                    OUTPUT_CLEANED_TEXT_SUBFOLDER_NAME.lower(), FINAL_COLLECTED_TEXTS_SUBFOLDER_NAME.lower(),
-                    '__pycache__'}):
-                    chapter_units_for_this_book_temp.append(item_in_book_folder_path)
-                elif item_in_book_folder_name.lower().endswith('.cbz'):
-                     chapter_units_for_this_book_temp.append(item_in_book_folder_path)
-            book_chapter_units_map[book_folder_path] = chapter_units_for_this_book_temp
-            continue
-
+# --- État du fichier .cbz source : (taille:date, signature des CRC), ou None si l'archive est illisible ---
+def read_cbz_source_state(cbz_file_path):
+    try:
+        return cbz_archive.archive_file_stat(cbz_file_path), cbz_archive.compute_archive_signature(cbz_file_path)
+    except (OSError, zipfile.BadZipFile):
+        return None
+
+# --- Le fichier .cbz d'un chapitre terminé a-t-il été remplacé depuis son traitement ? ---
+# Si la taille et la date n'ont pas changé, l'archive n'est pas relue ; sinon seules les signatures des CRC sont comparées
+# (une archive simplement recopiée ou touchée n'est pas retraitée).
+def cbz_source_changed(cbz_file_path, stored_source_state, book_folder_name, chapter_unit_path, state_store):
+    try:
+        file_stat = cbz_archive.archive_file_stat(cbz_file_path)
+    except OSError:
+        return False
+    if stored_source_state is not None and stored_source_state[0] == file_stat:
+        return False
+    source_state = read_cbz_source_state(cbz_file_path)
+    if source_state is None:
+        return False
+    if stored_source_state is not None and stored_source_state[1] != source_state[1]:
+        return True
+    # Chapitre traité avant l'enregistrement des signatures, ou archive identique : on mémorise son état actuel
+    state_store.set_chapter_source(book_folder_name, chapter_unit_path, *source_state)
+    return False
+
+# --- Dossier de chapitre d'un fichier .cbz (créé par extract_cbz_content) ---
+def cbz_chapter_unit_path(cbz_file_path):
+    return os.path.join(os.path.dirname(cbz_file_path), f"{os.path.splitext(os.path.basename(cbz_file_path))[0]}_unzipped")
+
+# --- Liste les unités de chapitre d'un livre avec un seul os.scandir (appelée en parallèle pour tous les livres) ---
+# Les fichiers .cbz ne sont pas extraits ici : leur extraction est faite par la tâche du chapitre, juste avant son traitement.
+# Retourne (unités de chapitre triées, {unité de chapitre: fichier .cbz source}).
+def discover_book_chapter_units(book_folder_path, log_items=True):
+    book_folder_name = os.path.basename(book_folder_path)
+    if log_items:
         log_orchestrator_message(f"\n========================================================", level="INFO")
         log_orchestrator_message(_('START_DETECTION_BOOK').format(book_folder_name), level="INFO")
         log_orchestrator_message(_('BOOK_FOLDER_PATH').format(book_folder_path), level="INFO")
         log_orchestrator_message(f"========================================================", level="INFO")
 
-        chapter_units_for_this_book = []
-
-        for item_in_book_folder_name in sorted(os.listdir(book_folder_path), key=natsort_key):
-            item_in_book_folder_path = os.path.join(book_folder_path, item_in_book_folder_name)
-
-            all_excluded_items = {
-                PROCESSED_IMAGES_SUBFOLDER_NAME.lower(),
-                OUTPUT_TEXT_SUBFOLDER_NAME.lower(),
-                OUTPUT_CLEANED_TEXT_SUBFOLDER_NAME.lower(),
-                FINAL_COLLECTED_TEXTS_SUBFOLDER_NAME.lower()
-            }.union(EXCLUDE_DIR_NAMES)
+    all_excluded_items = {
+        PROCESSED_IMAGES_SUBFOLDER_NAME.lower(),
+        OUTPUT_TEXT_SUBFOLDER_NAME.lower(),
+        OUTPUT_CLEANED_TEXT_SUBFOLDER_NAME.lower(),
+        FINAL_COLLECTED_TEXTS_SUBFOLDER_NAME.lower()
+    }.union(EXCLUDE_DIR_NAMES)
+
+    with os.scandir(book_folder_path) as entries:
+        book_entries = sorted(entries, key=lambda entry: natsort_key(entry.name))
+    cbz_base_names = {os.path.splitext(entry.name)[0].lower() for entry in book_entries
+                      if entry.name.lower().endswith('.cbz') and entry.is_file()}
+
+    chapter_units_for_this_book = []
+    cbz_sources = {}
+    for entry in book_entries:
+        item_name_lower = entry.name.lower()
+
+        if item_name_lower in all_excluded_items:
+            if log_items:
+                log_orchestrator_message(_('IGNORED_SYSTEM_SUBFOLDER').format(entry.name), "INFO")
+            continue
 
-            if item_in_book_folder_name.lower() in all_excluded_items:
-                log_orchestrator_message(_('IGNORED_SYSTEM_SUBFOLDER').format(item_in_book_folder_name), "INFO")
+        if entry.is_dir():
+            # Dossier d'extraction d'un .cbz encore présent : c'est le .cbz qui représente ce chapitre
+            if item_name_lower.endswith('_unzipped') and item_name_lower[:-len('_unzipped')] in cbz_base_names:
                 continue
-            
-            if not os.path.isdir(item_in_book_folder_path) and not item_in_book_folder_name.lower().endswith('.cbz'):
-                log_orchestrator_message(_('IGNORED_NON_CBZ_FILE').format(item_in_book_folder_name), "INFO")
+            chapter_units_for_this_book.append(entry.path)
+
+        elif item_name_lower.endswith('.cbz') and entry.is_file():
+            if log_items:
+                log_orchestrator_message(_('CBZ_QUEUED').format(entry.name), "INFO")
+            chapter_unit_path = cbz_chapter_unit_path(entry.path)
+            cbz_sources[chapter_unit_path] = entry.path
+            chapter_units_for_this_book.append(chapter_unit_path)
+
+        elif log_items:
+            log_orchestrator_message(_('IGNORED_NON_CBZ_FILE').format(entry.name), "INFO")
+
+    chapter_units_for_this_book.sort(key=natsort_key)
+    return chapter_units_for_this_book, cbz_sources
+
+# --- Liste les dossiers de livres de la bibliothèque (os.scandir), triés ---
+def list_book_folders():
+    book_folder_paths = []
+    with os.scandir(GLOBAL_BOOKS_ROOT_DIR) as entries:
+        for entry in sorted(entries, key=lambda entry: natsort_key(entry.name)):
+            if not entry.is_dir():
+                log_orchestrator_message(_('IGNORED_NON_DIRECTORY').format(entry.name), "INFO")
                 continue
-            
-            if os.path.isdir(item_in_book_folder_path):
-                chapter_units_for_this_book.append(item_in_book_folder_path)
-            
-            elif os.path.isfile(item_in_book_folder_path) and item_in_book_folder_name.lower().endswith('.cbz'):
-                log_orchestrator_message(_('CBZ_DETECTED').format(item_in_book_folder_name), "INFO")
-                extracted_chapter_unit_path = extract_cbz_content(item_in_book_folder_path, book_folder_path)
-                if extracted_chapter_unit_path:
-                    chapter_units_for_this_book.append(extracted_chapter_unit_path)
-                    log_orchestrator_message(_('CBZ_EXTRACTED').format(item_in_book_folder_name), "INFO")
-                else:
-                    log_orchestrator_message(_('CBZ_EXTRACTION_FAILED').format(item_in_book_folder_name), "ERROR")
-            
-        chapter_units_for_this_book.sort(key=natsort_key)
 
-        if not chapter_units_for_this_book:
-            log_orchestrator_message(_('NO_CHAPTER_UNIT_FOUND').format(book_folder_name), "WARNING")
-            continue
-
-        book_chapter_units_map[book_folder_path] = chapter_units_for_this_book
-        
-        # --- LOGIQUE DE REPRISE : Filtrer les chapitres déjà traités pour ce livre ---
-        chapters_to_submit_for_book = []
-        last_processed_status_for_book = last_processed_chapters_by_book.get(book_folder_name)
-
-        if last_processed_status_for_book is True:
-            log_orchestrator_message(_('DOUBLE_CHECK_PROCESSED').format(book_folder_name), "INFO")
-            chapters_to_submit_for_book = []
-        elif last_processed_status_for_book:
-            log_orchestrator_message(_('RESUME_POINT_DETECTED').format(book_folder_name, os.path.basename(last_processed_status_for_book)), "INFO")
-            found_last_processed = False
-            for chapter_path in chapter_units_for_this_book:
-                if found_last_processed:
-                    chapters_to_submit_for_book.append(chapter_path)
-                elif chapter_path == last_processed_status_for_book:
-                    found_last_processed = True
-                    log_orchestrator_message(_('RESUMING_AFTER_CHAPTER').format(os.path.basename(chapter_path)), "INFO")
-                else:
-                    log_orchestrator_message(_('IGNORED_ALREADY_PROCESSED').format(os.path.basename(chapter_path)), "DEBUG")
-            
-            if not found_last_processed and chapters_to_submit_for_book:
-                log_orchestrator_message(_('RESUME_POINT_NOT_FOUND').format(os.path.basename(last_processed_status_for_book), book_folder_name), "WARNING")
-            elif not found_last_processed and not chapters_to_submit_for_book:
-                 log_orchestrator_message(_('RESUME_POINT_NOT_FOUND_NO_MORE').format(os.path.basename(last_processed_status_for_book)), "WARNING")
+            if entry.name.lower() in EXCLUDE_DIR_NAMES:
+                log_orchestrator_message(_('IGNORED_EXCLUDED_DIR').format(entry.name), "INFO")
+                continue
 
+            book_folder_paths.append(entry.path)
+    return book_folder_paths
+
+# --- Tâche d'un chapitre lancée dans le pool : sa durée sert au taux d'occupation des places du pool ---
+# Les en-têtes des pages (dimensions, mode) servent aux mesures des étapes, à la liste des chapitres les plus lents
+# et à l'estimation du pic de mémoire du chapitre : la tâche attend que cette mémoire tienne dans le budget (memory_budget).
+def _run_chapter_unit_task(task_args):
+    chapter_unit_path, book_folder_name, state_store, _book_output_index, cbz_file_path = task_args
+    page_headers = None
+    if run_metrics.is_enabled() or memory_budget.is_enabled():
+        page_headers = chapter_scheduler.read_chapter_page_headers(chapter_unit_path, cbz_file_path)
+    page_sizes = [page_header[0] for page_header in page_headers] if page_headers else None
+    image_size = chapter_scheduler.get_chapter_image_size(page_sizes) if page_sizes else None
+    estimated_memory_bytes = (memory_budget.estimate_chapter_unit_peak_memory(page_headers, split_large_images.MAX_IMAGE_HEIGHT,
+                                                                              split_large_images.PAGE_WORKER_THREADS)
+                              if page_headers else memory_budget.CHAPTER_UNIT_OVERHEAD_BYTES)
+    try:
+        with memory_budget.reserve(estimated_memory_bytes) as memory_wait_seconds:
+            if memory_budget.is_enabled():
+                run_metrics.record_stage('memory_wait', memory_wait_seconds, book_folder_name, chapter_unit_path)
+            start_time = time.monotonic()
+            try:
+                return _process_single_chapter_unit(*task_args, page_sizes=page_sizes)
+            finally:
+                run_metrics.record_chapter_task(time.monotonic() - start_time, book_folder_name, chapter_unit_path, image_size)
+    finally:
+        if chapter_leases.is_enabled():
+            release_chapter_lease(book_folder_name, chapter_unit_path, state_store)
+
+# --- Mode distribué : source d'une unité de chapitre (fichier .cbz, ou sa page modifiée le plus récemment), à laquelle son marqueur .done est comparé ---
+def chapter_source_path(chapter_unit_path):
+    if chapter_unit_path.endswith('_unzipped'):
+        cbz_file_path = chapter_unit_path[:-len('_unzipped')] + '.cbz'
+        if os.path.exists(cbz_file_path):
+            return cbz_file_path
+    try:
+        page_paths = [source_path for source_path, _member_name in split_large_images.find_chapter_pages(chapter_unit_path)]
+        return max(page_paths, key=os.path.getmtime) if page_paths else None
+    except OSError:
+        return None
+
+# --- Mode distribué : réserve un chapitre avant de le lancer ; retourne CLAIM_ACQUIRED, CLAIM_BUSY ou CLAIM_DONE ---
+# Un chapitre déjà traité par une autre machine est enregistré comme terminé dans la base d'état de cette machine.
+def claim_chapter_lease(book_folder_name, chapter_unit_path, state_store):
+    try:
+        claim_status, expired_owner = chapter_leases.claim_chapter(book_folder_name, chapter_unit_path, chapter_source_path(chapter_unit_path))
+    except OSError as e:
+        log_orchestrator_message(_('LEASE_ERROR').format(os.path.basename(chapter_unit_path), book_folder_name, e), "WARNING")
+        return chapter_leases.CLAIM_BUSY
+    if expired_owner:
+        log_orchestrator_message(_('LEASE_RECLAIMED').format(os.path.basename(chapter_unit_path), book_folder_name, expired_owner), "WARNING")
+    if claim_status == chapter_leases.CLAIM_DONE:
+        log_orchestrator_message(_('LEASE_CHAPTER_DONE_ELSEWHERE').format(os.path.basename(chapter_unit_path), book_folder_name), "INFO")
+        save_processed_chapter(state_store, book_folder_name, chapter_unit_path)
+    elif claim_status == chapter_leases.CLAIM_BUSY:
+        log_orchestrator_message(_('LEASE_CHAPTER_BUSY').format(os.path.basename(chapter_unit_path), book_folder_name, LEASE_RETRY_SECONDS), "DEBUG")
+    return claim_status
+
+# --- Mode distribué : libère le bail d'un chapitre, avec un marqueur .done s'il a été terminé ---
+def release_chapter_lease(book_folder_name, chapter_unit_path, state_store):
+    try:
+        chapter_leases.release_chapter(book_folder_name, chapter_unit_path,
+                                       state_store.get_chapter_status(book_folder_name, chapter_unit_path) == CHAPTER_STATUS_DONE)
+    except OSError as e:
+        log_orchestrator_message(_('LEASE_ERROR').format(os.path.basename(chapter_unit_path), book_folder_name, e), "WARNING")
+
+# --- Un chapitre est-il sorti de sa tâche sans être terminé (étape échouée ou hors délai, .cbz illisible...) ? ---
+def chapter_unit_failed(book_folder_name, chapter_unit_path, state_store):
+    return state_store.get_chapter_status(book_folder_name, chapter_unit_path) != CHAPTER_STATUS_DONE
+
+# --- Chapitre échoué : retourne le délai avant son nouvel essai, ou None s'il vient d'être mis en quarantaine ---
+# Un chapitre interrompu par l'arrêt du pool de workers est réessayé aussitôt, sans que cet échec lui soit compté.
+def handle_failed_chapter_unit(book_folder_name, chapter_unit_path, state_store, retries):
+    with _interrupted_chapter_units_lock:
+        interrupted = chapter_unit_path in _interrupted_chapter_units
+        _interrupted_chapter_units.discard(chapter_unit_path)
+    if interrupted:
+        log_orchestrator_message(_('CHAPTER_RETRY_NOT_COUNTED').format(os.path.basename(chapter_unit_path), book_folder_name),
+                                 "WARNING", chapter=chapter_unit_path)
+        return 0
+    retry_delay = retries.record_failure(book_folder_name, chapter_unit_path)
+    if retry_delay is not None:
+        log_orchestrator_message(_('CHAPTER_RETRY_SCHEDULED').format(os.path.basename(chapter_unit_path), book_folder_name,
+                                                                      retries.get_failed_attempts(chapter_unit_path), retries.max_attempts,
+                                                                      retry_delay), "WARNING", chapter=chapter_unit_path)
+        return retry_delay
+    state_store.mark_chapter_quarantined(book_folder_name, chapter_unit_path)
+    log_orchestrator_message(_('CHAPTER_QUARANTINED').format(os.path.basename(chapter_unit_path), book_folder_name, retries.max_attempts),
+                             "ERROR", chapter=chapter_unit_path)
+    log_global_error(_('CHAPTER_QUARANTINED_DETAILS').format(retries.max_attempts), chapter_unit_path, "orchestrator.py")
+    return None
+
+# --- Prépare les chapitres d'un livre qui ne sont pas encore terminés (appelée dans les threads de détection) ---
+# Retourne [(unité de chapitre, coût estimé, arguments de _process_single_chapter_unit)], à placer dans l'ordonnanceur.
+def plan_book_chapter_units(book_folder_path, chapter_units_for_this_book, state_store, cbz_sources=None):
+    book_folder_name = os.path.basename(book_folder_path)
+    planned_chapter_units = []
+
+    # --- LOGIQUE DE REPRISE : ne soumettre que les chapitres qui ne sont pas encore terminés ---
+    # (l'ensemble exact des chapitres terminés est lu dans la base d'état, quel que soit leur ordre de fin)
+    completed_chapters_for_book = state_store.get_completed_chapters(book_folder_name)
+    quarantined_chapters_for_book = state_store.get_quarantined_chapters(book_folder_name)
+    stored_source_states = state_store.get_chapter_sources(book_folder_name) if cbz_sources else {}
+    chapters_to_submit_for_book = []
+    for chapter_path in chapter_units_for_this_book:
+        cbz_file_path = (cbz_sources or {}).get(chapter_path)
+        if (chapter_path in completed_chapters_for_book and cbz_file_path
+                and cbz_source_changed(cbz_file_path, stored_source_states.get(chapter_path), book_folder_name, chapter_path, state_store)):
+            # Le .cbz a été remplacé par une archive au contenu différent : le chapitre est retraité
+            log_orchestrator_message(_('CBZ_CHANGED_REPROCESS').format(os.path.basename(cbz_file_path), book_folder_name), "INFO")
+            reset_changed_chapter_unit(chapter_path, book_folder_path, state_store)
+            completed_chapters_for_book.discard(chapter_path)
+        if chapter_path in completed_chapters_for_book:
+            log_orchestrator_message(_('IGNORED_ALREADY_PROCESSED').format(os.path.basename(chapter_path)), "DEBUG")
+        elif chapter_path in quarantined_chapters_for_book:
+            log_orchestrator_message(_('QUARANTINED_CHAPTER_SKIPPED').format(os.path.basename(chapter_path), book_folder_name), "WARNING")
         else:
-            chapters_to_submit_for_book = chapter_units_for_this_book
+            chapters_to_submit_for_book.append(chapter_path)
 
+    if completed_chapters_for_book:
+        log_orchestrator_message(_('RESUME_COMPLETED_CHAPTERS').format(book_folder_name, len(chapter_units_for_this_book) - len(chapters_to_submit_for_book), len(chapter_units_for_this_book)), "INFO")
 
-        if not chapters_to_submit_for_book:
-            log_orchestrator_message(_('ALL_CHAPTERS_ALREADY_PROCESSED').format(book_folder_name), "INFO")
-        else:
-            log_orchestrator_message(_('SUBMITTING_CHAPTERS').format(len(chapters_to_submit_for_book), book_folder_name), "INFO")
-            for chapter_unit_path in chapters_to_submit_for_book:
-                future = executor.submit(_process_single_chapter_unit, chapter_unit_path, book_folder_name, last_processed_chapters_by_book)
-                all_futures.append(future)
-
-    log_orchestrator_message(_('ALL_TASKS_SUBMITTED'), "INFO")
-    for future in as_completed(all_futures):
-        result_message = future.result()
-        log_orchestrator_message(result_message, "INFO")
-
-log_orchestrator_message(_('START_POST_PROCESSING'), "INFO")
-for book_folder_path, chapter_units_list in sorted(book_chapter_units_map.items(), key=lambda item: natsort_key(os.path.basename(item[0]))):
+    if not chapters_to_submit_for_book:
+        log_orchestrator_message(_('ALL_CHAPTERS_ALREADY_PROCESSED').format(book_folder_name), "INFO")
+    else:
+        log_orchestrator_message(_('SUBMITTING_CHAPTERS').format(len(chapters_to_submit_for_book), book_folder_name), "INFO")
+        book_output_index = build_book_output_index(book_folder_path, chapters_to_submit_for_book)
+        for chapter_unit_path in chapters_to_submit_for_book:
+            cbz_file_path = (cbz_sources or {}).get(chapter_unit_path)
+            cost = chapter_scheduler.estimate_chapter_unit_cost(chapter_unit_path, cbz_file_path)
+            planned_chapter_units.append((chapter_unit_path, cost,
+                                          (chapter_unit_path, book_folder_name, state_store, book_output_index, cbz_file_path)))
+    return planned_chapter_units
+
+# --- Tâche de détection d'un livre : liste ses unités de chapitre et prépare celles qui restent à traiter ---
+def discover_and_plan_book(book_folder_path, state_store):
+    chapter_units_for_this_book, cbz_sources = discover_book_chapter_units(book_folder_path)
+    if not chapter_units_for_this_book:
+        return chapter_units_for_this_book, []
+    return chapter_units_for_this_book, plan_book_chapter_units(book_folder_path, chapter_units_for_this_book, state_store, cbz_sources)
+
+# --- Post-traitement d'un livre : si tous ses chapitres sont terminés (dans cette exécution ou une précédente),
+# rassemble les textes finaux, supprime les dossiers intermédiaires et marque le livre comme complet ---
+# chapter_units_to_collect : chapitres dont les textes sont à rassembler (par défaut, tous ceux du livre).
+def finalize_book(book_folder_path, chapter_units_list, state_store, chapter_units_to_collect=None):
     book_folder_name = os.path.basename(book_folder_path)
-    
-    is_book_marked_as_complete = last_processed_chapters_by_book.get(book_folder_name) is True
-
-    if is_book_marked_as_complete:
-        log_orchestrator_message(_('BOOK_IS_PROCESSED').format(book_folder_name), "INFO")
-        collect_final_texts(book_folder_path, chapter_units_list)
+    if chapter_units_to_collect is None:
+        chapter_units_to_collect = chapter_units_list
 
-        for chapter_unit_path_for_cleanup in chapter_units_list:
+    completed_chapters_for_book = state_store.get_completed_chapters(book_folder_name)
+    if chapter_leases.is_enabled():
+        # Chapitres terminés par les autres machines
+        for chapter_path in chapter_units_list:
+            if chapter_path not in completed_chapters_for_book and chapter_leases.is_chapter_done(book_folder_name, chapter_path, chapter_source_path(chapter_path)):
+                save_processed_chapter(state_store, book_folder_name, chapter_path)
+                completed_chapters_for_book.add(chapter_path)
+    all_chapters_processed_in_this_run = all(chapter_path in completed_chapters_for_book for chapter_path in chapter_units_list)
+
+    if all_chapters_processed_in_this_run:
+        # Mode distribué : une seule machine rassemble les textes du livre
+        if chapter_leases.is_enabled():
+            claim_status, _expired_owner = chapter_leases.claim_book(book_folder_name, book_folder_path)
+            if claim_status == chapter_leases.CLAIM_DONE:
+                log_orchestrator_message(_('LEASE_BOOK_DONE_ELSEWHERE').format(book_folder_name), "INFO")
+                state_store.mark_book_complete(book_folder_name)
+                return True
+            if claim_status == chapter_leases.CLAIM_BUSY:
+                log_orchestrator_message(_('LEASE_BOOK_BUSY').format(book_folder_name), "INFO")
+                return False
+        log_orchestrator_message(_('BOOK_POST_PROCESSING_STARTED').format(book_folder_name), "INFO")
+        collect_final_texts(book_folder_path, chapter_units_to_collect)
+
+        for chapter_unit_path_for_cleanup in chapter_units_to_collect:
             cleanup_intermediate_folders(chapter_unit_path_for_cleanup, [OUTPUT_TEXT_SUBFOLDER_NAME, OUTPUT_CLEANED_TEXT_SUBFOLDER_NAME])
             if chapter_unit_path_for_cleanup.endswith('_unzipped'):
                 cleanup_intermediate_folders(chapter_unit_path_for_cleanup, ["."])
@@ -426,16 +771,377 @@ for book_folder_path, chapter_units_list in sorted(book_chapter_units_map.items(
         log_orchestrator_message(f"\n========================================================", level="INFO")
         log_orchestrator_message(_('BOOK_COMPLETE_PROCESSING_MSG').format(book_folder_name), level="INFO")
         log_orchestrator_message(f"========================================================", level="INFO")
+        state_store.mark_book_complete(book_folder_name)
+        if chapter_leases.is_enabled():
+            chapter_leases.release_book(book_folder_name, done=True)
+        refresh_metrics_textfile()
+        return True
+
+    log_orchestrator_message(_('BOOK_INCOMPLETE_SKIP').format(book_folder_name), "WARNING")
+    refresh_metrics_textfile()
+    return False
+
+# --- Réécrit le fichier Prometheus pendant l'exécution (après chaque livre), pour suivre l'avancement ---
+def refresh_metrics_textfile():
+    if not METRICS_PROMETHEUS_TEXTFILE_PATH:
+        return
+    if memory_budget.is_enabled():
+        run_metrics.record_memory_budget(memory_budget.get_stats())
+    try:
+        run_metrics.write_prometheus_textfile(METRICS_PROMETHEUS_TEXTFILE_PATH)
+    except OSError as e:
+        log_orchestrator_message(_('METRICS_WRITE_FAILED').format(METRICS_PROMETHEUS_TEXTFILE_PATH, e), "WARNING")
+
+# --- Mode watch : filtre des éléments surveillés (dossiers de chapitre et fichiers .cbz des livres non exclus) ---
+def is_watched_library_item(book_folder_name, item_name, is_dir):
+    if book_folder_name.lower() in EXCLUDE_DIR_NAMES:
+        return False
+    item_name_lower = item_name.lower()
+    if not is_dir:
+        return item_name_lower.endswith('.cbz')
+    all_excluded_items = {
+        PROCESSED_IMAGES_SUBFOLDER_NAME.lower(),
+        OUTPUT_TEXT_SUBFOLDER_NAME.lower(),
+        OUTPUT_CLEANED_TEXT_SUBFOLDER_NAME.lower(),
+        FINAL_COLLECTED_TEXTS_SUBFOLDER_NAME.lower()
+    }.union(EXCLUDE_DIR_NAMES)
+    # Les dossiers _unzipped sont créés par l'extraction des .cbz, eux-mêmes surveillés
+    return item_name_lower not in all_excluded_items and not item_name_lower.endswith('_unzipped')
+
+# --- Mode watch : un chapitre déjà terminé a changé, on efface son avancement et ses textes pour le retraiter ---
+def reset_changed_chapter_unit(chapter_unit_path, book_folder_path, state_store):
+    state_store.forget_chapter(os.path.basename(book_folder_path), chapter_unit_path)
+    cleanup_intermediate_folders(chapter_unit_path, [PROCESSED_IMAGES_SUBFOLDER_NAME, OUTPUT_TEXT_SUBFOLDER_NAME, OUTPUT_CLEANED_TEXT_SUBFOLDER_NAME])
+
+    # Seul le texte final produit par ce chapitre est supprimé (pas ceux de ses voisins "Chapter 12" / "Chapter 12.5")
+    final_text_path = os.path.join(book_folder_path, FINAL_COLLECTED_TEXTS_SUBFOLDER_NAME,
+                                   f"{OCR.format_output_filename_base(os.path.basename(chapter_unit_path))}.txt")
+    try:
+        os.remove(final_text_path)
+    except FileNotFoundError:
+        pass
+
+# --- Mode watch : met en file un élément nouveau ou modifié (dossier de chapitre ou fichier .cbz) ---
+# retry : nouvel essai d'un chapitre échoué (son contenu n'a pas changé, ses échecs précédents sont conservés)
+def queue_watched_item(executor, item_path, state_store, book_chapter_units_map, watched_books, in_flight, changed_while_running,
+                       retries, retry=False):
+    book_folder_path = os.path.dirname(item_path)
+    book_folder_name = os.path.basename(book_folder_path)
+    item_name = os.path.basename(item_path)
+    is_cbz = item_name.lower().endswith('.cbz')
+    chapter_unit_path = cbz_chapter_unit_path(item_path) if is_cbz else item_path
+
+    # Le chapitre est en cours de traitement : il sera retraité dès la fin du traitement en cours
+    if any(running_chapter_unit_path == chapter_unit_path for _book, running_chapter_unit_path, _item in in_flight.values()):
+        log_orchestrator_message(_('WATCH_CHANGED_WHILE_RUNNING').format(item_name, book_folder_name), "INFO")
+        changed_while_running.add(item_path)
+        return
+
+    log_orchestrator_message(_('WATCH_ITEM_DETECTED').format(item_name, book_folder_name), "INFO")
+
+    # Mode distribué : toutes les machines voient le nouvel élément, une seule le traite
+    if chapter_leases.is_enabled() and claim_chapter_lease(book_folder_name, chapter_unit_path, state_store) != chapter_leases.CLAIM_ACQUIRED:
+        return
+
+    if book_folder_path not in watched_books:
+        # Le livre ne pourra être marqué complet que s'il l'était déjà (ou s'il est nouveau) et que ses nouveaux chapitres réussissent
+        watched_books[book_folder_path] = {
+            'was_complete': state_store.is_book_complete(book_folder_name) or book_folder_path not in book_chapter_units_map,
+            'chapter_units': [],
+        }
+
+    if chapter_unit_path in state_store.get_completed_chapters(book_folder_name):
+        log_orchestrator_message(_('WATCH_CHAPTER_CHANGED').format(os.path.basename(chapter_unit_path), book_folder_name), "INFO")
+        reset_changed_chapter_unit(chapter_unit_path, book_folder_path, state_store)
+    elif not retry:
+        # Nouveau contenu : un chapitre en quarantaine ou déjà en échec repart avec tous ses essais
+        retries.reset(chapter_unit_path)
+        if chapter_unit_path in state_store.get_quarantined_chapters(book_folder_name):
+            state_store.forget_chapter(book_folder_name, chapter_unit_path)
+
+    state_store.mark_book_in_progress(book_folder_name)
+    book_chapter_units = book_chapter_units_map.setdefault(book_folder_path, [])
+    if chapter_unit_path not in book_chapter_units:
+        book_chapter_units.append(chapter_unit_path)
+        book_chapter_units.sort(key=natsort_key)
+    if chapter_unit_path not in watched_books[book_folder_path]['chapter_units']:
+        watched_books[book_folder_path]['chapter_units'].append(chapter_unit_path)
+
+    book_output_index = build_book_output_index(book_folder_path, [chapter_unit_path])
+    future = executor.submit(_run_chapter_unit_task, (chapter_unit_path, book_folder_name, state_store, book_output_index,
+                                                      item_path if is_cbz else None))
+    in_flight[future] = (book_folder_path, chapter_unit_path, item_path)
+
+# --- Mode watch : traite les chapitres terminés et finalise les livres qui n'ont plus de chapitre en cours ---
+# retry_items : {élément échoué: heure de son nouvel essai}, complété ici ; ses livres ne sont pas finalisés en attendant
+# (None à l'arrêt du mode watch : les chapitres échoués seront réessayés au prochain lancement)
+def collect_finished_watched_chapters(executor, state_store, book_chapter_units_map, watched_books, in_flight, changed_while_running,
+                                      retries, retry_items):
+    for future in [future for future in in_flight if future.done()]:
+        book_folder_path, chapter_unit_path, item_path = in_flight.pop(future)
+        book_folder_name = os.path.basename(book_folder_path)
+        log_orchestrator_message(future.result(), "INFO")
+        if item_path in changed_while_running:
+            changed_while_running.discard(item_path)
+            if chapter_leases.is_enabled():
+                chapter_leases.forget_chapter(book_folder_name, chapter_unit_path)
+            queue_watched_item(executor, item_path, state_store, book_chapter_units_map, watched_books, in_flight, changed_while_running, retries)
+        elif retry_items is not None and chapter_unit_failed(book_folder_name, chapter_unit_path, state_store):
+            retry_delay = handle_failed_chapter_unit(book_folder_name, chapter_unit_path, state_store, retries)
+            if retry_delay is not None:
+                retry_items[item_path] = time.monotonic() + retry_delay
+        else:
+            retries.reset(chapter_unit_path)
+
+    books_in_flight = {book_folder_path for book_folder_path, _chapter, _item in in_flight.values()}
+    books_in_flight.update(os.path.dirname(item_path) for item_path in retry_items or ())
+    for book_folder_path in [book_folder_path for book_folder_path in watched_books if book_folder_path not in books_in_flight]:
+        watched_book = watched_books.pop(book_folder_path)
+        if watched_book['was_complete']:
+            finalize_book(book_folder_path, watched_book['chapter_units'], state_store)
+        else:
+            log_orchestrator_message(_('BOOK_INCOMPLETE_SKIP').format(os.path.basename(book_folder_path)), "WARNING")
+
+# --- Mode watch : surveille la bibliothèque et traite les nouveaux chapitres / .cbz dès que leur copie est terminée ---
+# S'arrête avec Ctrl+C, après avoir terminé les chapitres en cours.
+def watch_library(state_store, book_chapter_units_map, retries):
+    watcher = library_watcher.LibraryWatcher(GLOBAL_BOOKS_ROOT_DIR, is_watched_library_item,
+                                             config.WATCH_POLL_INTERVAL_SECONDS, config.WATCH_DEBOUNCE_SECONDS,
+                                             config.WATCH_BACKEND)
+    backend = watcher.start()
+    log_orchestrator_message(_('WATCH_MODE_STARTED').format(GLOBAL_BOOKS_ROOT_DIR, backend, config.WATCH_DEBOUNCE_SECONDS), "INFO")
+
+    watched_books = {}
+    in_flight = {}
+    changed_while_running = set()
+    retry_items = {}
+    try:
+        with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_CHAPTER_UNITS) as executor:
+            try:
+                while True:
+                    for item_path in watcher.wait_for_stable_items():
+                        retry_items.pop(item_path, None)
+                        queue_watched_item(executor, item_path, state_store, book_chapter_units_map, watched_books, in_flight, changed_while_running, retries)
+                    now = time.monotonic()
+                    for item_path in [item_path for item_path, retry_at in retry_items.items() if retry_at <= now]:
+                        del retry_items[item_path]
+                        queue_watched_item(executor, item_path, state_store, book_chapter_units_map, watched_books, in_flight, changed_while_running,
+                                           retries, retry=True)
+                    collect_finished_watched_chapters(executor, state_store, book_chapter_units_map, watched_books, in_flight, changed_while_running,
+                                                      retries, retry_items)
+            except KeyboardInterrupt:
+                log_orchestrator_message(_('WATCH_MODE_STOPPING').format(len(in_flight)), "INFO")
+                changed_while_running.clear()
+                retry_items.clear()
+                wait(list(in_flight))
+                collect_finished_watched_chapters(executor, state_store, book_chapter_units_map, watched_books, in_flight, changed_while_running,
+                                                  retries, None)
+    finally:
+        watcher.stop()
+
+# --- Journalise les chapitres les plus lents de l'exécution, avec les dimensions de leur image ---
+def log_slowest_chapters(count):
+    slowest_tasks = run_metrics.slowest_chapter_tasks(count)
+    if not slowest_tasks:
+        return
+    log_orchestrator_message(_('SLOWEST_CHAPTERS_HEADER').format(len(slowest_tasks)), "INFO")
+    for rank, chapter_task in enumerate(slowest_tasks, 1):
+        image_size = chapter_task['image_size']
+        dimensions = f"{image_size[0]}x{image_size[1]}" if image_size else "?"
+        log_orchestrator_message(_('SLOWEST_CHAPTER_LINE').format(rank, chapter_task['book'], os.path.basename(chapter_task['chapter']),
+                                                                   chapter_task['duration_seconds'], dimensions), "INFO")
+
+# --- Processus principal ---
+# priority_books : noms de dossiers de livres à traiter en premier (en plus de PRIORITY_BOOKS)
+# retry_quarantined : les chapitres mis en quarantaine par les exécutions précédentes sont retraités
+def main(watch_mode=None, priority_books=None, profile=None, slowest_chapters=None, distributed=None, retry_quarantined=False):
+    if watch_mode is None:
+        watch_mode = config.WATCH_MODE
+    if distributed is None:
+        distributed = DISTRIBUTED_MODE
+    if profile is None:
+        profile = PROFILE_MODE
+    if slowest_chapters is None:
+        slowest_chapters = SLOWEST_CHAPTERS_LOG_COUNT
+    priority_books = set(PRIORITY_BOOKS).union(priority_books or [])
+
+    # Nettoyer les logs précédents au démarrage (avant la première ligne de log de cette exécution)
+    if os.path.exists(ORCHESTRATOR_LOG_FILE_PATH):
+        os.remove(ORCHESTRATOR_LOG_FILE_PATH)
+    if os.path.exists(GLOBAL_ERROR_LOG_FILE_PATH):
+        os.remove(GLOBAL_ERROR_LOG_FILE_PATH)
+    if ORCHESTRATOR_JSONL_LOG_FILE_PATH and os.path.exists(ORCHESTRATOR_JSONL_LOG_FILE_PATH):
+        os.remove(ORCHESTRATOR_JSONL_LOG_FILE_PATH)
+
+    # Écrivain de logs en arrière-plan : les workers ne bloquent plus sur les écritures de logs
+    log_sink.start_log_sink(ORCHESTRATOR_JSONL_LOG_FILE_PATH, config.LOG_FLUSH_INTERVAL_SECONDS)
+
+    log_orchestrator_message(_('ORCHESTRATOR_START'), level="INFO")
+    log_orchestrator_message(_('GLOBAL_BOOKS_ROOT_DIR_MSG').format(GLOBAL_BOOKS_ROOT_DIR), level="INFO")
+    log_orchestrator_message(_('MAX_CONCURRENT_CHAPTER_UNITS_MSG').format(MAX_CONCURRENT_CHAPTER_UNITS), level="INFO")
+    if priority_books:
+        log_orchestrator_message(_('PRIORITY_BOOKS_MSG').format(', '.join(sorted(priority_books, key=natsort_key))), level="INFO")
+
+    if os.path.exists(PROGRESS_LOG_FILE_PATH + ".tmp"):
+        os.remove(PROGRESS_LOG_FILE_PATH + ".tmp")
+    # Ne pas supprimer PROGRESS_LOG_FILE_PATH ici, car on le charge en premier.
+
+    # Charger les derniers chapitres traités depuis la base d'état
+    state_store = open_state_store()
+    complete_books = state_store.get_complete_books()
+    completed_chapter_counts = state_store.count_completed_chapters_by_book()
+    if complete_books or completed_chapter_counts:
+        log_orchestrator_message(_('LOADING_RESUME_POINTS').format(len(complete_books.union(completed_chapter_counts))), "INFO")
+        for book_name in sorted(complete_books.union(completed_chapter_counts), key=natsort_key):
+            if book_name in complete_books:
+                log_orchestrator_message(_('BOOK_MARKED_AS_PROCESSED').format(book_name), "INFO")
+            else:
+                log_orchestrator_message(_('BOOK_COMPLETED_CHAPTERS_COUNT').format(book_name, completed_chapter_counts[book_name]), "INFO")
     else:
-        all_chapters_processed_in_this_run = True
-        for chapter_path in chapter_units_list:
-            cleaned_txt_source_dir = os.path.join(chapter_path, OUTPUT_CLEANED_TEXT_SUBFOLDER_NAME)
-            if not (os.path.exists(cleaned_txt_source_dir) and any(f.lower().endswith('.txt') for f in os.listdir(cleaned_txt_source_dir))):
-                all_chapters_processed_in_this_run = False
-                break
-        
-        if all_chapters_processed_in_this_run:
-            log_orchestrator_message(_('BOOK_POST_PROCESSING_STARTED').format(book_folder_name), "INFO")
+        log_orchestrator_message(_('NO_RESUME_POINT_FOUND'), "INFO")
+    if retry_quarantined:
+        log_orchestrator_message(_('QUARANTINE_RELEASED').format(state_store.release_quarantined_chapters()), "INFO")
+    # Chapitres échoués : nouvel essai avec un délai croissant, puis quarantaine
+    retries = chapter_retries.ChapterRetries(CHAPTER_MAX_ATTEMPTS, RETRY_BACKOFF_BASE_SECONDS, RETRY_BACKOFF_MAX_SECONDS)
+
+    # Mode distribué : les chapitres sont réservés par des baux dans LEASE_DIR, partagé avec les autres machines
+    if distributed:
+        chapter_leases.start(LEASE_DIR, NODE_NAME, LEASE_TTL_SECONDS, LEASE_HEARTBEAT_SECONDS)
+        log_orchestrator_message(_('DISTRIBUTED_MODE_STARTED').format(chapter_leases.get_node_name(), LEASE_DIR, LEASE_TTL_SECONDS), "INFO")
+
+    # Démarrage des workers persistants pour les étapes split / OCR / clean
+    if STAGE_EXECUTION_MODE == 'pool':
+        stage_workers.start_stage_workers()
+        log_orchestrator_message(_('STAGE_WORKERS_STARTED').format(stage_workers.get_worker_count()), "INFO")
+
+    # Profilage des étapes : un profil par étape et par chapitre, résumé par étape en fin d'exécution
+    if profile:
+        profiler = stage_profiler.resolve_profiler(PROFILER, STAGE_EXECUTION_MODE)
+        if profiler != PROFILER:
+            log_orchestrator_message(_('PROFILER_UNAVAILABLE').format(PROFILER, profiler), "WARNING")
+        profile_run_dir = stage_profiler.start_profiling(PROFILE_OUTPUT_DIR, profiler)
+        log_orchestrator_message(_('PROFILING_ENABLED').format(profiler, profile_run_dir), "INFO")
+
+    # Budget de mémoire : un chapitre ne démarre que si son pic de mémoire estimé tient dans le budget restant
+    memory_budget_bytes = memory_budget.resolve_budget_bytes(MEMORY_BUDGET_MB)
+    if memory_budget_bytes:
+        memory_budget.start(memory_budget_bytes)
+        log_orchestrator_message(_('MEMORY_BUDGET_MSG').format(memory_budget_bytes / 1024 / 1024), "INFO")
+
+    # Mesures de l'exécution (durées des étapes, débits, attente en file, occupation des workers)
+    run_metrics.start_run('ocr', MAX_CONCURRENT_CHAPTER_UNITS,
+                          stage_workers.get_worker_count() if STAGE_EXECUTION_MODE == 'pool' else None)
+
+    book_chapter_units_map = {}
+
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_CHAPTER_UNITS) as executor, \
+         ThreadPoolExecutor(max_workers=DISCOVERY_THREADS) as discovery_executor:
+        # 1. Phase de Détection et Soumission des Tâches
+        # Les livres sont parcourus en parallèle ; les chapitres d'un livre sont placés dans l'ordonnanceur dès que son parcours
+        # est terminé, sans attendre les autres livres (ni l'extraction des .cbz, faite par les tâches des chapitres).
+        discovery_futures = {}
+        for book_folder_path in list_book_folders():
+            book_folder_name = os.path.basename(book_folder_path)
+
+            # --- NOUVELLE LOGIQUE : Sauter le livre entier si marqué comme COMPLET ---
+            if book_folder_name in complete_books:
+                log_orchestrator_message(f"\n========================================================", level="INFO")
+                log_orchestrator_message(_('BOOK_MARKED_AS_PROCESSED_SKIP').format(book_folder_name), "INFO")
+                log_orchestrator_message(f"========================================================", level="INFO")
+                book_chapter_units_map[book_folder_path] = discover_book_chapter_units(book_folder_path, log_items=False)[0]
+                continue
+
+            discovery_futures[discovery_executor.submit(discover_and_plan_book, book_folder_path, state_store)] = book_folder_path
+
+        # 2. Ordonnancement et attente des tâches : le pool ne reçoit jamais plus de MAX_CONCURRENT_CHAPTER_UNITS chapitres,
+        # le suivant est choisi par l'ordonnanceur à chaque place libre (livres prioritaires, partage équitable, plus long d'abord).
+        # Chaque livre est post-traité dès que son dernier chapitre est terminé, sans attendre le livre le plus lent de l'exécution.
+        scheduler = chapter_scheduler.ChapterScheduler(priority_books)
+        book_remaining_counts = {}
+        chapter_futures = {}
+        pending_futures = set(discovery_futures)
+        # Chapitres en cours sur une autre machine (mode distribué) ou échoués et à réessayer, [(réessai à, livre, unité de chapitre, task)]
+        deferred_chapter_units = []
+        if not discovery_futures:
+            log_orchestrator_message(_('ALL_TASKS_SUBMITTED'), "INFO")
+
+        def count_finished_chapter(book_folder_path):
+            book_remaining_counts[book_folder_path] -= 1
+            if not book_remaining_counts[book_folder_path]:
+                del book_remaining_counts[book_folder_path]
+                finalize_book(book_folder_path, book_chapter_units_map[book_folder_path], state_store)
+
+        while pending_futures or deferred_chapter_units:
+            retry_timeout = None
+            if deferred_chapter_units:
+                retry_timeout = max(0.0, min(retry_at for retry_at, *_deferred in deferred_chapter_units) - time.monotonic())
+            if pending_futures:
+                done_futures, pending_futures = wait(pending_futures, timeout=retry_timeout, return_when=FIRST_COMPLETED)
+            else:
+                time.sleep(retry_timeout)
+                done_futures = set()
+            for done_future in done_futures:
+                if done_future in discovery_futures:
+                    book_folder_path = discovery_futures.pop(done_future)
+                    book_folder_name = os.path.basename(book_folder_path)
+                    chapter_units_for_this_book, planned_chapter_units = done_future.result()
+
+                    if not chapter_units_for_this_book:
+                        log_orchestrator_message(_('NO_CHAPTER_UNIT_FOUND').format(book_folder_name), "WARNING")
+                    else:
+                        book_chapter_units_map[book_folder_path] = chapter_units_for_this_book
+                        if planned_chapter_units:
+                            book_remaining_counts[book_folder_path] = len(planned_chapter_units)
+                            queued_at = time.monotonic()
+                            for chapter_unit_path, cost, task_args in planned_chapter_units:
+                                scheduler.add(book_folder_name, chapter_unit_path, cost, (book_folder_path, task_args, queued_at))
+                        else:
+                            finalize_book(book_folder_path, chapter_units_for_this_book, state_store)
+
+                    if not discovery_futures:
+                        log_orchestrator_message(_('ALL_TASKS_SUBMITTED'), "INFO")
+                else:
+                    log_orchestrator_message(done_future.result(), "INFO")
+                    book_folder_path, book_folder_name, chapter_unit_path, task = chapter_futures.pop(done_future)
+                    if chapter_unit_failed(book_folder_name, chapter_unit_path, state_store):
+                        retry_delay = handle_failed_chapter_unit(book_folder_name, chapter_unit_path, state_store, retries)
+                        if retry_delay is not None:
+                            deferred_chapter_units.append((time.monotonic() + retry_delay, book_folder_name, chapter_unit_path, task))
+                            continue
+                    else:
+                        retries.reset(chapter_unit_path)
+                    count_finished_chapter(book_folder_path)
+
+            # Les chapitres en attente d'une autre machine ou d'un nouvel essai sont remis dans l'ordonnanceur à l'heure de leur réessai
+            now = time.monotonic()
+            for deferred_chapter_unit in [item for item in deferred_chapter_units if item[0] <= now]:
+                deferred_chapter_units.remove(deferred_chapter_unit)
+                _retry_at, book_folder_name, chapter_unit_path, task = deferred_chapter_unit
+                scheduler.add(book_folder_name, chapter_unit_path, 0, task)
+
+            while len(chapter_futures) < MAX_CONCURRENT_CHAPTER_UNITS and len(scheduler):
+                book_folder_name, chapter_unit_path, task = scheduler.pop_next()
+                book_folder_path, task_args, queued_at = task
+                if chapter_leases.is_enabled():
+                    claim_status = claim_chapter_lease(book_folder_name, chapter_unit_path, state_store)
+                    if claim_status == chapter_leases.CLAIM_DONE:
+                        count_finished_chapter(book_folder_path)
+                        continue
+                    if claim_status == chapter_leases.CLAIM_BUSY:
+                        deferred_chapter_units.append((time.monotonic() + LEASE_RETRY_SECONDS, book_folder_name, chapter_unit_path, task))
+                        continue
+                run_metrics.record_queue_wait(time.monotonic() - queued_at)
+                chapter_future = executor.submit(_run_chapter_unit_task, task_args)
+                chapter_futures[chapter_future] = (book_folder_path, book_folder_name, chapter_unit_path, task)
+                pending_futures.add(chapter_future)
+
+    # Livres déjà marqués comme complets : leurs textes restants sont rassemblés
+    log_orchestrator_message(_('START_POST_PROCESSING'), "INFO")
+    for book_folder_path, chapter_units_list in sorted(book_chapter_units_map.items(), key=lambda item: natsort_key(os.path.basename(item[0]))):
+        book_folder_name = os.path.basename(book_folder_path)
+    
+        if book_folder_name in complete_books:
+            log_orchestrator_message(_('BOOK_IS_PROCESSED').format(book_folder_name), "INFO")
             collect_final_texts(book_folder_path, chapter_units_list)
 
             for chapter_unit_path_for_cleanup in chapter_units_list:
@@ -446,13 +1152,74 @@ for book_folder_path, chapter_units_list in sorted(book_chapter_units_map.items(
             log_orchestrator_message(f"\n========================================================", level="INFO")
             log_orchestrator_message(_('BOOK_COMPLETE_PROCESSING_MSG').format(book_folder_name), level="INFO")
             log_orchestrator_message(f"========================================================", level="INFO")
-            last_processed_chapters_by_book[book_folder_name] = True 
-            save_last_processed_chapters(last_processed_chapters_by_book)
-        else:
-            log_orchestrator_message(_('BOOK_INCOMPLETE_SKIP').format(book_folder_name), "WARNING")
 
-
-log_orchestrator_message(_('ALL_BOOKS_FINISHED'), level="INFO")
-log_orchestrator_message(_('CHECK_LOG_FILES').format(ORCHESTRATOR_LOG_FILE_PATH, ""), level="INFO")
-log_orchestrator_message(_('ERRORS_LOGGED').format(GLOBAL_ERROR_LOG_FILE_PATH), "INFO")
-log_orchestrator_message(_('RESUME_POINTS_LOGGED').format(PROGRESS_LOG_FILE_PATH), "INFO")
\ No newline at end of file
+    # Mode watch : les workers restent démarrés et les nouveaux chapitres sont traités dès leur arrivée
+    if watch_mode:
+        watch_library(state_store, book_chapter_units_map, retries)
+
+    chapter_leases.stop()
+    if retries.quarantined:
+        log_orchestrator_message(_('QUARANTINE_SUMMARY').format(len(retries.quarantined), ', '.join(
+            f"{book_folder_name}/{os.path.basename(chapter_unit_path)}" for book_folder_name, chapter_unit_path in retries.quarantined)), "WARNING")
+    if memory_budget.is_enabled():
+        memory_stats = memory_budget.get_stats()
+        run_metrics.record_memory_budget(memory_stats)
+        log_orchestrator_message(_('MEMORY_BUDGET_STATS').format(memory_stats['high_water_bytes'] / 1024 / 1024, memory_stats['budget_bytes'] / 1024 / 1024,
+                                                                  memory_stats['waited_count'], memory_stats['admitted_count'],
+                                                                  memory_stats['oversized_count']), "INFO")
+        memory_budget.stop()
+
+    if STAGE_EXECUTION_MODE == 'pool':
+        stage_workers.shutdown_stage_workers()
+        ocr_cache_counters = stage_workers.get_ocr_cache_counters()
+        if config.OCR_CACHE_ENABLED:
+            log_orchestrator_message(_('OCR_CACHE_RUN_STATS').format(ocr_cache_counters['hits'], ocr_cache_counters['misses']), "INFO")
+        if config.SKIP_BLANK_SEGMENTS:
+            log_orchestrator_message(_('BLANK_SEGMENTS_RUN_STATS').format(ocr_cache_counters['skipped']), "INFO")
+
+    if config.OCR_CACHE_ENABLED:
+        evicted_count = ocr_cache.enforce_size_limit()
+        if evicted_count:
+            log_orchestrator_message(_('OCR_CACHE_EVICTED').format(evicted_count), "INFO")
+
+    run_metrics.finish_run()
+    if slowest_chapters:
+        log_slowest_chapters(slowest_chapters)
+    if stage_profiler.is_enabled():
+        try:
+            for summary_path in stage_profiler.write_stage_summaries(PROFILE_TOP_FUNCTIONS):
+                log_orchestrator_message(_('PROFILE_SUMMARY_WRITTEN').format(summary_path), "INFO")
+        except (OSError, TypeError, EOFError) as e:
+            log_orchestrator_message(_('PROFILE_SUMMARY_FAILED').format(stage_profiler.get_run_dir(), e), "WARNING")
+        stage_profiler.stop_profiling()
+    try:
+        for report_path in run_metrics.write_reports(METRICS_REPORT_DIR, 'run_metrics', METRICS_PROMETHEUS_TEXTFILE_PATH):
+            log_orchestrator_message(_('METRICS_REPORT_WRITTEN').format(report_path), "INFO")
+    except OSError as e:
+        log_orchestrator_message(_('METRICS_WRITE_FAILED').format(METRICS_REPORT_DIR, e), "WARNING")
+
+    log_orchestrator_message(_('ALL_BOOKS_FINISHED'), level="INFO")
+    log_orchestrator_message(_('CHECK_LOG_FILES').format(ORCHESTRATOR_LOG_FILE_PATH, ""), level="INFO")
+    log_orchestrator_message(_('ERRORS_LOGGED').format(GLOBAL_ERROR_LOG_FILE_PATH), "INFO")
+    log_orchestrator_message(_('RESUME_POINTS_LOGGED').format(STATE_DB_PATH), "INFO")
+    state_store.close()
+    log_sink.stop_log_sink()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=_('ORCHESTRATOR_DESCRIPTION'))
+    parser.add_argument('--watch', action='store_true',
+                        help=_('WATCH_HELP'))
+    parser.add_argument('--priority-book', action='append', default=[], metavar='BOOK',
+                        help=_('PRIORITY_BOOK_HELP'))
+    parser.add_argument('--distributed', action='store_true',
+                        help=_('DISTRIBUTED_HELP'))
+    parser.add_argument('--retry-quarantined', action='store_true',
+                        help=_('RETRY_QUARANTINED_HELP'))
+    parser.add_argument('--profile', action='store_true',
+                        help=_('PROFILE_HELP'))
+    parser.add_argument('--slowest-chapters', type=int, default=None, metavar='N',
+                        help=_('SLOWEST_CHAPTERS_HELP'))
+    args = parser.parse_args()
+    main(watch_mode=args.watch or None, priority_books=args.priority_book, profile=args.profile or None,
+         slowest_chapters=args.slowest_chapters, distributed=args.distributed or None, retry_quarantined=args.retry_quarantined)
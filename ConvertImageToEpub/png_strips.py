@@ -0,0 +1,160 @@
+import io
+import zlib
+import struct
+from PIL import Image
+
+# --- Lecture par bandes des très grandes images PNG ---
+# Image.open(...).load() décode toute l'image d'un coup : une capture de 1000x100000 pixels en RGB occupe 400 Mo.
+# Ici les données IDAT sont décompressées au fil de la lecture, STRIP_HEIGHT lignes à la fois. Chaque bande est décodée
+# par Pillow sous la forme d'un petit PNG (en-tête de la bande + lignes filtrées d'origine), précédée de la dernière ligne
+# de la bande précédente, dont dépendent les filtres PNG Up / Average / Paeth de sa première ligne. Seules les lignes
+# pas encore découpées restent en mémoire : le pic ne dépend plus de la hauteur de l'image.
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+# Types de couleur PNG lus par bandes (8 bits par canal, non entrelacés) : type -> (mode Pillow, octets par pixel)
+STRIP_COLOR_TYPES = {0: ('L', 1), 2: ('RGB', 3), 4: ('LA', 2), 6: ('RGBA', 4)}
+# Nombre de lignes décodées à la fois
+STRIP_HEIGHT = 1024
+# Taille des lectures dans le fichier (un IDAT peut contenir toute l'image)
+READ_BLOCK_SIZE = 1024 * 1024
+
+# --- En-tête PNG du fichier : (largeur, hauteur, profondeur, type de couleur, entrelacement, octets de l'IHDR) ---
+# Le fichier doit être positionné au début ; lève ValueError si ce n'est pas un PNG.
+def _read_png_header(image_file):
+    if image_file.read(8) != PNG_SIGNATURE:
+        raise ValueError("not a PNG file")
+    chunk_header = image_file.read(8)
+    if len(chunk_header) < 8 or struct.unpack('>I4s', chunk_header) != (13, b'IHDR'):
+        raise ValueError("PNG file without IHDR chunk")
+    ihdr = image_file.read(13)
+    if len(ihdr) < 13:
+        raise ValueError("truncated PNG header")
+    width, height, bit_depth, color_type, _compression, _filter, interlace = struct.unpack('>IIBBBBB', ihdr)
+    return width, height, bit_depth, color_type, interlace, ihdr
+
+# --- ((largeur, hauteur), mode) si l'image du fichier peut être lue par bandes, sinon None ; le fichier est remis au début ---
+# Seuls les PNG de 8 bits par canal, non entrelacés, en niveaux de gris / RGB (avec ou sans transparence) sont lus par bandes.
+def read_strip_header(image_file):
+    try:
+        width, height, bit_depth, color_type, interlace, _ihdr = _read_png_header(image_file)
+    except ValueError:
+        return None
+    finally:
+        image_file.seek(0)
+    if bit_depth != 8 or interlace or color_type not in STRIP_COLOR_TYPES:
+        return None
+    return (width, height), STRIP_COLOR_TYPES[color_type][0]
+
+# --- Nombre maximal de lignes gardées en mémoire pour découper des segments de max_segment_height lignes ---
+# Le segment en cours, la bande décodée au-delà de la coupe et la bande partiellement découpée au-dessus.
+def get_max_buffered_rows(max_segment_height):
+    return max_segment_height + 2 * STRIP_HEIGHT
+
+def _png_chunk(chunk_type, data):
+    return struct.pack('>I', len(data)) + chunk_type + data + struct.pack('>I', zlib.crc32(chunk_type + data))
+
+class PngStripImage:
+    # image_file : fichier PNG ouvert en lecture binaire, positionné au début (fichier ou membre d'un .cbz)
+    def __init__(self, image_file):
+        self._file = image_file
+        width, height, bit_depth, color_type, interlace, self._header = _read_png_header(image_file)
+        self._file.read(4)
+        if bit_depth != 8 or interlace or color_type not in STRIP_COLOR_TYPES:
+            raise ValueError(f"PNG not readable by strips (bit depth {bit_depth}, color type {color_type}, interlace {interlace})")
+
+        self.width, self.height = width, height
+        self.size = (width, height)
+        self.mode, bytes_per_pixel = STRIP_COLOR_TYPES[color_type]
+        self._color_type = color_type
+        self._row_bytes = 1 + width * bytes_per_pixel
+        self._idat_blocks = self._iter_idat_blocks()
+        self._decompressor = zlib.decompressobj()
+        self._compressed = b''
+        # Bandes décodées encore en mémoire : [(première ligne, image PIL)], dans l'ordre des lignes
+        self._strips = []
+        self._decoded_rows = 0
+        # Dernière ligne décodée (octets bruts), référence des filtres de la première ligne de la bande suivante
+        self._previous_row = None
+
+    # --- Blocs de données compressées des chunks IDAT, dans l'ordre du fichier ---
+    def _iter_idat_blocks(self):
+        while True:
+            chunk_header = self._file.read(8)
+            if len(chunk_header) < 8:
+                return
+            length, chunk_type = struct.unpack('>I4s', chunk_header)
+            if chunk_type == b'IEND':
+                return
+            if chunk_type != b'IDAT':
+                self._file.read(length + 4)
+                continue
+            remaining = length
+            while remaining:
+                block = self._file.read(min(remaining, READ_BLOCK_SIZE))
+                if not block:
+                    return
+                remaining -= len(block)
+                yield block
+            self._file.read(4)
+
+    # --- Lignes filtrées suivantes (octet de filtre + pixels), décompressées à la demande ---
+    def _read_filtered_rows(self, row_count):
+        needed = row_count * self._row_bytes
+        parts = []
+        while needed:
+            if not self._compressed:
+                self._compressed = next(self._idat_blocks, b'')
+                if not self._compressed:
+                    raise OSError(f"truncated PNG data ({self._decoded_rows} of {self.height} rows)")
+            data = self._decompressor.decompress(self._compressed, needed)
+            self._compressed = self._decompressor.unconsumed_tail
+            parts.append(data)
+            needed -= len(data)
+        return b''.join(parts)
+
+    # --- Décode la bande suivante et l'ajoute aux bandes en mémoire ---
+    def _decode_next_strip(self):
+        row_count = min(STRIP_HEIGHT, self.height - self._decoded_rows)
+        filtered_rows = self._read_filtered_rows(row_count)
+        prefix_rows = 0
+        if self._previous_row is not None:
+            # Ligne précédente déjà décodée, sans filtre : les filtres de la première ligne de la bande s'y réfèrent
+            filtered_rows = b'\x00' + self._previous_row + filtered_rows
+            prefix_rows = 1
+        header = struct.pack('>II', self.width, row_count + prefix_rows) + self._header[8:]
+        png_data = (PNG_SIGNATURE + _png_chunk(b'IHDR', header)
+                    + _png_chunk(b'IDAT', zlib.compress(filtered_rows, 0)) + _png_chunk(b'IEND', b''))
+        with Image.open(io.BytesIO(png_data)) as strip:
+            strip.load()
+            if prefix_rows:
+                strip = strip.crop((0, prefix_rows, self.width, prefix_rows + row_count))
+            else:
+                strip = strip.copy()
+        self._strips.append((self._decoded_rows, strip))
+        self._decoded_rows += row_count
+        self._previous_row = strip.crop((0, row_count - 1, self.width, row_count)).tobytes()
+
+    # --- Comme Image.crop : les lignes sont décodées jusqu'au bas de la zone ---
+    # Les lignes déjà libérées par discard_rows_above ne peuvent plus être lues (ValueError).
+    def crop(self, box):
+        left, top, right, bottom = box
+        while self._decoded_rows < bottom:
+            self._decode_next_strip()
+        if not self._strips or top < self._strips[0][0]:
+            raise ValueError(f"rows above {self._strips[0][0] if self._strips else self._decoded_rows} were discarded")
+
+        parts = [(strip_top, strip) for strip_top, strip in self._strips
+                 if strip_top < bottom and strip_top + strip.height > top]
+        if len(parts) == 1:
+            strip_top, strip = parts[0]
+            return strip.crop((left, top - strip_top, right, bottom - strip_top))
+        cropped = Image.new(self.mode, (right - left, bottom - top))
+        for strip_top, strip in parts:
+            part_top = max(top, strip_top)
+            part_bottom = min(bottom, strip_top + strip.height)
+            cropped.paste(strip.crop((left, part_top - strip_top, right, part_bottom - strip_top)), (0, part_top - top))
+        return cropped
+
+    # --- Libère les bandes entièrement au-dessus de la ligne row (déjà découpées) ---
+    def discard_rows_above(self, row):
+        self._strips = [(strip_top, strip) for strip_top, strip in self._strips if strip_top + strip.height > row]
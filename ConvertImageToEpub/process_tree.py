@@ -0,0 +1,44 @@
+import os
+import sys
+import signal
+import subprocess
+
+# --- Arrêt forcé d'un processus et de tous ses descendants (script d'une étape, worker du pool, Tesseract...) ---
+# Tuer seulement le processus parent laisserait tourner ses enfants (un Tesseract bloqué garderait son image en mémoire).
+# Windows : taskkill /T ; autres systèmes : les descendants sont listés avec pgrep avant d'être tués.
+
+# --- PIDs des enfants directs d'un processus (pgrep -P), liste vide si pgrep n'est pas disponible ---
+def _child_pids(pid):
+    try:
+        output = subprocess.run(['pgrep', '-P', str(pid)], capture_output=True, text=True).stdout
+    except OSError:
+        return []
+    return [int(child_pid) for child_pid in output.split() if child_pid.isdigit()]
+
+# --- Le processus et tous ses descendants, du parent vers les enfants ---
+def _process_tree_pids(pid):
+    tree_pids = [pid]
+    index = 0
+    while index < len(tree_pids):
+        tree_pids.extend(child_pid for child_pid in _child_pids(tree_pids[index]) if child_pid not in tree_pids)
+        index += 1
+    return tree_pids
+
+def kill_process_tree(pid):
+    if sys.platform == 'win32':
+        subprocess.run(['taskkill', '/F', '/T', '/PID', str(pid)], capture_output=True)
+        return
+    # L'arbre est lu avant de tuer quoi que ce soit : un enfant orphelin serait rattaché à init et ne serait plus trouvé
+    tree_pids = _process_tree_pids(pid)
+    for tree_pid in tree_pids:
+        try:
+            os.kill(tree_pid, signal.SIGSTOP)
+        except (ProcessLookupError, PermissionError):
+            pass
+    # Les enfants créés entre la lecture de l'arbre et l'arrêt de leur parent sont rattrapés ici
+    tree_pids.extend(tree_pid for tree_pid in _process_tree_pids(pid) if tree_pid not in tree_pids)
+    for tree_pid in reversed(tree_pids):
+        try:
+            os.kill(tree_pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
@@ -0,0 +1,339 @@
+import os
+import html
+import json
+import time
+import datetime
+import threading
+import contextlib
+
+# --- Mesures de l'exécution : durée de chaque étape, débit, attente en file et occupation des workers ---
+# Les orchestrateurs enregistrent ici la durée de chaque étape (extract, split, OCR, clean, collect, étapes EPUB...)
+# pour chaque chapitre, avec le nombre de pages (segments) et de mégapixels traités. En fin d'exécution :
+#   - un rapport JSON (toutes les mesures par chapitre + synthèse par étape) et un rapport HTML lisible ;
+#   - un fichier texte Prometheus (format "textfile collector" de node_exporter), réécrit aussi en cours d'exécution.
+# Sans start_run, les fonctions d'enregistrement ne font rien (scripts lancés seuls).
+
+# Bornes des histogrammes de latence (secondes)
+LATENCY_BUCKETS_SECONDS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+METRIC_PREFIX = 'convertimage'
+SLOWEST_CHAPTERS_IN_REPORT = 20
+
+_lock = threading.Lock()
+_run = None
+
+def is_enabled():
+    return _run is not None
+
+# --- Démarre l'enregistrement d'une exécution ---
+# worker_slots : nombre de chapitres traités en parallèle ; stage_worker_count : processus du pool d'étapes (ou None)
+def start_run(run_name, worker_slots, stage_worker_count=None):
+    global _run
+    with _lock:
+        _run = {
+            'run_name': run_name,
+            'started_at': datetime.datetime.now().isoformat(timespec='seconds'),
+            'start_time': time.monotonic(),
+            'end_time': None,
+            'worker_slots': worker_slots,
+            'stage_worker_count': stage_worker_count,
+            'chapter_records': [],
+            'queue_waits': [],
+            'chapter_task_busy_seconds': 0.0,
+            'chapter_task_count': 0,
+            'chapter_tasks': [],
+            'memory_budget': None,
+        }
+
+# --- Arrête le chronomètre de l'exécution (les rapports écrits ensuite utilisent cette durée) ---
+def finish_run():
+    with _lock:
+        if _run is not None and _run['end_time'] is None:
+            _run['end_time'] = time.monotonic()
+
+# --- Durée d'une étape pour un chapitre (ou un livre pour les étapes par livre, comme collect) ---
+def record_stage(stage, duration_seconds, book=None, chapter=None, pages=None, megapixels=None, success=True):
+    with _lock:
+        if _run is None:
+            return
+        _run['chapter_records'].append({
+            'stage': stage,
+            'book': book,
+            'chapter': chapter,
+            'duration_seconds': round(duration_seconds, 4),
+            'pages': pages,
+            'megapixels': round(megapixels, 3) if megapixels is not None else None,
+            'success': success,
+        })
+
+# --- Mesure le bloc comme une étape : with time_stage('convert', book, chapter): ... (échec si le bloc lève une exception) ---
+@contextlib.contextmanager
+def time_stage(stage, book=None, chapter=None, pages=None, megapixels=None):
+    start_time = time.monotonic()
+    success = False
+    try:
+        yield
+        success = True
+    finally:
+        record_stage(stage, time.monotonic() - start_time, book, chapter, pages, megapixels, success)
+
+# --- Temps passé par un chapitre dans la file de l'ordonnanceur avant d'être lancé ---
+def record_queue_wait(wait_seconds):
+    with _lock:
+        if _run is not None:
+            _run['queue_waits'].append(wait_seconds)
+
+# --- Durée totale de la tâche d'un chapitre (sert à calculer l'occupation des places du pool de chapitres) ---
+# Avec chapter, la tâche est aussi retenue pour slowest_chapter_tasks (image_size : (largeur, hauteur) ou None).
+def record_chapter_task(duration_seconds, book=None, chapter=None, image_size=None):
+    with _lock:
+        if _run is not None:
+            _run['chapter_task_busy_seconds'] += duration_seconds
+            _run['chapter_task_count'] += 1
+            if chapter:
+                _run['chapter_tasks'].append({
+                    'book': book,
+                    'chapter': chapter,
+                    'duration_seconds': round(duration_seconds, 4),
+                    'image_size': tuple(image_size) if image_size else None,
+                })
+
+# --- État du budget de mémoire (memory_budget.get_stats()) : budget, plus haut niveau atteint, chapitres ayant attendu ---
+def record_memory_budget(memory_stats):
+    with _lock:
+        if _run is not None:
+            _run['memory_budget'] = dict(memory_stats)
+
+# --- Les count tâches de chapitre les plus longues de l'exécution, de la plus lente à la plus rapide ---
+def slowest_chapter_tasks(count):
+    with _lock:
+        if _run is None:
+            return []
+        chapter_tasks = list(_run['chapter_tasks'])
+    return sorted(chapter_tasks, key=lambda task: task['duration_seconds'], reverse=True)[:count]
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def _histogram(values):
+    return [(bound, sum(1 for value in values if value <= bound)) for bound in LATENCY_BUCKETS_SECONDS]
+
+def _summarize_durations(durations):
+    sorted_durations = sorted(durations)
+    total = sum(sorted_durations)
+    return {
+        'count': len(sorted_durations),
+        'total_seconds': round(total, 3),
+        'mean_seconds': round(total / len(sorted_durations), 3) if sorted_durations else None,
+        'p50_seconds': _percentile(sorted_durations, 0.50),
+        'p95_seconds': _percentile(sorted_durations, 0.95),
+        'max_seconds': sorted_durations[-1] if sorted_durations else None,
+    }
+
+# --- Synthèse de l'exécution : par étape (latences, débits), attente en file, occupation des workers ---
+def build_report():
+    with _lock:
+        if _run is None:
+            return None
+        run = dict(_run, chapter_records=list(_run['chapter_records']), queue_waits=list(_run['queue_waits']))
+
+    end_time = run['end_time'] if run['end_time'] is not None else time.monotonic()
+    wall_seconds = max(end_time - run['start_time'], 1e-9)
+
+    records_by_stage = {}
+    for record in run['chapter_records']:
+        records_by_stage.setdefault(record['stage'], []).append(record)
+
+    stages = {}
+    stage_busy_seconds = 0.0
+    for stage, records in records_by_stage.items():
+        durations = [record['duration_seconds'] for record in records]
+        summary = _summarize_durations(durations)
+        pages = sum(record['pages'] or 0 for record in records)
+        megapixels = sum(record['megapixels'] or 0 for record in records)
+        summary.update({
+            'failures': sum(1 for record in records if not record['success']),
+            'pages': pages,
+            'megapixels': round(megapixels, 3),
+            'pages_per_second': round(pages / summary['total_seconds'], 3) if pages and summary['total_seconds'] else None,
+            'megapixels_per_second': round(megapixels / summary['total_seconds'], 3) if megapixels and summary['total_seconds'] else None,
+            'histogram': _histogram(durations),
+        })
+        stages[stage] = summary
+        if _is_worker_stage(stage):
+            stage_busy_seconds += summary['total_seconds']
+
+    queue_wait = _summarize_durations(run['queue_waits'])
+    queue_wait['histogram'] = _histogram(run['queue_waits'])
+
+    chapter_slot_utilisation = run['chapter_task_busy_seconds'] / (wall_seconds * run['worker_slots']) if run['worker_slots'] else None
+    stage_worker_utilisation = (stage_busy_seconds / (wall_seconds * run['stage_worker_count'])
+                                if run['stage_worker_count'] else None)
+
+    slowest_records = sorted((record for record in run['chapter_records'] if record['chapter']),
+                             key=lambda record: record['duration_seconds'], reverse=True)[:SLOWEST_CHAPTERS_IN_REPORT]
+
+    return {
+        'run_name': run['run_name'],
+        'started_at': run['started_at'],
+        'wall_seconds': round(wall_seconds, 3),
+        'chapters_processed': run['chapter_task_count'],
+        'worker_slots': run['worker_slots'],
+        'stage_worker_count': run['stage_worker_count'],
+        'chapter_slot_utilisation': round(chapter_slot_utilisation, 4) if chapter_slot_utilisation is not None else None,
+        # Approximation : temps des étapes (attente dans le pool de processus comprise) / capacité du pool
+        'stage_worker_utilisation': round(min(stage_worker_utilisation, 1.0), 4) if stage_worker_utilisation is not None else None,
+        'queue_wait': queue_wait,
+        'stages': stages,
+        'memory_budget': run['memory_budget'],
+        'slowest': slowest_records,
+        'records': run['chapter_records'],
+    }
+
+# --- Étapes exécutées par le pool de processus (split / OCR / clean / stream), par opposition aux étapes d'E/S ---
+def _is_worker_stage(stage):
+    return stage.endswith('.py')
+
+# --- Écriture atomique (fichier temporaire puis remplacement) : un lecteur ne voit jamais un fichier à moitié écrit ---
+def _write_atomically(path, content):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(temporary_path, path)
+
+def _escape_label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _prometheus_labels(**labels):
+    return '{' + ','.join(f'{name}="{_escape_label_value(value)}"' for name, value in labels.items()) + '}'
+
+def _prometheus_histogram(lines, metric_name, histogram, count, total, **labels):
+    for bound, bucket_count in histogram:
+        lines.append(f"{metric_name}_bucket{_prometheus_labels(**labels, le=bound)} {bucket_count}")
+    lines.append(f"{metric_name}_bucket{_prometheus_labels(**labels, le='+Inf')} {count}")
+    lines.append(f"{metric_name}_sum{_prometheus_labels(**labels)} {total}")
+    lines.append(f"{metric_name}_count{_prometheus_labels(**labels)} {count}")
+
+def render_prometheus(report):
+    run_label = report['run_name']
+    lines = [
+        f"# HELP {METRIC_PREFIX}_stage_duration_seconds Duration of a pipeline stage for one chapter (or one book).",
+        f"# TYPE {METRIC_PREFIX}_stage_duration_seconds histogram",
+    ]
+    for stage, summary in sorted(report['stages'].items()):
+        _prometheus_histogram(lines, f"{METRIC_PREFIX}_stage_duration_seconds", summary['histogram'],
+                              summary['count'], summary['total_seconds'], run=run_label, stage=stage)
+
+    for metric_name, key, metric_help in (
+            ('stage_pages_total', 'pages', 'Pages (image segments) processed by a stage.'),
+            ('stage_megapixels_total', 'megapixels', 'Megapixels processed by a stage.'),
+            ('stage_failures_total', 'failures', 'Failed runs of a stage.')):
+        lines.append(f"# HELP {METRIC_PREFIX}_{metric_name} {metric_help}")
+        lines.append(f"# TYPE {METRIC_PREFIX}_{metric_name} counter")
+        for stage, summary in sorted(report['stages'].items()):
+            lines.append(f"{METRIC_PREFIX}_{metric_name}{_prometheus_labels(run=run_label, stage=stage)} {summary[key]}")
+
+    lines.append(f"# HELP {METRIC_PREFIX}_queue_wait_seconds Time a chapter waited in the scheduler before starting.")
+    lines.append(f"# TYPE {METRIC_PREFIX}_queue_wait_seconds histogram")
+    queue_wait = report['queue_wait']
+    _prometheus_histogram(lines, f"{METRIC_PREFIX}_queue_wait_seconds", queue_wait['histogram'],
+                          queue_wait['count'], queue_wait['total_seconds'], run=run_label)
+
+    for metric_name, value, metric_help in (
+            ('chapters_processed_total', report['chapters_processed'], 'Chapter tasks run.'),
+            ('run_duration_seconds', report['wall_seconds'], 'Wall-clock duration of the run so far.'),
+            ('chapter_slot_utilisation_ratio', report['chapter_slot_utilisation'], 'Busy fraction of the chapter slots.'),
+            ('stage_worker_utilisation_ratio', report['stage_worker_utilisation'], 'Approximate busy fraction of the stage worker processes.'),
+            ('memory_budget_bytes', (report['memory_budget'] or {}).get('budget_bytes'), 'Memory budget for the concurrent chapters.'),
+            ('memory_high_water_bytes', (report['memory_budget'] or {}).get('high_water_bytes'), 'Highest estimated memory reserved by concurrent chapters.'),
+            ('memory_waited_chapters_total', (report['memory_budget'] or {}).get('waited_count'), 'Chapters that waited for memory before starting.'),
+            ('run_last_update_timestamp_seconds', round(time.time(), 3), 'Unix time of the last update of this file.')):
+        if value is None:
+            continue
+        lines.append(f"# HELP {METRIC_PREFIX}_{metric_name} {metric_help}")
+        lines.append(f"# TYPE {METRIC_PREFIX}_{metric_name} gauge")
+        lines.append(f"{METRIC_PREFIX}_{metric_name}{_prometheus_labels(run=run_label)} {value}")
+    return '\n'.join(lines) + '\n'
+
+def _format_number(value, digits=2):
+    if value is None:
+        return '-'
+    if isinstance(value, float):
+        return f"{value:.{digits}f}"
+    return str(value)
+
+def _format_megabytes(value):
+    return '-' if value is None else f"{value / 1024 / 1024:.0f}"
+
+def render_html(report):
+    escape = html.escape
+    stage_rows = []
+    for stage, summary in sorted(report['stages'].items(), key=lambda item: -item[1]['total_seconds']):
+        stage_rows.append(
+            "<tr>" + "".join(f"<td>{escape(_format_number(value))}</td>" for value in (
+                stage, summary['count'], summary['failures'], summary['total_seconds'], summary['mean_seconds'],
+                summary['p50_seconds'], summary['p95_seconds'], summary['max_seconds'],
+                summary['pages_per_second'], summary['megapixels_per_second'])) + "</tr>")
+    slowest_rows = [
+        "<tr>" + "".join(f"<td>{escape(_format_number(value))}</td>" for value in (
+            record['stage'], record['book'] or '', os.path.basename(record['chapter'] or ''), record['duration_seconds'],
+            record['pages'], record['megapixels'])) + "</tr>"
+        for record in report['slowest']]
+    queue_wait = report['queue_wait']
+    memory_stats = report['memory_budget'] or {}
+    summary_items = (
+        ('Run', report['run_name']),
+        ('Started at', report['started_at']),
+        ('Wall time (s)', report['wall_seconds']),
+        ('Chapters processed', report['chapters_processed']),
+        ('Chapter slots', report['worker_slots']),
+        ('Chapter slot utilisation', report['chapter_slot_utilisation']),
+        ('Stage worker processes', report['stage_worker_count']),
+        ('Stage worker utilisation (approx.)', report['stage_worker_utilisation']),
+        ('Queue wait p50 / p95 / max (s)', f"{_format_number(queue_wait['p50_seconds'])} / {_format_number(queue_wait['p95_seconds'])} / {_format_number(queue_wait['max_seconds'])}"),
+        ('Memory budget / high-water mark (MB)', f"{_format_megabytes(memory_stats.get('budget_bytes'))} / {_format_megabytes(memory_stats.get('high_water_bytes'))}"),
+        ('Chapters that waited for memory', memory_stats.get('waited_count')),
+    )
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{escape(report['run_name'])} - run report</title>
+<style>body{{font-family:sans-serif;margin:2em}}table{{border-collapse:collapse;margin-bottom:2em}}
+td,th{{border:1px solid #ccc;padding:4px 8px;text-align:right}}td:first-child,th:first-child{{text-align:left}}</style></head>
+<body><h1>{escape(report['run_name'])} - run report</h1>
+<table>{''.join(f"<tr><th>{escape(label)}</th><td>{escape(_format_number(value))}</td></tr>" for label, value in summary_items)}</table>
+<h2>Stages</h2>
+<table><tr><th>Stage</th><th>Runs</th><th>Failures</th><th>Total (s)</th><th>Mean (s)</th><th>p50 (s)</th><th>p95 (s)</th><th>Max (s)</th><th>Pages/s</th><th>MP/s</th></tr>
+{''.join(stage_rows)}</table>
+<h2>Slowest chapters</h2>
+<table><tr><th>Stage</th><th>Book</th><th>Chapter</th><th>Duration (s)</th><th>Pages</th><th>MP</th></tr>
+{''.join(slowest_rows)}</table>
+</body></html>
+"""
+
+# --- Réécrit le fichier texte Prometheus (appelé en cours d'exécution pour suivre l'avancement) ---
+def write_prometheus_textfile(prometheus_textfile_path):
+    report = build_report()
+    if report is None or not prometheus_textfile_path:
+        return
+    _write_atomically(prometheus_textfile_path, render_prometheus(report))
+
+# --- Écrit les rapports de fin d'exécution ; retourne les chemins écrits ---
+# report_dir vide = pas de rapport JSON / HTML ; prometheus_textfile_path vide = pas de fichier Prometheus.
+def write_reports(report_dir, report_base_name, prometheus_textfile_path=None):
+    report = build_report()
+    if report is None:
+        return []
+    written_paths = []
+    if report_dir:
+        json_path = os.path.join(report_dir, f"{report_base_name}.json")
+        _write_atomically(json_path, json.dumps(report, ensure_ascii=False, indent=2))
+        html_path = os.path.join(report_dir, f"{report_base_name}.html")
+        _write_atomically(html_path, render_html(report))
+        written_paths.extend([json_path, html_path])
+    if prometheus_textfile_path:
+        _write_atomically(prometheus_textfile_path, render_prometheus(report))
+        written_paths.append(prometheus_textfile_path)
+    return written_paths
@@ -0,0 +1,60 @@
+import numpy as np
+import config
+import split_large_images
+
+# --- Détection des segments sans texte, avant Tesseract (SKIP_BLANK_SEGMENTS) ---
+# Les captures de chapitres contiennent de longues bandes vides, des séparateurs et des bandeaux unis : Tesseract met
+# parfois plusieurs secondes à n'y rien trouver. Un segment est ici classé avec quelques opérations NumPy sur le masque
+# de l'encre (pixels éloignés de la couleur du fond, comme pour la découpe de split_large_images.py) :
+#   1. 'blank' : presque aucun pixel d'encre ;
+#   2. 'thin_lines' : l'encre ne forme que des bandes trop basses pour une ligne de texte (filets, soulignements) ;
+#   3. 'no_glyphs' : aucune bande ne ressemble à du texte. Une ligne de texte alterne encre et fond le long des lignes
+#      de pixels (traits des lettres) ; un bandeau ou un cadre uni n'a que ses deux bords. Une bande dont l'encre
+#      varie en niveaux de gris (texte sombre sur un bandeau de couleur) est gardée par prudence.
+# En cas de doute, le segment passe à Tesseract : seul un segment sans aucune bande semblable à du texte est ignoré.
+
+BLANK_SEGMENT_MAX_INK_RATIO = config.BLANK_SEGMENT_MAX_INK_RATIO
+MIN_TEXT_LINE_HEIGHT = config.BLANK_SEGMENT_MIN_TEXT_LINE_HEIGHT
+# Nombre de passages encre/fond d'une ligne de pixels qui traverse des lettres (au moins deux traits) ; une bande
+# ressemble à du texte si MIN_TEXT_LINE_HEIGHT de ses lignes de pixels en ont autant
+MIN_TEXT_LINE_TRANSITIONS = 4
+# Écart type des niveaux de gris de l'encre d'une bande au-delà duquel elle peut contenir du texte sur un fond coloré
+MIN_TEXT_INK_DEVIATION = 24
+
+REASON_BLANK = 'blank'
+REASON_THIN_LINES = 'thin_lines'
+REASON_NO_GLYPHS = 'no_glyphs'
+
+# --- Une bande de lignes de pixels (tableau de niveaux de gris) peut-elle contenir du texte ? ---
+# Le fond est celui de la bande elle-même : un texte clair sur un bandeau sombre reste visible.
+def band_may_contain_text(band_pixels):
+    ink = split_large_images.find_ink_pixels(band_pixels)
+    transitions = np.count_nonzero(ink[:, 1:] != ink[:, :-1], axis=1)
+    if np.count_nonzero(transitions >= MIN_TEXT_LINE_TRANSITIONS) >= MIN_TEXT_LINE_HEIGHT:
+        return True
+    ink_levels = band_pixels[ink]
+    return ink_levels.size > 0 and float(ink_levels.std()) > MIN_TEXT_INK_DEVIATION
+
+# --- Raison pour laquelle le segment ne contient pas de texte (REASON_*), ou None s'il peut en contenir ---
+def find_no_text_reason(img):
+    gray = img if img.mode == 'L' else img.convert('L')
+    pixels = np.asarray(gray)
+    if pixels.size == 0:
+        return REASON_BLANK
+
+    row_ink = np.count_nonzero(split_large_images.find_ink_pixels(pixels), axis=1)
+    if row_ink.sum() <= pixels.size * BLANK_SEGMENT_MAX_INK_RATIO:
+        return REASON_BLANK
+
+    # Bandes de lignes de pixels contenant de l'encre (même seuil que les lignes vides de la découpe)
+    inked_rows = row_ink > gray.width * split_large_images.BLANK_ROW_MAX_INK_RATIO
+    edges = np.flatnonzero(np.diff(np.concatenate(([False], inked_rows, [False])).astype(np.int8)))
+    bands = [(band_top, band_bottom) for band_top, band_bottom in zip(edges[0::2], edges[1::2])
+             if band_bottom - band_top >= MIN_TEXT_LINE_HEIGHT]
+    if not bands:
+        return REASON_THIN_LINES
+
+    for band_top, band_bottom in bands:
+        if band_may_contain_text(pixels[band_top:band_bottom]):
+            return None
+    return REASON_NO_GLYPHS
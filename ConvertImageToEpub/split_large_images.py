@@ -1,91 +1,303 @@
 import os
+import json
+import numpy as np
 from PIL import Image
 import datetime
 import argparse
 import config
 import sys
+import contextlib
+import concurrent.futures
+import cbz_archive
+import png_strips
 
 # Importation du module de localisation
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from localization.main import get_translator
 _ = get_translator()
 
-parser = argparse.ArgumentParser(description=_('SCRIPT_DESCRIPTION'))
-parser.add_argument('--chapter_unit', type=str, required=True,
-                    help=_('CHAPTER_UNIT_HELP'))
-args = parser.parse_args()
-CHAPTER_UNIT_DIR = args.chapter_unit
-
 PROCESSED_IMAGES_SUBFOLDER_NAME = config.PROCESSED_IMAGES_SUBFOLDER_NAME
-OUTPUT_SPLIT_IMAGES_BASE_DIR = os.path.join(CHAPTER_UNIT_DIR, PROCESSED_IMAGES_SUBFOLDER_NAME)
 
 MAX_IMAGE_HEIGHT = config.MAX_IMAGE_HEIGHT
-TARGET_IMAGE_BASENAME = '1'
+SPLIT_ON_BLANK_ROWS = config.SPLIT_ON_BLANK_ROWS
+SPLIT_SEARCH_WINDOW_PIXELS = config.SPLIT_SEARCH_WINDOW_PIXELS
+PNG_STRIP_DECODING = config.PNG_STRIP_DECODING
+PAGE_WORKER_THREADS = max(1, config.PAGE_WORKER_THREADS)
+# Nombre minimal de chiffres du numéro de page qui préfixe le nom des segments
+PAGE_NUMBER_MIN_DIGITS = 3
 SUPPORTED_IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.tiff', '.tif')
 
-ERROR_LOG_FILE = os.path.join(CHAPTER_UNIT_DIR, 'split_errors.log') 
+ERROR_LOG_FILE_NAME = 'split_errors.log'
+
+# Écart minimal (niveaux de gris) avec la couleur du fond pour qu'un pixel compte comme de l'encre
+# (l'anticrénelage et le bruit de compression du fond restent en dessous)
+INK_THRESHOLD = 48
+# Proportion maximale de pixels d'encre sur une ligne considérée comme vide (poussières, bordures fines)
+BLANK_ROW_MAX_INK_RATIO = 0.002
+
+# --- Hauteur visée des segments : SEGMENT_TARGET_HEIGHT, sinon la mesure de calibrate_segment_height.py, sinon MAX_IMAGE_HEIGHT ---
+def resolve_segment_target_height():
+    target_height = config.SEGMENT_TARGET_HEIGHT
+    if not target_height and config.SEGMENT_HEIGHT_CALIBRATION_PATH:
+        try:
+            with open(config.SEGMENT_HEIGHT_CALIBRATION_PATH, 'r', encoding='utf-8') as f:
+                target_height = int(json.load(f)['target_height'])
+        except (OSError, ValueError, KeyError, TypeError):
+            target_height = 0
+    if not target_height or target_height <= 0:
+        target_height = MAX_IMAGE_HEIGHT
+    return min(target_height, MAX_IMAGE_HEIGHT)
 
-def log_error(message, image_name="N/A", level="ERROR"):
+SEGMENT_TARGET_HEIGHT = resolve_segment_target_height()
+
+def log_error(chapter_unit_dir, message, image_name="N/A", level="ERROR"):
     timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    log_message = f"[{timestamp}] [{_('UNITÉ_CHAPITRE')}: {os.path.basename(CHAPTER_UNIT_DIR)}] [{_('IMAGE')}: {image_name}] {level}: {message}"
+    log_message = f"[{timestamp}] [{_('UNITÉ_CHAPITRE')}: {os.path.basename(chapter_unit_dir)}] [{_('IMAGE')}: {image_name}] {level}: {message}"
     
-    with open(ERROR_LOG_FILE, 'a', encoding='utf-8') as f:
+    with open(os.path.join(chapter_unit_dir, ERROR_LOG_FILE_NAME), 'a', encoding='utf-8') as f:
         f.write(log_message + '\n')
     print(f"  {log_message}")
 
-if not os.path.exists(OUTPUT_SPLIT_IMAGES_BASE_DIR):
-    os.makedirs(OUTPUT_SPLIT_IMAGES_BASE_DIR)
-    print(_('OUTPUT_FOLDER_CREATED').format(OUTPUT_SPLIT_IMAGES_BASE_DIR))
-
-if os.path.exists(ERROR_LOG_FILE):
-    os.remove(ERROR_LOG_FILE)
-    print(_('PREVIOUS_LOG_DELETED').format(ERROR_LOG_FILE))
-
-print(_('START_SPLITTING').format(os.path.basename(CHAPTER_UNIT_DIR)))
-print(_('IMAGES_WILL_BE_SAVED_IN').format(OUTPUT_SPLIT_IMAGES_BASE_DIR))
-print(_('MAX_HEIGHT_ALLOWED').format(MAX_IMAGE_HEIGHT))
-
-original_image_path = None
-found_extension = None
-for ext in SUPPORTED_IMAGE_EXTENSIONS:
-    potential_path = os.path.join(CHAPTER_UNIT_DIR, f"{TARGET_IMAGE_BASENAME}{ext}")
-    if os.path.exists(potential_path):
-        original_image_path = potential_path
-        found_extension = ext
-        break
-
-if not original_image_path:
-    log_error(_('TARGET_FILE_NOT_FOUND').format(TARGET_IMAGE_BASENAME, ', '.join(SUPPORTED_IMAGE_EXTENSIONS)), TARGET_IMAGE_BASENAME, level="ERROR")
-else:
-    image_base_name = os.path.basename(original_image_path)
-    try:
-        img = Image.open(original_image_path)
-        width, height = img.size
-        
+# --- Pages du .cbz d'un chapitre : [(fichier .cbz, membre)], dans l'ordre naturel des noms des membres ---
+def list_archive_pages(cbz_file_path):
+    return [(cbz_file_path, member) for member in cbz_archive.list_chapter_image_members(cbz_file_path)]
+
+# --- Pages d'une unité de chapitre, dans l'ordre naturel de leurs noms : [(fichier source, membre du .cbz ou None)] ---
+# Toutes les images du .cbz d'origine pour une unité '<nom>_unzipped' (lues directement dans l'archive, sauf si
+# CBZ_EXTRACT_TO_DISK), sinon toutes les images du dossier (1.png, 2.jpg, page10.png...). [] si aucune image.
+def find_chapter_pages(chapter_unit_dir):
+    if not config.CBZ_EXTRACT_TO_DISK:
+        cbz_file_path = cbz_archive.find_source_archive(chapter_unit_dir)
+        if cbz_file_path:
+            return list_archive_pages(cbz_file_path)
+    image_names = [entry.name for entry in os.scandir(chapter_unit_dir)
+                   if entry.is_file() and entry.name.lower().endswith(SUPPORTED_IMAGE_EXTENSIONS)]
+    return [(os.path.join(chapter_unit_dir, image_name), None) for image_name in sorted(image_names, key=cbz_archive.natsort_key)]
+
+# --- Préfixe des segments de la page page_index (0 pour la première) : numéro de page complété par des zéros, ---
+# pour que l'ordre alphabétique des segments (OCR.py) suive l'ordre des pages.
+def get_page_segment_base_name(page_index, page_count):
+    return str(page_index + 1).zfill(max(PAGE_NUMBER_MIN_DIGITS, len(str(page_count))))
+
+# --- Applique function(index de la page, page) à chaque page, PAGE_WORKER_THREADS pages à la fois ; résultats dans l'ordre des pages ---
+# Des threads suffisent : le décodage (Pillow, zlib), les calculs NumPy et Tesseract (processus séparé) libèrent le GIL.
+def map_chapter_pages(function, pages):
+    thread_count = min(PAGE_WORKER_THREADS, len(pages))
+    if thread_count <= 1:
+        return [function(page_index, page) for page_index, page in enumerate(pages)]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=thread_count) as executor:
+        return list(executor.map(function, range(len(pages)), pages))
+
+# --- Ouvre l'image source (fichier image, ou membre d'un .cbz : member_name, la première page si None) ---
+# Utilisation : with open_source_image(...) as (nom de l'image, image).
+# Une grande image PNG qui sera découpée est lue par bandes (png_strips.PngStripImage) au lieu d'être décodée en entier.
+@contextlib.contextmanager
+def open_source_image(source_path, member_name=None):
+    if source_path.lower().endswith('.cbz'):
+        with cbz_archive.open_chapter_image_file(source_path, member_name) as (member_name, image_file):
+            print(_('READING_IMAGE_FROM_CBZ').format(member_name, os.path.basename(source_path)))
+            yield member_name, open_image_file(image_file)
+    else:
+        with open(source_path, 'rb') as image_file:
+            yield os.path.basename(source_path), open_image_file(image_file)
+
+# --- En-tête de l'image du fichier ouvert si elle doit être lue par bandes (grande image PNG qui sera découpée), sinon None ---
+# La lecture par bandes ne passe pas par Image.open : la limite de pixels de Pillow (protection contre les images
+# « bombes » de décompression) ne s'applique pas, puisque l'image n'est jamais décodée en entier.
+def read_strip_header(image_file):
+    if not PNG_STRIP_DECODING:
+        return None
+    strip_header = png_strips.read_strip_header(image_file)
+    if strip_header and strip_header[0][1] > get_unsplit_max_height(SEGMENT_TARGET_HEIGHT):
+        return strip_header
+    return None
+
+# --- Image PIL du fichier ouvert, ou lecteur par bandes (png_strips.PngStripImage) ---
+def open_image_file(image_file):
+    if read_strip_header(image_file):
+        return png_strips.PngStripImage(image_file)
+    return Image.open(image_file)
+
+# --- En-tête de l'image du fichier ouvert : ((largeur, hauteur), mode, lignes décodées en même temps), sans décoder les pixels ---
+# Les lignes décodées en même temps sont toute la hauteur de l'image, sauf pour une image lue par bandes.
+def read_image_file_header(image_file):
+    strip_header = read_strip_header(image_file)
+    if strip_header:
+        (width, height), mode = strip_header
+        return (width, height), mode, min(height, png_strips.get_max_buffered_rows(MAX_IMAGE_HEIGHT))
+    with Image.open(image_file) as img:
+        return img.size, img.mode, img.height
+
+# --- Hauteur au-delà de laquelle une image (ou ce qui reste à découper) est coupée ---
+# La coupe peut tomber jusqu'à SPLIT_SEARCH_WINDOW_PIXELS au-delà de la cible : inutile de laisser un dernier segment de quelques lignes.
+def get_unsplit_max_height(target_height):
+    if SPLIT_ON_BLANK_ROWS:
+        return min(target_height + SPLIT_SEARCH_WINDOW_PIXELS, MAX_IMAGE_HEIGHT)
+    return target_height
+
+# --- Pixels d'encre (True) d'un tableau de niveaux de gris : pixels à plus de INK_THRESHOLD de la couleur du fond ---
+def find_ink_pixels(pixels):
+    # Couleur du fond : niveau de gris le plus fréquent (un pixel sur 8 en hauteur et en largeur suffit)
+    background = int(np.bincount(pixels[::8, ::8].ravel(), minlength=256).argmax())
+    low, high = max(background - INK_THRESHOLD, 0), min(background + INK_THRESHOLD, 255)
+    # Une seule comparaison : en uint8, pixels - low déborde pour les pixels plus sombres que low
+    return (pixels - np.uint8(low)) > np.uint8(high - low)
+
+# --- Nombre de pixels d'encre de chaque ligne de l'image entre top et bottom (profil de projection horizontale) ---
+# Seule cette bande est convertie en niveaux de gris ; le calcul est vectorisé (une comparaison et un comptage NumPy par bande).
+def compute_row_ink(img, top, bottom):
+    band = img.crop((0, top, img.width, bottom))
+    if band.mode != 'L':
+        band = band.convert('L')
+    return np.count_nonzero(find_ink_pixels(np.asarray(band)), axis=1)
+
+# --- Ligne où couper le segment qui commence à segment_top : retourne (ligne de coupe, coupe dans une bande vide) ---
+# La coupe est faite au milieu de la bande de lignes vides la plus proche de segment_top + target_height, cherchée à
+# SPLIT_SEARCH_WINDOW_PIXELS près, sans jamais dépasser MAX_IMAGE_HEIGHT pour le segment.
+def find_cut_row(img, segment_top, target_height):
+    target_row = segment_top + target_height
+    top = max(segment_top + 1, target_row - SPLIT_SEARCH_WINDOW_PIXELS)
+    bottom = min(segment_top + MAX_IMAGE_HEIGHT, target_row + SPLIT_SEARCH_WINDOW_PIXELS, img.height - 1) + 1
+
+    row_ink = compute_row_ink(img, top, bottom)
+    blank_rows = row_ink <= img.width * BLANK_ROW_MAX_INK_RATIO
+    if not blank_rows.any():
+        # Aucune ligne vide (illustration, texte très serré) : ligne la moins chargée la plus proche de la cible
+        candidate_rows = np.flatnonzero(row_ink == row_ink.min()) + top
+        return int(candidate_rows[np.abs(candidate_rows - target_row).argmin()]), False
+
+    # Bandes de lignes vides consécutives [début, fin[
+    edges = np.flatnonzero(np.diff(np.concatenate(([False], blank_rows, [False])).astype(np.int8)))
+    band_starts, band_ends = edges[0::2] + top, edges[1::2] + top
+    distances = np.maximum(np.maximum(band_starts - target_row, target_row - (band_ends - 1)), 0)
+    nearest_band = distances.argmin()
+    return int((band_starts[nearest_band] + band_ends[nearest_band]) // 2), True
+
+# --- Générateur : produit les lignes (haut, bas) de chaque segment d'une image ---
+def iter_segment_rows(img, target_height=None):
+    target_height = target_height or SEGMENT_TARGET_HEIGHT
+    unsplit_max_height = get_unsplit_max_height(target_height)
+    height = img.height
+    segment_top = 0
+    while height - segment_top > unsplit_max_height:
+        if SPLIT_ON_BLANK_ROWS:
+            # Moins de deux segments restants : la fin est partagée en deux moitiés plutôt que de laisser quelques lignes seules
+            cut_target_height = min(target_height, -(-(height - segment_top) // 2))
+            cut_row, found_blank_band = find_cut_row(img, segment_top, cut_target_height)
+            if not found_blank_band:
+                print(_('NO_BLANK_ROW_NEAR_CUT').format(segment_top + cut_target_height, cut_row))
+        else:
+            cut_row = segment_top + target_height
+        yield segment_top, cut_row
+        segment_top = cut_row
+    yield segment_top, height
+
+# --- Générateur : produit les segments (nom du segment, image PIL) d'une page d'une unité de chapitre ---
+# Un seul segment à la fois est créé : split_chapter_unit les enregistre en PNG,
+# stream_pipeline.py les passe directement à l'OCR sans passer par le disque.
+# segment_base_name : préfixe des noms des segments (get_page_segment_base_name)
+def iter_chapter_segments(img, image_base_name, segment_base_name='001'):
+    width, height = img.size
+
+    if height <= get_unsplit_max_height(SEGMENT_TARGET_HEIGHT):
         if img.mode != 'L' and img.mode != 'RGB': 
             img = img.convert('L') 
+        print(_('IMAGE_MANAGEABLE_SIZE').format(image_base_name, width, height))
+        yield f"{segment_base_name}.png", img
+    else:
+        print(_('IMAGE_TOO_LARGE').format(image_base_name, width, height))
 
-        if height <= MAX_IMAGE_HEIGHT:
-            print(_('IMAGE_MANAGEABLE_SIZE').format(image_base_name, width, height))
-            img.save(os.path.join(OUTPUT_SPLIT_IMAGES_BASE_DIR, f"{TARGET_IMAGE_BASENAME}.png"))
-        else:
-            print(_('IMAGE_TOO_LARGE').format(image_base_name, width, height))
-            
-            segments_saved_count = 0
-            for i in range(0, height, MAX_IMAGE_HEIGHT):
-                box = (0, i, width, min(i + MAX_IMAGE_HEIGHT, height))
-                segment = img.crop(box)
-                
-                segment_filename = f"{TARGET_IMAGE_BASENAME}_{str(segments_saved_count + 1).zfill(3)}.png"
-                segment_path = os.path.join(OUTPUT_SPLIT_IMAGES_BASE_DIR, segment_filename)
+        # Chaque segment est converti séparément : aucune copie de l'image entière en niveaux de gris
+        for segment_index, (segment_top, segment_bottom) in enumerate(iter_segment_rows(img)):
+            box = (0, segment_top, width, segment_bottom)
+            segment = img.crop(box)
+            if segment.mode != 'L' and segment.mode != 'RGB':
+                segment = segment.convert('L')
+            if isinstance(img, png_strips.PngStripImage):
+                img.discard_rows_above(segment_bottom)
+            yield f"{segment_base_name}_{str(segment_index + 1).zfill(3)}.png", segment
+
+# --- Nombre de segments produits par iter_chapter_segments pour une image de cette hauteur (estimation : les coupes dépendent du contenu) ---
+def count_chapter_segments(height):
+    if height <= get_unsplit_max_height(SEGMENT_TARGET_HEIGHT):
+        return 1
+    return -(-height // SEGMENT_TARGET_HEIGHT)
+
+# --- Supprime les segments d'une découpe précédente : une page ou une coupe en moins laisserait des segments en trop à l'OCR ---
+def remove_previous_segments(output_split_images_base_dir):
+    for file_name in os.listdir(output_split_images_base_dir):
+        if file_name.lower().endswith('.png') and not file_name.lower().endswith('_original.png'):
+            os.remove(os.path.join(output_split_images_base_dir, file_name))
+
+# --- Découpe une page et enregistre ses segments ; retourne (nombre de segments enregistrés, échec de la page) ---
+def split_chapter_page(chapter_unit_dir, page, segment_base_name, output_split_images_base_dir):
+    source_path, member_name = page
+    image_base_name = os.path.basename(member_name or source_path)
+    segments_saved_count = 0
+    page_failed = False
+    try:
+        with open_source_image(source_path, member_name) as (image_base_name, img):
+            for segment_filename, segment in iter_chapter_segments(img, image_base_name, segment_base_name):
+                segment_path = os.path.join(output_split_images_base_dir, segment_filename)
                 segment.save(segment_path)
                 segments_saved_count += 1
-                print(_('SAVED_SEGMENT').format(segment_path))
-            
-            print(_('SPLITTING_FINISHED').format(segments_saved_count, os.path.basename(CHAPTER_UNIT_DIR)))
+                if segment_filename != f"{segment_base_name}.png":
+                    print(_('SAVED_SEGMENT').format(segment_path))
+    except Exception as e:
+        log_error(chapter_unit_dir, _('ERROR_DURING_PROCESSING').format(e), image_base_name, level="ERROR")
+        page_failed = True
+    return segments_saved_count, page_failed
+
+# --- Fonction principale : découpe toutes les pages d'une unité de chapitre (appelable par les workers) ---
+def split_chapter_unit(chapter_unit_dir):
+    output_split_images_base_dir = os.path.join(chapter_unit_dir, PROCESSED_IMAGES_SUBFOLDER_NAME)
+    error_log_file = os.path.join(chapter_unit_dir, ERROR_LOG_FILE_NAME)
+
+    if not os.path.exists(output_split_images_base_dir):
+        os.makedirs(output_split_images_base_dir)
+        print(_('OUTPUT_FOLDER_CREATED').format(output_split_images_base_dir))
+
+    if os.path.exists(error_log_file):
+        os.remove(error_log_file)
+        print(_('PREVIOUS_LOG_DELETED').format(error_log_file))
 
+    print(_('START_SPLITTING').format(os.path.basename(chapter_unit_dir)))
+    print(_('IMAGES_WILL_BE_SAVED_IN').format(output_split_images_base_dir))
+    print(_('MAX_HEIGHT_ALLOWED').format(MAX_IMAGE_HEIGHT))
+    print(_('SEGMENT_TARGET_HEIGHT_INFO').format(SEGMENT_TARGET_HEIGHT))
+
+    pages = []
+    try:
+        pages = find_chapter_pages(chapter_unit_dir)
+        if not pages:
+            log_error(chapter_unit_dir, _('CHAPTER_IMAGES_NOT_FOUND').format(', '.join(SUPPORTED_IMAGE_EXTENSIONS)), level="ERROR")
     except Exception as e:
-        log_error(_('ERROR_DURING_PROCESSING').format(e), image_base_name, level="ERROR")
+        log_error(chapter_unit_dir, _('ERROR_DURING_PROCESSING').format(e), level="ERROR")
+
+    if pages:
+        remove_previous_segments(output_split_images_base_dir)
+        print(_('CHAPTER_PAGES_FOUND').format(len(pages), min(PAGE_WORKER_THREADS, len(pages))))
+        page_results = map_chapter_pages(
+            lambda page_index, page: split_chapter_page(chapter_unit_dir, page, get_page_segment_base_name(page_index, len(pages)),
+                                                        output_split_images_base_dir),
+            pages)
+        # Une page en échec fait échouer l'étape : l'orchestrateur réessaie le chapitre (puis le met en quarantaine)
+        # au lieu de passer à l'OCR avec des pages manquantes
+        failed_page_count = sum(1 for _count, page_failed in page_results if page_failed)
+        if failed_page_count:
+            message = _('CHAPTER_PAGES_FAILED').format(failed_page_count, len(pages))
+            log_error(chapter_unit_dir, message, level="ERROR")
+            raise RuntimeError(message)
+        segments_saved_count = sum(count for count, _page_failed in page_results)
+        if segments_saved_count > 1:
+            print(_('SPLITTING_FINISHED').format(segments_saved_count, os.path.basename(chapter_unit_dir)))
+
+    print(_('IMAGE_PREPARATION_FINISHED').format(os.path.basename(chapter_unit_dir)))
+    print(_('CHECK_LOG_FOR_ERRORS').format(error_log_file))
 
-print(_('IMAGE_PREPARATION_FINISHED').format(os.path.basename(CHAPTER_UNIT_DIR)))
-print(_('CHECK_LOG_FOR_ERRORS').format(ERROR_LOG_FILE))
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=_('SCRIPT_DESCRIPTION'))
+    parser.add_argument('--chapter_unit', type=str, required=True,
+                        help=_('CHAPTER_UNIT_HELP'))
+    args = parser.parse_args()
+    split_chapter_unit(args.chapter_unit)
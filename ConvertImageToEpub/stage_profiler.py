@@ -0,0 +1,139 @@
+import io
+import os
+import sys
+import pstats
+import shutil
+import cProfile
+import datetime
+
+# --- Profilage optionnel des étapes (python orchestrator.py --profile ou PROFILE_MODE = True) ---
+# Chaque étape de chaque chapitre est profilée séparément :
+#   <PROFILE_OUTPUT_DIR>/<date_heure>/<étape>/<livre>__<chapitre>.pstats
+# En fin d'exécution, les profils d'une étape sont fusionnés (<étape>.merged.pstats, lisible par snakeviz, pstats...)
+# et les PROFILE_TOP_FUNCTIONS fonctions les plus coûteuses sont écrites dans <étape>_top_functions.txt.
+# Profileurs :
+#   'cprofile' : cProfile, dans les workers du pool ou via "python -m cProfile" pour les scripts enfants ;
+#   'py-spy'   : profileur par échantillonnage (faible surcoût), utilisé pour les scripts enfants
+#                (STAGE_EXECUTION_MODE = 'subprocess') si la commande py-spy est installée. Ses profils sont des
+#                piles "repliées" (<chapitre>.collapsed) ; le résumé compte les échantillons par fonction.
+
+PROFILERS = ('cprofile', 'py-spy')
+CPROFILE_SUFFIX = '.pstats'
+SAMPLED_PROFILE_SUFFIX = '.collapsed'
+
+_run_dir = None
+_profiler = 'cprofile'
+
+def is_enabled():
+    return _run_dir is not None
+
+def get_run_dir():
+    return _run_dir
+
+def get_profiler():
+    return _profiler
+
+# --- Profileur réellement utilisable : py-spy seulement pour des scripts enfants, et s'il est installé ---
+def resolve_profiler(requested_profiler, stage_execution_mode):
+    if requested_profiler == 'py-spy' and stage_execution_mode == 'subprocess' and shutil.which('py-spy'):
+        return 'py-spy'
+    return 'cprofile'
+
+# --- Démarre le profilage d'une exécution ; retourne le dossier des profils de cette exécution ---
+def start_profiling(output_dir, profiler='cprofile'):
+    global _run_dir, _profiler
+    run_dir = os.path.join(output_dir, datetime.datetime.now().strftime('%Y%m%d_%H%M%S'))
+    os.makedirs(run_dir, exist_ok=True)
+    _run_dir = run_dir
+    _profiler = profiler
+    return run_dir
+
+def stop_profiling():
+    global _run_dir
+    _run_dir = None
+
+# --- Chemin du profil d'une étape pour un chapitre (le dossier de l'étape est créé) ---
+def chapter_profile_path(script_name, book_folder_name, chapter_unit_path):
+    stage_dir = os.path.join(_run_dir, os.path.splitext(script_name)[0])
+    os.makedirs(stage_dir, exist_ok=True)
+    suffix = SAMPLED_PROFILE_SUFFIX if _profiler == 'py-spy' else CPROFILE_SUFFIX
+    return os.path.join(stage_dir, f"{book_folder_name}__{os.path.basename(chapter_unit_path)}{suffix}")
+
+# --- Exécute function(*args) sous cProfile et écrit le profil, même si la fonction lève une exception ---
+# Appelée dans le worker du pool (fonction de module : elle doit pouvoir être envoyée au processus).
+def profile_call(profile_path, function, *args):
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        return function(*args)
+    finally:
+        profiler.disable()
+        profiler.dump_stats(profile_path)
+
+# --- Commande d'un script enfant, enveloppée par le profileur ---
+def build_profiled_command(script_path, chapter_unit_path, profile_path):
+    script_command = [script_path, '--chapter_unit', chapter_unit_path]
+    if _profiler == 'py-spy':
+        return ['py-spy', 'record', '--format', 'raw', '--output', profile_path, '--', sys.executable] + script_command
+    return [sys.executable, '-m', 'cProfile', '-o', profile_path] + script_command
+
+# --- Fusionne les profils cProfile d'une étape ; retourne (texte du top, chemin du profil fusionné) ---
+def _summarize_cprofile_stage(profile_paths, merged_path, top_count):
+    buffer = io.StringIO()
+    stats = pstats.Stats(profile_paths[0], stream=buffer)
+    for profile_path in profile_paths[1:]:
+        stats.add(profile_path)
+    stats.dump_stats(merged_path)
+    stats.strip_dirs().sort_stats('tottime').print_stats(top_count)
+    return buffer.getvalue()
+
+# --- Résumé des piles repliées de py-spy ("cadre;cadre;cadre nombre") : échantillons propres et cumulés par fonction ---
+def _summarize_sampled_stage(profile_paths, top_count):
+    own_samples = {}
+    cumulative_samples = {}
+    total_samples = 0
+    for profile_path in profile_paths:
+        with open(profile_path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                stack, _separator, count_text = line.rstrip('\n').rpartition(' ')
+                if not stack or not count_text.isdigit():
+                    continue
+                count = int(count_text)
+                frames = stack.split(';')
+                total_samples += count
+                own_samples[frames[-1]] = own_samples.get(frames[-1], 0) + count
+                for frame in set(frames):
+                    cumulative_samples[frame] = cumulative_samples.get(frame, 0) + count
+
+    lines = [f"{total_samples} samples in {len(profile_paths)} profiles", "",
+             f"{'own':>8} {'own%':>6} {'cumul':>8} {'cumul%':>6}  function"]
+    for frame, count in sorted(own_samples.items(), key=lambda item: item[1], reverse=True)[:top_count]:
+        lines.append(f"{count:>8} {count / total_samples:>6.1%} {cumulative_samples[frame]:>8} "
+                     f"{cumulative_samples[frame] / total_samples:>6.1%}  {frame}")
+    return "\n".join(lines) + "\n"
+
+# --- Écrit le résumé des fonctions les plus coûteuses de chaque étape ; retourne les chemins des résumés ---
+def write_stage_summaries(top_count):
+    if _run_dir is None:
+        return []
+    summary_paths = []
+    for stage_name in sorted(os.listdir(_run_dir)):
+        stage_dir = os.path.join(_run_dir, stage_name)
+        if not os.path.isdir(stage_dir):
+            continue
+        cprofile_paths = sorted(os.path.join(stage_dir, name) for name in os.listdir(stage_dir) if name.endswith(CPROFILE_SUFFIX))
+        sampled_paths = sorted(os.path.join(stage_dir, name) for name in os.listdir(stage_dir) if name.endswith(SAMPLED_PROFILE_SUFFIX))
+        sections = []
+        if cprofile_paths:
+            merged_path = os.path.join(_run_dir, f"{stage_name}.merged{CPROFILE_SUFFIX}")
+            sections.append(_summarize_cprofile_stage(cprofile_paths, merged_path, top_count))
+        if sampled_paths:
+            sections.append(_summarize_sampled_stage(sampled_paths, top_count))
+        if not sections:
+            continue
+        summary_path = os.path.join(_run_dir, f"{stage_name}_top_functions.txt")
+        with open(summary_path, 'w', encoding='utf-8') as f:
+            f.write(f"# {stage_name} : {len(cprofile_paths) + len(sampled_paths)} chapters\n")
+            f.write("\n".join(sections))
+        summary_paths.append(summary_path)
+    return summary_paths
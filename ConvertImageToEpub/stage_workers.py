@@ -0,0 +1,290 @@
+import os
+import io
+import sys
+import time
+import itertools
+import threading
+import traceback
+import weakref
+import contextlib
+import subprocess
+import multiprocessing
+import concurrent.futures
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import config
+
+# Les scripts des étapes sont importés une seule fois par worker (PIL, pytesseract, localisation...)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import split_large_images
+import OCR
+import clean_ocr_text
+import stream_pipeline
+import stage_profiler
+import process_tree
+
+# --- Fonctions des étapes, indexées par le nom du script (compatible avec run_child_script) ---
+STAGE_FUNCTIONS = {
+    'split_large_images.py': split_large_images.split_chapter_unit,
+    'OCR.py': OCR.ocr_chapter_unit,
+    'clean_ocr_text.py': clean_ocr_text.clean_chapter_unit,
+    'stream_pipeline.py': stream_pipeline.process_chapter_unit_in_memory,
+}
+
+# Étapes qui retournent les compteurs des segments du chapitre (cache OCR, segments sans texte ignorés)
+OCR_CACHE_STAGES = ('OCR.py', 'stream_pipeline.py')
+
+# Initialisation optionnelle de chaque worker au démarrage du pool : (fonction, arguments) ou None
+# (utilisée par les benchmarks pour installer un faux moteur OCR dans les workers)
+WORKER_INITIALIZER = None
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# {pool: (PIDs de ses workers, tâche en cours dans chaque worker)} : tableaux partagés remplis par les workers eux-mêmes
+_executor_workers = {}
+# Pools dont un worker a été tué après un dépassement de délai : les échecs des autres chapitres en cours n'en sont que la conséquence
+_killed_executors = weakref.WeakSet()
+_task_ids = itertools.count(1)
+
+# Dans chaque worker : son emplacement dans les tableaux partagés du pool
+_worker_slot = None
+_worker_task_ids = None
+
+# --- Étape interrompue parce que le pool a été arrêté pour un autre chapitre (tâche hors délai) ---
+# L'échec ne vient pas du chapitre lui-même : l'orchestrateur le réessaie sans le compter dans CHAPTER_MAX_ATTEMPTS.
+class StageWorkersRestarted(Exception):
+    pass
+
+# Compteurs des segments (cache OCR, segments sans texte ignorés) cumulés sur tous les chapitres traités par le pool
+_ocr_cache_counters = OCR.new_segment_counters()
+_ocr_cache_counters_lock = threading.Lock()
+
+# --- Nombre de processus workers à démarrer ---
+def get_worker_count():
+    if config.STAGE_WORKER_PROCESSES and config.STAGE_WORKER_PROCESSES > 0:
+        return config.STAGE_WORKER_PROCESSES
+    return os.cpu_count() or 1
+
+# --- Exécuté dans le worker : appelle une fonction en capturant sa sortie comme le ferait un sous-processus ---
+# Retourne (succès, valeur_de_retour, stdout, stderr).
+def _call_captured(function, *args):
+    stdout_buffer = io.StringIO()
+    stderr_buffer = io.StringIO()
+    success = True
+    result = None
+    with contextlib.redirect_stdout(stdout_buffer), contextlib.redirect_stderr(stderr_buffer):
+        try:
+            result = function(*args)
+        except Exception:
+            traceback.print_exc()
+            success = False
+    return success, result, stdout_buffer.getvalue(), stderr_buffer.getvalue()
+
+# --- Initialisation d'un worker : il note son PID dans le premier emplacement libre, puis appelle WORKER_INITIALIZER ---
+def _init_worker(next_slot, worker_pids, worker_task_ids, initializer=None, initargs=()):
+    global _worker_slot, _worker_task_ids
+    with next_slot.get_lock():
+        slot = next_slot.value
+        next_slot.value += 1
+    if slot < len(worker_pids):
+        worker_pids[slot] = os.getpid()
+        _worker_slot, _worker_task_ids = slot, worker_task_ids
+    if initializer is not None:
+        initializer(*initargs)
+
+# --- Exécuté dans le worker : la tâche en cours est notée pour que seul ce worker soit tué si elle dépasse son délai ---
+# Une tâche déjà transmise au worker ne peut plus être annulée : si elle démarre après l'échéance de son étape
+# (deadline, time.monotonic()), elle n'est pas exécutée.
+def _run_task(task_id, deadline, function, *args):
+    if _worker_slot is not None:
+        _worker_task_ids[_worker_slot] = task_id
+    try:
+        if deadline is not None and time.monotonic() >= deadline:
+            return False, None, "", ""
+        return function(*args)
+    finally:
+        if _worker_slot is not None:
+            _worker_task_ids[_worker_slot] = 0
+
+# --- Soumet une tâche au pool ; son identifiant est ajouté à stage_task_ids (tâches de l'étape en cours) ---
+def _submit(executor, stage_task_ids, deadline, function, *args):
+    task_id = next(_task_ids)
+    stage_task_ids.append(task_id)
+    return executor.submit(_run_task, task_id, deadline, function, *args)
+
+# profile_path : si renseigné, l'étape est exécutée sous cProfile et son profil est écrit dans ce fichier
+def _run_stage_in_worker(script_name, chapter_unit_path, profile_path=None):
+    if profile_path:
+        return _call_captured(stage_profiler.profile_call, profile_path, STAGE_FUNCTIONS[script_name], chapter_unit_path)
+    return _call_captured(STAGE_FUNCTIONS[script_name], chapter_unit_path)
+
+def _count_ocr_cache_results(segment_counters):
+    with _ocr_cache_counters_lock:
+        for segment_origin, count in segment_counters.items():
+            _ocr_cache_counters[segment_origin] += count
+
+# --- Compteurs des segments depuis le démarrage du pool : {'hits': ..., 'misses': ..., 'skipped': ...} ---
+def get_ocr_cache_counters():
+    with _ocr_cache_counters_lock:
+        return dict(_ocr_cache_counters)
+
+# --- Démarre (une seule fois) le pool de workers persistants ---
+def start_stage_workers():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            worker_count = get_worker_count()
+            next_slot = multiprocessing.Value('i', 0)
+            worker_pids = multiprocessing.Array('i', worker_count, lock=False)
+            worker_task_ids = multiprocessing.Array('q', worker_count, lock=False)
+            initializer, initargs = WORKER_INITIALIZER if WORKER_INITIALIZER is not None else (None, ())
+            _executor = ProcessPoolExecutor(max_workers=worker_count, initializer=_init_worker,
+                                            initargs=(next_slot, worker_pids, worker_task_ids, initializer, initargs))
+            _executor_workers[_executor] = (worker_pids, worker_task_ids)
+        return _executor
+
+# --- Arrête le pool de workers ---
+def shutdown_stage_workers():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor_workers.pop(_executor, None)
+            _executor = None
+
+# --- Étape hors délai : seuls les workers qui exécutent l'une de ses tâches sont tués, avec leurs processus enfants (Tesseract) ---
+# Si aucune de ses tâches n'a démarré (pool occupé par d'autres chapitres), elles sont simplement annulées.
+# Un worker tué rend le pool inutilisable : les autres chapitres en cours échouent (StageWorkersRestarted) et sont
+# réessayés par l'orchestrateur sans que cet échec leur soit compté. Le pool suivant est recréé à la demande.
+def _kill_stage_task_workers(executor, stage_task_ids, stage_futures):
+    global _executor
+    for future in stage_futures:
+        future.cancel()
+    with _executor_lock:
+        worker_pids, worker_task_ids = _executor_workers.get(executor, ((), ()))
+        stage_tasks = set(stage_task_ids)
+        timed_out_worker_pids = [worker_pids[slot] for slot, task_id in enumerate(worker_task_ids[:])
+                                 if task_id in stage_tasks and worker_pids[slot]]
+        if not timed_out_worker_pids:
+            return
+        if _executor is executor:
+            _executor = None
+        _executor_workers.pop(executor, None)
+        _killed_executors.add(executor)
+    for worker_pid in timed_out_worker_pids:
+        process_tree.kill_process_tree(worker_pid)
+    executor.shutdown(wait=False, cancel_futures=True)
+
+# --- Secondes restantes avant l'échéance (None : pas d'échéance) ---
+def _remaining_seconds(deadline):
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+# --- Exécute une étape pour une unité de chapitre dans un worker chaud ---
+# Retourne (succès, stdout, stderr), comme un appel de script enfant.
+# Avec profile_path, l'OCR n'est pas réparti par segment : tout le chapitre est profilé dans un seul worker.
+# timeout : durée maximale de l'étape en secondes (None : illimitée) ; au-delà, les workers qui l'exécutent sont tués
+# et subprocess.TimeoutExpired est levée, comme pour un script enfant.
+# Lève StageWorkersRestarted si le pool a été arrêté pendant l'étape à cause d'un autre chapitre hors délai.
+def run_stage(script_name, chapter_unit_path, profile_path=None, timeout=None):
+    global _executor
+    if script_name not in STAGE_FUNCTIONS:
+        raise FileNotFoundError(script_name)
+
+    executor = start_stage_workers()
+    deadline = time.monotonic() + timeout if timeout else None
+    stage_task_ids = []
+    stage_futures = []
+    try:
+        if script_name == 'OCR.py' and config.OCR_SEGMENT_PARALLELISM and not profile_path:
+            return _run_ocr_by_segments(executor, chapter_unit_path, deadline, stage_task_ids, stage_futures)
+        future = _submit(executor, stage_task_ids, deadline, _run_stage_in_worker, script_name, chapter_unit_path, profile_path)
+        stage_futures.append(future)
+        success, result, stdout, stderr = future.result(timeout=_remaining_seconds(deadline))
+        if script_name in OCR_CACHE_STAGES and isinstance(result, dict):
+            _count_ocr_cache_results(result)
+        return success, stdout, stderr
+    except concurrent.futures.TimeoutError:
+        _kill_stage_task_workers(executor, stage_task_ids, stage_futures)
+        raise subprocess.TimeoutExpired(script_name, timeout)
+    except (BrokenProcessPool, concurrent.futures.CancelledError):
+        if executor in _killed_executors:
+            raise StageWorkersRestarted(script_name)
+        # Un worker est mort (mémoire insuffisante, crash natif...) : on recrée le pool pour les chapitres suivants
+        with _executor_lock:
+            if _executor is executor:
+                _executor = None
+            _executor_workers.pop(executor, None)
+        return False, "", traceback.format_exc()
+
+# --- OCR d'un chapitre découpé en tâches par segment ---
+# Chaque segment est une tâche du pool : les segments de tous les chapitres en cours se partagent
+# tous les workers, puis le texte est réassemblé dans l'ordre des segments.
+# deadline : échéance de l'étape (time.monotonic()), ou None
+# stage_task_ids / stage_futures : complétées avec les tâches soumises (workers à tuer si l'étape dépasse son délai)
+def _run_ocr_by_segments(executor, chapter_unit_path, deadline=None, stage_task_ids=None, stage_futures=None):
+    stage_task_ids = [] if stage_task_ids is None else stage_task_ids
+    stage_futures = [] if stage_futures is None else stage_futures
+    stdout_parts = []
+    stderr_parts = []
+
+    def collect(call_result):
+        success, result, stdout, stderr = call_result
+        if stdout:
+            stdout_parts.append(stdout.rstrip('\n'))
+        if stderr:
+            stderr_parts.append(stderr.rstrip('\n'))
+        return success, result
+
+    def outcome(success):
+        return success, "\n".join(stdout_parts), "\n".join(stderr_parts)
+
+    def submit(function, *args):
+        future = _submit(executor, stage_task_ids, deadline, _call_captured, function, *args)
+        stage_futures.append(future)
+        return future
+
+    success, _result = collect(submit(OCR.prepare_ocr_output, chapter_unit_path).result(timeout=_remaining_seconds(deadline)))
+    if not success:
+        return outcome(False)
+
+    success, chapter_images = collect(submit(OCR.list_chapter_segments, chapter_unit_path).result(timeout=_remaining_seconds(deadline)))
+    if not success:
+        return outcome(False)
+
+    if chapter_images:
+        segment_futures = [submit(OCR.ocr_segment, chapter_unit_path, img_filename)
+                           for img_filename in chapter_images]
+
+        segment_texts = []
+        failed_segment_count = 0
+        for index, future in enumerate(segment_futures):
+            success, segment_result = collect(future.result(timeout=_remaining_seconds(deadline)))
+            if not success:
+                for remaining_future in segment_futures[index + 1:]:
+                    remaining_future.cancel()
+                return outcome(False)
+            extracted_text_segment, stop_chapter, segment_origin = segment_result
+            segment_texts.append(extracted_text_segment)
+            _count_ocr_cache_results({segment_origin: 1})
+            if segment_origin == OCR.SEGMENT_FAILED:
+                failed_segment_count += 1
+            if stop_chapter:
+                for remaining_future in segment_futures[index + 1:]:
+                    remaining_future.cancel()
+                break
+
+        # Un segment en échec fait échouer l'étape sans écrire le texte du chapitre
+        success, _result = collect(submit(OCR.raise_if_segments_failed, chapter_unit_path, failed_segment_count,
+                                          len(chapter_images)).result(timeout=_remaining_seconds(deadline)))
+        if not success:
+            return outcome(False)
+
+        success, _result = collect(submit(OCR.write_chapter_text, chapter_unit_path, segment_texts).result(timeout=_remaining_seconds(deadline)))
+        if not success:
+            return outcome(False)
+
+    success, _result = collect(submit(OCR.finish_ocr, chapter_unit_path).result(timeout=_remaining_seconds(deadline)))
+    return outcome(success)
@@ -0,0 +1,288 @@
+import os
+import json
+import sqlite3
+import datetime
+import threading
+
+# --- Base SQLite (mode WAL) qui mémorise l'avancement du traitement ---
+# Chaque mise à jour est une petite transaction (une ligne par chapitre / étape / EPUB) au lieu de réécrire
+# tout un fichier JSON, et chaque thread utilise sa propre connexion : plusieurs workers peuvent écrire en même temps.
+
+CHAPTER_STATUS_DONE = 'done'
+CHAPTER_STATUS_FAILED = 'failed'
+CHAPTER_STATUS_QUARANTINED = 'quarantined'
+STAGE_STATUS_RUNNING = 'running'
+STAGE_STATUS_DONE = 'done'
+STAGE_STATUS_FAILED = 'failed'
+BOOK_STATUS_IN_PROGRESS = 'in_progress'
+BOOK_STATUS_COMPLETE = 'complete'
+EPUB_STATUS_SUCCESS = 'success'
+EPUB_STATUS_FAIL = 'fail'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS books (
+    book_name TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    last_chapter_path TEXT,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS chapters (
+    book_name TEXT NOT NULL,
+    chapter_path TEXT NOT NULL,
+    status TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (book_name, chapter_path)
+);
+CREATE TABLE IF NOT EXISTS stages (
+    book_name TEXT NOT NULL,
+    chapter_path TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    status TEXT NOT NULL,
+    duration_seconds REAL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (book_name, chapter_path, stage)
+);
+CREATE TABLE IF NOT EXISTS chapter_sources (
+    book_name TEXT NOT NULL,
+    chapter_path TEXT NOT NULL,
+    file_stat TEXT NOT NULL,
+    signature TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (book_name, chapter_path)
+);
+CREATE TABLE IF NOT EXISTS epub_chapters (
+    book_name TEXT NOT NULL,
+    epub_name TEXT NOT NULL,
+    status TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (book_name, epub_name)
+);
+CREATE TABLE IF NOT EXISTS epub_books (
+    book_name TEXT PRIMARY KEY,
+    complete INTEGER NOT NULL,
+    updated_at TEXT NOT NULL
+);
+"""
+
+def _now():
+    return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+class StateStore:
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._local = threading.local()
+        # Toutes les connexions ouvertes (tous threads confondus), pour que close() les ferme aussi
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        connection = self._connection()
+        with connection:
+            connection.executescript(SCHEMA)
+
+    # --- Une connexion par thread (les connexions sqlite3 ne se partagent pas entre threads) ---
+    # check_same_thread=False permet seulement à close() de fermer depuis le thread principal les connexions des workers.
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or connection not in self._connections:
+            connection = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("PRAGMA busy_timeout=30000")
+            self._local.connection = connection
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
+
+    # --- Ferme les connexions de tous les threads (la dernière fermée fait le checkpoint du journal WAL) ---
+    def close(self):
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            connection.close()
+        self._local.connection = None
+
+    def is_empty(self):
+        row = self._connection().execute("SELECT (SELECT COUNT(*) FROM books) + (SELECT COUNT(*) FROM epub_books)").fetchone()
+        return row[0] == 0
+
+    # === Livres (OCR) ===
+    def get_book_status(self, book_name):
+        row = self._connection().execute("SELECT status FROM books WHERE book_name = ?", (book_name,)).fetchone()
+        return row[0] if row else None
+
+    def is_book_complete(self, book_name):
+        return self.get_book_status(book_name) == BOOK_STATUS_COMPLETE
+
+    def mark_book_complete(self, book_name):
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT INTO books (book_name, status, last_chapter_path, updated_at) VALUES (?, ?, NULL, ?) "
+                "ON CONFLICT(book_name) DO UPDATE SET status = excluded.status, updated_at = excluded.updated_at",
+                (book_name, BOOK_STATUS_COMPLETE, _now()))
+
+    # --- Un livre complet reçoit un nouveau chapitre (mode watch) : il n'est plus sauté en entier au prochain lancement ---
+    def mark_book_in_progress(self, book_name):
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT INTO books (book_name, status, last_chapter_path, updated_at) VALUES (?, ?, NULL, ?) "
+                "ON CONFLICT(book_name) DO UPDATE SET status = excluded.status, updated_at = excluded.updated_at",
+                (book_name, BOOK_STATUS_IN_PROGRESS, _now()))
+
+    def get_complete_books(self):
+        return {row[0] for row in self._connection().execute(
+            "SELECT book_name FROM books WHERE status = ?", (BOOK_STATUS_COMPLETE,))}
+
+    # --- Nombre de chapitres terminés par livre : {livre: nombre} ---
+    def count_completed_chapters_by_book(self):
+        return {book_name: count for book_name, count in self._connection().execute(
+            "SELECT book_name, COUNT(*) FROM chapters WHERE status = ? GROUP BY book_name", (CHAPTER_STATUS_DONE,))}
+
+    # === Chapitres et étapes (OCR) ===
+    def record_stage(self, book_name, chapter_path, stage, status, duration_seconds=None):
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT INTO stages (book_name, chapter_path, stage, status, duration_seconds, updated_at) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(book_name, chapter_path, stage) DO UPDATE SET status = excluded.status, "
+                "duration_seconds = excluded.duration_seconds, updated_at = excluded.updated_at",
+                (book_name, chapter_path, stage, status, duration_seconds, _now()))
+
+    def get_stage_status(self, book_name, chapter_path, stage):
+        row = self._connection().execute(
+            "SELECT status FROM stages WHERE book_name = ? AND chapter_path = ? AND stage = ?",
+            (book_name, chapter_path, stage)).fetchone()
+        return row[0] if row else None
+
+    # --- Ensemble exact des chapitres terminés d'un livre (une requête par livre, test d'appartenance en O(1)) ---
+    def get_completed_chapters(self, book_name):
+        return {row[0] for row in self._connection().execute(
+            "SELECT chapter_path FROM chapters WHERE book_name = ? AND status = ?", (book_name, CHAPTER_STATUS_DONE))}
+
+    # --- Étapes terminées d'un chapitre (noms des scripts) ---
+    def get_completed_stages(self, book_name, chapter_path):
+        return {row[0] for row in self._connection().execute(
+            "SELECT stage FROM stages WHERE book_name = ? AND chapter_path = ? AND status = ?",
+            (book_name, chapter_path, STAGE_STATUS_DONE))}
+
+    def get_chapter_status(self, book_name, chapter_path):
+        row = self._connection().execute(
+            "SELECT status FROM chapters WHERE book_name = ? AND chapter_path = ?",
+            (book_name, chapter_path)).fetchone()
+        return row[0] if row else None
+
+    # --- Marque un chapitre comme traité (et mémorise le dernier chapitre terminé du livre, à titre indicatif) ---
+    def mark_chapter_done(self, book_name, chapter_path):
+        now = _now()
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT INTO chapters (book_name, chapter_path, status, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(book_name, chapter_path) DO UPDATE SET status = excluded.status, updated_at = excluded.updated_at",
+                (book_name, chapter_path, CHAPTER_STATUS_DONE, now))
+            connection.execute(
+                "INSERT INTO books (book_name, status, last_chapter_path, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(book_name) DO UPDATE SET last_chapter_path = excluded.last_chapter_path, updated_at = excluded.updated_at",
+                (book_name, BOOK_STATUS_IN_PROGRESS, chapter_path, now))
+
+    def mark_chapter_failed(self, book_name, chapter_path):
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT INTO chapters (book_name, chapter_path, status, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(book_name, chapter_path) DO UPDATE SET status = excluded.status, updated_at = excluded.updated_at",
+                (book_name, chapter_path, CHAPTER_STATUS_FAILED, _now()))
+
+    # --- Chapitre en échec après tous ses essais : il est sauté par les exécutions suivantes ---
+    def mark_chapter_quarantined(self, book_name, chapter_path):
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT INTO chapters (book_name, chapter_path, status, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(book_name, chapter_path) DO UPDATE SET status = excluded.status, updated_at = excluded.updated_at",
+                (book_name, chapter_path, CHAPTER_STATUS_QUARANTINED, _now()))
+
+    def get_quarantined_chapters(self, book_name):
+        return {row[0] for row in self._connection().execute(
+            "SELECT chapter_path FROM chapters WHERE book_name = ? AND status = ?", (book_name, CHAPTER_STATUS_QUARANTINED))}
+
+    # --- Sort tous les chapitres de la quarantaine (ils seront retraités) ; retourne leur nombre ---
+    def release_quarantined_chapters(self):
+        with self._connection() as connection:
+            return connection.execute("DELETE FROM chapters WHERE status = ?", (CHAPTER_STATUS_QUARANTINED,)).rowcount
+
+    # --- Oublie l'avancement d'un chapitre (son contenu a changé : il sera entièrement retraité) ---
+    def forget_chapter(self, book_name, chapter_path):
+        with self._connection() as connection:
+            connection.execute("DELETE FROM chapters WHERE book_name = ? AND chapter_path = ?", (book_name, chapter_path))
+            connection.execute("DELETE FROM stages WHERE book_name = ? AND chapter_path = ?", (book_name, chapter_path))
+            connection.execute("DELETE FROM chapter_sources WHERE book_name = ? AND chapter_path = ?", (book_name, chapter_path))
+
+    # --- Fichiers .cbz des chapitres traités : {chemin du chapitre: (taille:date du fichier, signature des CRC)} ---
+    def get_chapter_sources(self, book_name):
+        return {chapter_path: (file_stat, signature) for chapter_path, file_stat, signature in self._connection().execute(
+            "SELECT chapter_path, file_stat, signature FROM chapter_sources WHERE book_name = ?", (book_name,))}
+
+    def set_chapter_source(self, book_name, chapter_path, file_stat, signature):
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT INTO chapter_sources (book_name, chapter_path, file_stat, signature, updated_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(book_name, chapter_path) DO UPDATE SET file_stat = excluded.file_stat, "
+                "signature = excluded.signature, updated_at = excluded.updated_at",
+                (book_name, chapter_path, file_stat, signature, _now()))
+
+    # === EPUB (epub_orchestrateur.py) ===
+    # --- Retourne (epubs réussis, epubs échoués, livre complet) ---
+    def get_epub_progress(self, book_name):
+        connection = self._connection()
+        done_epubs = set()
+        failed_epubs = set()
+        for epub_name, status in connection.execute(
+                "SELECT epub_name, status FROM epub_chapters WHERE book_name = ?", (book_name,)):
+            if status == EPUB_STATUS_SUCCESS:
+                done_epubs.add(epub_name)
+            else:
+                failed_epubs.add(epub_name)
+        row = connection.execute("SELECT complete FROM epub_books WHERE book_name = ?", (book_name,)).fetchone()
+        return done_epubs, failed_epubs, bool(row and row[0])
+
+    def get_complete_epub_books(self):
+        return {row[0] for row in self._connection().execute("SELECT book_name FROM epub_books WHERE complete = 1")}
+
+    def record_epub_chapter(self, book_name, epub_name, status):
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT INTO epub_chapters (book_name, epub_name, status, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(book_name, epub_name) DO UPDATE SET status = excluded.status, updated_at = excluded.updated_at",
+                (book_name, epub_name, status, _now()))
+
+    def set_epub_book_complete(self, book_name, complete):
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT INTO epub_books (book_name, complete, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(book_name) DO UPDATE SET complete = excluded.complete, updated_at = excluded.updated_at",
+                (book_name, 1 if complete else 0, _now()))
+
+    # === Reprise des anciens fichiers .progress (JSON) ===
+    # --- Importe processed_chapters.progress : {livre: chemin du dernier chapitre ou True} ---
+    def import_json_chapter_progress(self, progress_file_path):
+        with open(progress_file_path, 'r', encoding='utf-8') as f:
+            progress = json.load(f)
+        for book_name, progress_status in progress.items():
+            if progress_status is True:
+                self.mark_book_complete(book_name)
+            elif progress_status:
+                self.mark_chapter_done(book_name, progress_status)
+        return len(progress)
+
+    # --- Importe calibre_processed_books.progress : {livre: {"success": [...], "fail": [...], "complete": bool} ou True} ---
+    def import_json_epub_progress(self, progress_file_path):
+        with open(progress_file_path, 'r', encoding='utf-8') as f:
+            progress = json.load(f)
+        for book_name, book_progress in progress.items():
+            if book_progress is True:
+                self.set_epub_book_complete(book_name, True)
+                continue
+            if not isinstance(book_progress, dict):
+                continue
+            for epub_name in book_progress.get("success", []):
+                self.record_epub_chapter(book_name, epub_name, EPUB_STATUS_SUCCESS)
+            for epub_name in book_progress.get("fail", []):
+                self.record_epub_chapter(book_name, epub_name, EPUB_STATUS_FAIL)
+            self.set_epub_book_complete(book_name, book_progress.get("complete", False))
+        return len(progress)
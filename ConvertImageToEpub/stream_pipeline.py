@@ -0,0 +1,126 @@
+import os
+import datetime
+import argparse
+import config
+import sys
+import threading
+import split_large_images
+import OCR
+import clean_ocr_text
+
+# Importation du module de localisation
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from localization.main import get_translator
+_ = get_translator()
+
+# --- Traitement d'une unité de chapitre en mémoire : découpe -> OCR -> nettoyage ---
+# Les segments produits par split_large_images.iter_chapter_segments passent directement à l'OCR (PAGE_WORKER_THREADS
+# pages à la fois), puis le texte assemblé dans l'ordre des pages passe par clean_ocr_text.clean_text : aucun PNG
+# (images_processed) ni texte brut (sortieTXT) n'est écrit, seul le texte nettoyé est enregistré dans sortieTXT_cleaned.
+# Utilisé quand PIPELINE_MODE = 'stream' (config.py) ; le mode 'disk' garde les dossiers intermédiaires pour le débogage.
+OUTPUT_CLEANED_TEXT_SUBFOLDER_NAME = config.OUTPUT_CLEANED_TEXT_SUBFOLDER_NAME
+
+ERROR_LOG_FILE_NAME = 'stream_errors.log'
+
+def log_error(chapter_unit_dir, message, image_name="N/A", level="ERROR"):
+    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    log_message = f"[{timestamp}] [{_('UNITÉ_CHAPITRE')}: {os.path.basename(chapter_unit_dir)}] [{_('IMAGE')}: {image_name}] {level}: {message}"
+
+    with open(os.path.join(chapter_unit_dir, ERROR_LOG_FILE_NAME), 'a', encoding='utf-8') as f:
+        f.write(log_message + '\n')
+    print(f"  {log_message}")
+
+# --- Découpe et OCR d'une page ; retourne (textes des segments, compteurs des segments : OCR.new_segment_counters, échec de la page) ---
+# stop_event est positionné quand Tesseract est introuvable : les autres pages s'arrêtent aussi.
+def ocr_chapter_page(chapter_unit_dir, page, segment_base_name, stop_event):
+    source_path, member_name = page
+    image_base_name = os.path.basename(member_name or source_path)
+    segment_texts = []
+    segment_counters = OCR.new_segment_counters()
+    page_failed = False
+    try:
+        with split_large_images.open_source_image(source_path, member_name) as (image_base_name, img):
+            for segment_filename, segment in split_large_images.iter_chapter_segments(img, image_base_name, segment_base_name):
+                if stop_event.is_set():
+                    break
+                extracted_text_segment, stop_chapter, segment_origin = OCR.ocr_image(chapter_unit_dir, segment, segment_filename)
+                segment_texts.append(extracted_text_segment)
+                segment_counters[segment_origin] += 1
+                if segment_origin == OCR.SEGMENT_FAILED:
+                    page_failed = True
+                if stop_chapter:
+                    stop_event.set()
+                    break
+    except Exception as e:
+        log_error(chapter_unit_dir, _('ERROR_DURING_PROCESSING').format(e), image_base_name)
+        page_failed = True
+    return segment_texts, segment_counters, page_failed
+
+# --- Fonction principale (appelable par les workers) ---
+# Retourne les compteurs des segments de ce chapitre : {'hits': ..., 'misses': ..., 'skipped': ..., 'failed': ...}
+def process_chapter_unit_in_memory(chapter_unit_dir):
+    segment_counters = OCR.new_segment_counters()
+    output_cleaned_text_dir = os.path.join(chapter_unit_dir, OUTPUT_CLEANED_TEXT_SUBFOLDER_NAME)
+    error_log_file = os.path.join(chapter_unit_dir, ERROR_LOG_FILE_NAME)
+
+    if os.path.exists(error_log_file):
+        os.remove(error_log_file)
+        print(_('PREVIOUS_LOG_DELETED').format(error_log_file))
+
+    print(_('STREAM_START').format(os.path.basename(chapter_unit_dir)))
+    print(_('MAX_HEIGHT_ALLOWED').format(split_large_images.MAX_IMAGE_HEIGHT))
+    print(_('SEGMENT_TARGET_HEIGHT_INFO').format(split_large_images.SEGMENT_TARGET_HEIGHT))
+    print(_('OCR_LANGUAGE').format(OCR.OCR_LANGUAGE))
+
+    pages = []
+    try:
+        pages = split_large_images.find_chapter_pages(chapter_unit_dir)
+        if not pages:
+            log_error(chapter_unit_dir, _('CHAPTER_IMAGES_NOT_FOUND').format(', '.join(split_large_images.SUPPORTED_IMAGE_EXTENSIONS)))
+    except Exception as e:
+        log_error(chapter_unit_dir, _('ERROR_DURING_PROCESSING').format(e))
+
+    if pages:
+        print(_('CHAPTER_PAGES_FOUND').format(len(pages), min(split_large_images.PAGE_WORKER_THREADS, len(pages))))
+        stop_event = threading.Event()
+        page_results = split_large_images.map_chapter_pages(
+            lambda page_index, page: ocr_chapter_page(chapter_unit_dir, page, split_large_images.get_page_segment_base_name(page_index, len(pages)), stop_event),
+            pages)
+
+        # Une page en échec fait échouer l'étape sans écrire de texte : l'orchestrateur réessaie le chapitre
+        # (puis le met en quarantaine) au lieu de le terminer avec des pages manquantes
+        failed_page_count = sum(1 for _texts, _counters, page_failed in page_results if page_failed)
+        if failed_page_count:
+            message = _('CHAPTER_PAGES_FAILED').format(failed_page_count, len(pages))
+            log_error(chapter_unit_dir, message)
+            raise RuntimeError(message)
+
+        segment_texts = []
+        for page_segment_texts, page_segment_counters, _page_failed in page_results:
+            segment_texts.extend(page_segment_texts)
+            for segment_origin, count in page_segment_counters.items():
+                segment_counters[segment_origin] += count
+
+        if segment_texts:
+            cleaned_text = clean_ocr_text.clean_text("\n\n".join(segment_texts))
+
+            os.makedirs(output_cleaned_text_dir, exist_ok=True)
+            output_filepath = os.path.join(output_cleaned_text_dir, f"{OCR.build_output_filename_base(chapter_unit_dir)}.txt")
+            with open(output_filepath, 'w', encoding='utf-8') as f:
+                f.write(cleaned_text)
+
+            print(_('STREAM_TEXT_SAVED').format(os.path.basename(chapter_unit_dir), os.path.basename(output_filepath)))
+        else:
+            log_error(chapter_unit_dir, _('STREAM_NO_SEGMENT'))
+
+    OCR.print_segment_counters(segment_counters)
+    print(_('STREAM_FINISHED').format(os.path.basename(chapter_unit_dir)))
+    print(_('CHECK_LOG_FOR_ERRORS').format(error_log_file))
+    return segment_counters
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=_('STREAM_SCRIPT_DESCRIPTION'))
+    parser.add_argument('--chapter_unit', type=str, required=True,
+                        help=_('CHAPTER_UNIT_HELP'))
+    args = parser.parse_args()
+    process_chapter_unit_in_memory(args.chapter_unit)